@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+JSON Çözümleme Benchmark'ı
+- decode.py biçimlerini (full, slim, stream) aynı yanıt gövdeleri üzerinde karşılaştırır
+- Gerçek bültene benzemesi için her event'e --markets kadar oranlı market eklenir
+- Süre (medyan ms), tepe bellek ve döngüler arasında tutulan bellek (tracemalloc, MB) raporlanır
+- Her biçimin ürettiği kayıtların tam ağaçla aynı olduğu build_records ile doğrulanır
+
+Kullanım: python benchmarks/bench_decode.py [--events 2000] [--markets 30] [--repeat 5]
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from payloads import make_payload
+import decode
+from ingest import build_records
+
+def make_bodies(events, markets, shape):
+    """Market listeleri şişirilmiş iddaa ve Bilyoner yanıt gövdeleri (bytes)"""
+    j1, j2 = make_payload(events, shape)
+    for ev in j1["data"]["events"]:
+        for k in range(markets):
+            ev["m"].append({"i": k, "t": 1, "st": 1, "s": "1", "mbc": 1,
+                            "o": [{"no": n, "odd": 1.5 + n / 10, "n": str(n)} for n in range(3)]})
+        ev.update({"sid": 1, "cid": 10, "d": 1700000000, "kOdd": True, "hs": 3})
+    for b in (j2["events"].values() if isinstance(j2["events"], dict) else j2["events"]):
+        b.update({"sportId": 1, "marketCount": markets, "oddsChanged": False, "tvChannel": ""})
+    dump = lambda doc: json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return dump(j1), dump(j2)
+
+def measure(mode, bodies, repeat):
+    """(medyan ms, tepe MB, tutulan MB, kayıtlar)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode.decode("iddaa", bodies[0], mode)
+        decode.decode("bilyoner", bodies[1], mode)
+        times.append((time.perf_counter() - start) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    j1 = decode.decode("iddaa", bodies[0], mode)
+    j2 = decode.decode("bilyoner", bodies[1], mode)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    records, _ = build_records(j1, j2)
+    return statistics.median(times), peak / 1e6, retained / 1e6, records
+
+def main():
+    parser = argparse.ArgumentParser(description="Bülten JSON çözümleme biçimlerini karşılaştırır")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--markets", type=int, default=30)
+    parser.add_argument("--shape", choices=("list", "dict"), default="list")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bodies = make_bodies(args.events, args.markets, args.shape)
+    parser_name = "orjson" if decode.orjson is not None else "json"
+    print(f"{args.events} event, {args.markets} market/event, gövde {sum(map(len, bodies)) / 1e6:.1f} MB, "
+          f"ayrıştırıcı: {parser_name}")
+    print(f"{'biçim':<8}{'ms':>10}{'tepe MB':>10}{'tutulan MB':>12}  kayıtlar")
+
+    modes = ["full", "slim"] + (["stream"] if decode.ijson is not None else [])
+    expected = None
+    for mode in modes:
+        ms, peak, retained, records = measure(mode, bodies, args.repeat)
+        if expected is None:
+            expected = records
+        same = "aynı" if records == expected else "FARKLI"
+        print(f"{mode:<8}{ms:>10.1f}{peak:>10.1f}{retained:>12.1f}  {same}")
+    if decode.ijson is None:
+        print("stream: ijson kurulu değil, atlandı")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Eşleştirme Benchmark'ı
+- Eski doğrusal arama (next(...) ile) ile sözlük tabanlı build_records'u karşılaştırır
+- 100, 1k ve 10k event için döngü süresini ölçer
+
+Kullanım: python benchmarks/bench_ingest.py [--sizes 100,1000,10000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ingest import build_records, odds_status
+from payloads import make_payload
+
+def linear_records(j1, j2):
+    """Eski get_data() içindeki O(skor x event) eşleştirme"""
+    sc_list = j1.get("data", {}).get("sc", [])
+    ev_list = j1.get("data", {}).get("events", [])
+    b_list = j2.get("events", [])
+    records = []
+    for sc in sc_list:
+        mac_id = sc["id"]
+        ev_obj = next((e for e in ev_list if e["i"] == mac_id), None)
+        if not ev_obj:
+            continue
+        b_obj = next((b for b in b_list if b.get("brdId") == ev_obj.get("bri")), None)
+        if not b_obj:
+            tarih, saat, lig, mbs = "", "", "", ""
+        else:
+            tarih = b_obj["esd"].split("T")[0] if "esd" in b_obj else ""
+            saat = b_obj.get("strt", "")
+            lig = b_obj.get("lgn", "")
+            mbs = b_obj.get("mbs", "")
+        records.append((str(mac_id), ev_obj["hn"], ev_obj["an"], f"{sc['ht']['c']}-{sc['at']['c']}",
+                        sc.get("min", "ST"), odds_status(ev_obj), tarih, saat, lig, mbs))
+    return records
+
+def best_of(fn, repeat):
+    """fn'yi repeat kez çalıştırıp en iyi süreyi (saniye) döndürür"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Eşleştirme benchmark'ı")
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-linear-above", type=int, default=10000,
+                        help="Bu boyutun üstünde doğrusal yöntemi atla")
+    args = parser.parse_args()
+
+    print(f"{'event':>8} {'doğrusal (ms)':>15} {'sözlük (ms)':>13} {'hızlanma':>10}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        j1, j2 = make_payload(n)
+        fast = best_of(lambda: build_records(j1, j2), args.repeat)
+        if n <= args.skip_linear_above:
+            assert linear_records(j1, j2) == build_records(j1, j2)[0]
+            slow = best_of(lambda: linear_records(j1, j2), 1 if n >= 10000 else args.repeat)
+            print(f"{n:>8} {slow * 1000:>15.2f} {fast * 1000:>13.2f} {slow / fast:>9.1f}x")
+        else:
+            print(f"{n:>8} {'-':>15} {fast * 1000:>13.2f} {'-':>10}")
+
+if __name__ == "__main__":
+    main()
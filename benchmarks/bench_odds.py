@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Oran Geçmişi Benchmark'ı
+- N canlı event, event başına M market (3 sonuç) için P sorgu döngüsü simüle edilir; her döngüde
+  oranların bir kısmı değişir, ara sıra market askıya alınır
+- odds.OddsStore ile saf yaklaşım (her döngüde her sonuç için bir satır) karşılaştırılır:
+  disk boyutu, tic başına bayt, döngü başına yakalama süresi ve tek event/market aralık okuma süresi
+- Okunan geçmişin üretilen değişimlerle birebir aynı olduğu doğrulanır
+
+Kullanım: python benchmarks/bench_odds.py [--events 200] [--markets 30] [--polls 300] [--change 0.02]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import odds
+from odds import OddsStore
+
+def make_events(n, markets, rng):
+    return [{"i": 1000 + e, "m": [{"i": k, "s": 1, "o": [{"no": no, "odd": round(rng.uniform(1.1, 9.0), 2)}
+                                                      for no in (1, 2, 3)]} for k in range(markets)]}
+            for e in range(n)]
+
+def tick(events, change, rng):
+    for ev in events:
+        for m in ev["m"]:
+            if rng.random() < change / 10:
+                m["s"] = 0 if m["s"] else 1
+            for o in m["o"]:
+                if rng.random() < change:
+                    o["odd"] = round(max(1.01, o["odd"] + rng.choice((-0.05, 0.05, -0.1, 0.1))), 2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Oran tic deposu ile saf tabloyu karşılaştırır")
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--markets", type=int, default=30)
+    parser.add_argument("--polls", type=int, default=300, help="1 sn aralıklı döngü sayısı")
+    parser.add_argument("--change", type=float, default=0.02, help="Döngü başına sonucun değişme olasılığı")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    events = make_events(args.events, args.markets, rng)
+    tmp = tempfile.mkdtemp()
+    store = OddsStore(os.path.join(tmp, "odds.db"))
+    naive = sqlite3.connect(os.path.join(tmp, "naive.db"))
+    naive.execute("CREATE TABLE odds(ts INTEGER, event_id INTEGER, market_id INTEGER, no INTEGER, odd REAL)")
+    naive.execute("CREATE INDEX idx_naive ON odds(event_id, market_id, ts)")
+
+    target = (events[0]["i"], 0)
+    truth, last = [], {}
+    start_ts = 1_700_000_000
+    capture_ms = []
+    for p in range(args.polls):
+        now = start_ts + p
+        if p:
+            tick(events, args.change, rng)
+        payload = {"data": {"events": events}}
+        t = time.perf_counter()
+        store.capture(payload, now=now)
+        store.flush(now=now)
+        capture_ms.append((time.perf_counter() - t) * 1000)
+        naive.executemany("INSERT INTO odds VALUES(?,?,?,?,?)",
+                          [(now, ev["i"], m["i"], o["no"], o["odd"]) for ev in events for m in ev["m"] for o in m["o"]])
+        naive.commit()
+        # Hedef market için beklenen değişimler
+        m = events[0]["m"][0]
+        for no, value in [(odds.STATUS, m["s"])] + [(o["no"], round(o["odd"] * 100)) for o in m["o"]]:
+            if last.get(no) != value:
+                last[no] = value
+                truth.append((now, 0, no, value))
+    store.flush(force=True, now=start_ts + args.polls)
+    naive.execute("VACUUM")
+
+    t = time.perf_counter()
+    history = store.read(*target)
+    read_ms = (time.perf_counter() - t) * 1000
+    t = time.perf_counter()
+    naive.execute("SELECT ts, no, odd FROM odds WHERE event_id = ? AND market_id = ?", target).fetchall()
+    naive_read_ms = (time.perf_counter() - t) * 1000
+    assert sorted(history) == sorted(truth), "okunan geçmiş beklenenden farklı"
+
+    store.conn.execute("VACUUM")
+    store.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size = os.path.getsize(store.path)
+    naive_size = os.path.getsize(os.path.join(tmp, "naive.db"))
+    ticks = store.stats["ticks"]
+    capture_ms.sort()
+    print(f"{args.events} event x {args.markets} market x 3 sonuç, {args.polls} döngü, değişim olasılığı {args.change}")
+    print(f"tic: {ticks}, batch: {store.stats['batches']}")
+    print(f"odds.db: {size / 1e6:.2f} MB ({size / ticks:.1f} bayt/tic), saf tablo: {naive_size / 1e6:.2f} MB "
+          f"({naive_size / size:.0f}x)")
+    print(f"yakalama: medyan {capture_ms[len(capture_ms) // 2]:.2f} ms/döngü, "
+          f"p95 {capture_ms[int(len(capture_ms) * 0.95)]:.2f} ms")
+    print(f"tek market okuma: {read_ms:.2f} ms ({len(history)} tic), saf tablo {naive_read_ms:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Uçtan Uca Döngü Benchmark'ı
+- Canlı API'ler yerine yerel taklit sunucu (standin.py) kullanılır; gecikme ve hata oranı ayarlanabilir
+- Her giriş noktasının get_data() fonksiyonu ayrı bir süreçte, geçici bir dizinde çalıştırılır
+- Aşamalar: fetch (ağ + ayrıştırma, duvar saati), parse (JSON ayrıştırma), join (build_all), write
+- Sonuçlar benchmarks/baselines.json ile karşılaştırılır; tolerans aşılırsa çıkış kodu 1 olur
+
+Kullanım:
+    python benchmarks/bench_pipeline.py [--variants github_worker,pythonanywhere_worker] [--events 2000]
+                                        [--cycles 30] [--latency 0.02] [--error-rate 0] [--save-baseline]
+"""
+import argparse
+import contextlib
+import importlib
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+BASELINES = os.path.join(HERE, "baselines.json")
+STAGES = ("fetch", "parse", "join", "write", "cycle")
+
+# Giriş noktası -> (modül, ek ortam değişkenleri). {tmp} süreç başına geçici dizinle değiştirilir.
+VARIANTS = {
+    "worker": ("worker", {"CANLI_DB_FILE": "{tmp}/canli.db"}),
+    "combined_app": ("combined_app", {"HOME": "{tmp}", "CANLI_WORKER": "0"}),
+    "pythonanywhere_worker": ("pythonanywhere_worker", {"HOME": "{tmp}"}),
+    "github_worker": ("github_worker", {}),
+    "github_worker-shards": ("github_worker", {"CANLI_OUTPUT": "shards"}),
+}
+
+class Timings:
+    """Döngü başına aşama sürelerini toplar (saniye)"""
+
+    def __init__(self):
+        self.cycles = []
+
+    def start_cycle(self):
+        self.cycles.append(dict.fromkeys(STAGES, 0.0))
+
+    @contextlib.contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.cycles:
+                self.cycles[-1][stage] += time.perf_counter() - start
+
+    def wrap(self, obj, attr, stage):
+        """obj.attr fonksiyonunu süre ölçen bir sarmalayıcıyla değiştirir"""
+        original = getattr(obj, attr)
+
+        def timed(*args, **kwargs):
+            with self.measure(stage):
+                return original(*args, **kwargs)
+        setattr(obj, attr, timed)
+
+def run_child(variant, url, cycles):
+    """Alt süreç: giriş noktasını yükleyip get_data() döngülerini ölçer, sonucu JSON olarak yazar"""
+    logging.basicConfig(level=logging.WARNING)
+    sys.path.insert(0, ROOT)
+    import decode
+    import fetch
+
+    for source in fetch.SOURCES.values():
+        source.url, source.query = f"{url}/{source.name}", {}
+
+    timings = Timings()
+    # JSON ayrıştırma fetch havuzundaki thread'lerde yapılır; süreler toplanır
+    timings.wrap(decode, "decode", "parse")
+
+    module = importlib.import_module(VARIANTS[variant][0])
+    # Seçimli giriş noktasında süreç lider gibi çalışır: yazma yolları elle açılır
+    open_write_paths = getattr(module, "open_write_paths", None)
+    if open_write_paths is not None:
+        open_write_paths()
+    timings.wrap(module, "fetch_all", "fetch")
+    timings.wrap(module, "build_all", "join")
+    sink = getattr(module, "shard_writer", None) or module.writer
+    timings.wrap(sink, "write", "write")
+
+    # Hatalar zamanlayıcısı olan giriş noktalarında scheduler.failure'dan, diğerlerinde dönüş değerinden sayılır
+    failed = []
+    scheduler = getattr(module, "scheduler", None)
+    if scheduler is not None:
+        original_failure = scheduler.failure
+        scheduler.failure = lambda error=None: (failed.append(error), original_failure(error))
+
+    # Arka plan yazmada döngü yazımı beklemez; write aşaması yine de aynı döngüye sayılsın diye döngü sonrası beklenir
+    write_queue = getattr(module, "write_queue", None)
+    for _ in range(cycles):
+        timings.start_cycle()
+        with timings.measure("cycle"):
+            ok = module.get_data()
+        if write_queue is not None:
+            write_queue.flush()
+        if scheduler is None and ok is False:
+            failed.append(None)
+    failures = len(failed)
+
+    result = {}
+    for stage in STAGES:
+        values = sorted(c[stage] * 1000 for c in timings.cycles)
+        result[stage] = {"median": round(statistics.median(values), 2),
+                         "p95": round(values[int(len(values) * 0.95) - 1 if len(values) > 1 else 0], 2)}
+    result["failures"] = failures
+    print(json.dumps(result))
+
+def run_variant(variant, url, cycles):
+    """Varyantı geçici dizinde ayrı bir süreçte çalıştırır"""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        env.update({k: v.format(tmp=tmp) for k, v in VARIANTS[variant][1].items()})
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", variant, "--url", url, "--cycles", str(cycles)],
+            cwd=tmp, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        last = proc.stderr.strip().splitlines()[-1:] or ["?"]
+        return None, last[0]
+    return json.loads(proc.stdout.strip().splitlines()[-1]), None
+
+def compare(result, baseline, tolerance):
+    """Medyan süreleri temel değerle karşılaştırır; (metin, gerileme_var_mı) döndürür"""
+    if not baseline:
+        return "temel yok", False
+    notes, regressed = [], False
+    for stage in STAGES:
+        old, new = baseline.get(stage, {}).get("median"), result[stage]["median"]
+        # 1 ms altındaki aşamalar gürültüye çok açık, karşılaştırılmaz
+        if not old or old < 1 or new < 1:
+            continue
+        change = (new - old) / old
+        # Gerileme: medyan hem toleransı hem de temel ölçümün p95'ini aşmalı (gürültü payı)
+        if change > tolerance and new > baseline[stage].get("p95", old):
+            notes.append(f"{stage} +{change:.0%}")
+            regressed = True
+    return ("GERİLEME: " + ", ".join(notes)) if notes else "ok", regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="Uçtan uca get_data() benchmark'ı")
+    parser.add_argument("--variants", default=",".join(VARIANTS))
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--cycles", type=int, default=30)
+    parser.add_argument("--change-ratio", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.02, help="Taklit sunucu gecikmesi (sn)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tolerance", type=float, default=0.4, help="İzin verilen yavaşlama oranı")
+    parser.add_argument("--save-baseline", action="store_true", help="Sonuçları temel değer olarak kaydet")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.url, args.cycles)
+        return
+
+    sys.path.insert(0, HERE)
+    from standin import StandIn
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as f:
+            baselines = json.load(f)
+
+    standin = StandIn(args.events, change_ratio=args.change_ratio, latency=args.latency,
+                      jitter=args.jitter, error_rate=args.error_rate).start()
+    print(f"{args.events} event, {args.cycles} döngü, gecikme {args.latency * 1000:.0f} ms, "
+          f"hata oranı {args.error_rate:.0%} (medyan ms)")
+    print(f"{'varyant':<24}" + "".join(f"{s:>9}" for s in STAGES) + f"{'hata':>6}  karşılaştırma")
+
+    regressed = False
+    for variant in args.variants.split(","):
+        result, error = run_variant(variant, standin.url, args.cycles)
+        if result is None:
+            print(f"{variant:<24} çalıştırılamadı: {error}")
+            continue
+        # Temel değerler sadece aynı boyut ve gecikmeyle yapılan ölçümlerle karşılaştırılır
+        key = f"{variant}@{args.events}/{args.latency * 1000:.0f}ms/{args.error_rate:g}"
+        note, worse = compare(result, baselines.get(key), args.tolerance)
+        regressed |= worse
+        print(f"{variant:<24}" + "".join(f"{result[s]['median']:>9.2f}" for s in STAGES)
+              + f"{result['failures']:>6}  {note}")
+        if args.save_baseline:
+            baselines[key] = {s: result[s] for s in STAGES}
+    standin.stop()
+
+    if args.save_baseline:
+        with open(BASELINES, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Temel değerler {BASELINES} dosyasına kaydedildi")
+    sys.exit(1 if regressed else 0)
+
+if __name__ == "__main__":
+    main()
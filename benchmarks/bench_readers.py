@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Okuyucu Yük Testi
+- Arka planda sürekli yazan bir worker varken N okuyucu thread'in saniyede kaç sorgu yaptığını ölçer
+- Eski düzen: tek paylaşılan bağlantı (kilitle sıralanmış okuma ve yazma)
+- Yeni düzen: storage.ReadPool ile thread başına salt-okunur bağlantılar + WAL
+
+Kullanım: python benchmarks/bench_readers.py [--threads 1,4,8] [--seconds 3] [--events 2000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from payloads import make_payload
+from ingest import build_records
+from storage import MatchWriter, ReadPool, connect
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS raw(
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              ts TEXT DEFAULT CURRENT_TIMESTAMP,
+              mac_id TEXT, ev TEXT, dep TEXT, skor TEXT, dakika TEXT,
+              oran TEXT, tarih TEXT, saat TEXT, lig TEXT, mbs TEXT)"""
+
+# /api/matches ve ana sayfanın yaptığı sorgular
+QUERIES = (
+    "SELECT * FROM raw ORDER BY id DESC LIMIT 50",
+    "SELECT ev, skor, dep, dakika, lig, tarih, saat, oran FROM raw ORDER BY id DESC LIMIT 20",
+)
+
+def writer_loop(writer, j1, j2, stop):
+    """Skorları değiştirerek sürekli yazma döngüsü çalıştırır"""
+    sc = j1["data"]["sc"]
+    tick = 0
+    while not stop.is_set():
+        tick += 1
+        for i in range(0, len(sc), 7):
+            sc[i]["min"] = str(tick % 90)
+        writer.write(build_records(j1, j2)[0])
+
+def run(mode, threads, seconds, events):
+    """Verilen düzende okuyucuların toplam sorgu/s değerini döndürür"""
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, "bench.db")
+    if mode == "shared":
+        # Eski düzen: varsayılan journal, tek bağlantı, tüm erişim tek kilitte
+        conn = sqlite3.connect(path, check_same_thread=False)
+    else:
+        conn = connect(path, check_same_thread=False)
+    conn.execute(SCHEMA)
+    conn.commit()
+    writer = MatchWriter(conn, mode="append")
+    j1, j2 = make_payload(events)
+    writer.write(build_records(j1, j2)[0])
+
+    pool = ReadPool(path)
+    shared_lock = writer.lock
+    stop = threading.Event()
+    counts = [0] * threads
+
+    def reader(idx):
+        while not stop.is_set():
+            for sql in QUERIES:
+                if mode == "shared":
+                    with shared_lock:
+                        conn.execute(sql).fetchall()
+                else:
+                    pool.connection().execute(sql).fetchall()
+                counts[idx] += 1
+
+    workers = [threading.Thread(target=writer_loop, args=(writer, j1, j2, stop))]
+    workers += [threading.Thread(target=reader, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in workers:
+        t.join()
+    pool.close_all()
+    conn.close()
+    return sum(counts) / seconds
+
+def main():
+    parser = argparse.ArgumentParser(description="Okuyucu yük testi")
+    parser.add_argument("--threads", default="1,4,8")
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--events", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'thread':>7} {'paylaşılan (sorgu/s)':>22} {'havuz (sorgu/s)':>17}")
+    for n in (int(t) for t in args.threads.split(",")):
+        shared = run("shared", n, args.seconds, args.events)
+        pooled = run("pool", n, args.seconds, args.events)
+        print(f"{n:>7} {shared:>22.0f} {pooled:>17.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Kayıt ve Yeniden Oynatma Benchmark'ı
+- Yerel taklit sunucudan (standin.py) --cycles döngü çekilir; yanıtlar recorder.Recorder ile kaydedilir,
+  kayıtlar aynı anda canlıdaki gibi bir veritabanına yazılır
+- Kayıt boyutu: ham yanıt baytları, tekilleştirme sonrası gövde sayısı ve sıkıştırılmış boyut
+- Kayıt hedef bir veritabanına beklemeden (--speed 0) oynatılır; döngü/s ölçülür ve raw ile transitions
+  canlı veritabanıyla karşılaştırılır (zamanlar dahil aynı olmalı)
+
+Kullanım: python benchmarks/bench_replay.py [--events 2000] [--cycles 100] [--change-ratio 0.1]
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+import fetch
+import recorder
+from sources import build_all, primary_error
+from standin import StandIn
+from storage import MatchWriter, connect
+
+def record(args, tmp):
+    """Taklit sunucudan çekip kaydeder ve canlı veritabanına yazar; (kayıt yolu, canlı yol, süre)"""
+    server = StandIn(events=args.events, change_ratio=args.change_ratio).start()
+    for source in fetch.SOURCES.values():
+        source.url, source.query = f"{server.url}/{source.name}", {}
+    rec_path, live_path = os.path.join(tmp, "record.db"), os.path.join(tmp, "live.db")
+    fetch.RECORDER = recorder.Recorder(rec_path, flush_interval=1.0)
+    conn = connect(live_path)
+    conn.execute(recorder.RAW_SCHEMA)
+    conn.commit()
+    # Yeniden oynatma döngü başlangıcını saat olarak kullanır; karşılaştırma için canlı yazıcı da öyle
+    writer = MatchWriter(conn, clock=lambda: fetch.RECORDER.cycle)
+    start = time.perf_counter()
+    for _ in range(args.cycles):
+        data, errors, changed = fetch.fetch_all()
+        if primary_error(data, errors) or not any(changed.values()):
+            continue
+        writer.write(build_all(data)[0])
+    elapsed = time.perf_counter() - start
+    fetch.RECORDER.flush()
+    conn.close()
+    server.stop()
+    return rec_path, live_path, elapsed
+
+def disk_size(path):
+    """Veritabanı dosyası ve henüz checkpoint edilmemiş WAL"""
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+def dump(path):
+    conn = sqlite3.connect(path)
+    raw = sorted(conn.execute("SELECT ts, mac_id, ev, dep, skor, dakika, oran, tarih, saat, lig, mbs FROM raw"))
+    transitions = sorted(conn.execute("SELECT ts, mac_id, skor, dakika, oran FROM transitions"))
+    conn.close()
+    return raw, transitions
+
+def main():
+    parser = argparse.ArgumentParser(description="Ham yanıt kaydının boyutunu ve yeniden oynatma hızını ölçer")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--cycles", type=int, default=100)
+    parser.add_argument("--change-ratio", type=float, default=0.1, help="Döngü başına değişen maç oranı")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    tmp = tempfile.mkdtemp()
+    rec_path, live_path, record_s = record(args, tmp)
+    info = recorder.summary(rec_path)
+    print(f"{args.events} maç, {args.cycles} döngü kaydedildi ({record_s:.1f} sn)")
+    print(f"  yanıt {info['responses']} ({info['sources']}), tekil gövde {info['bodies']}")
+    print(f"  ham {info['raw_bytes'] / 1e6:.1f} MB -> kayıt {info['stored_bytes'] / 1e6:.2f} MB "
+          f"({info['ratio']}x), dosya {disk_size(rec_path) / 1e6:.2f} MB")
+
+    target = os.path.join(tmp, "replay.db")
+    result = recorder.replay(rec_path, target)
+    print(f"yeniden oynatma: {result['cycles']} döngü, {result['writes']} yazım, {result['elapsed_s']} sn "
+          f"({result['cycles_per_s']} döngü/s, canlı çekim {args.cycles / record_s:.1f} döngü/s)")
+    same = dump(live_path) == dump(target)
+    print(f"raw ve transitions canlı veritabanıyla {'aynı' if same else 'FARKLI'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Maç Zaman Çizelgesi Benchmark'ı
+- append modunda büyüyen bir geçmiş simüle edilir: her döngüde tüm canlı maçlar raw'a yeniden yazılır,
+  skor/dakika/oran değişimleri transitions'a düşer; her maç --match-polls döngü sürer, sonra yenisi başlar
+- Son maçlardan birinin zaman çizelgesi (son bir saat, --points örnek) farklı geçmiş boyutlarında okunur
+- Üç indeks düzeni karşılaştırılır: (mac_id, ts), sadece eski (mac_id, id), mac_id indeksi yok
+- Yanıt süresinin toplam geçmişten bağımsız kaldığı ve raw'dan okumanın transitions ile aynı sonucu verdiği gösterilir
+- Saklama kontrolü: upsert modunda yazılmış maçlar saklama süresini aşınca Retention.run() çalıştırılır;
+  zaman çizelgesinin skor değişimleri (zamanlarıyla) ve son durumu aynı kalmalıdır (score_events, results)
+
+Kullanım: python benchmarks/bench_timeline.py [--sizes 10000,100000,1000000] [--matches 100] [--points 100]
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import timeline
+from retention import Retention
+from storage import TRANSITION_SQL, MatchWriter, connect, setup_indexes, setup_transitions
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS raw(
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              ts TEXT DEFAULT CURRENT_TIMESTAMP,
+              mac_id TEXT, ev TEXT, dep TEXT, skor TEXT, dakika TEXT,
+              oran TEXT, tarih TEXT, saat TEXT, lig TEXT, mbs TEXT)"""
+
+START = 1_700_000_000
+POLL_SECONDS = 10
+
+def build(path, size, matches, match_polls, rng):
+    """size satırlık raw ve karşılık gelen transitions; dönüş: (hedef mac_id, son ts)"""
+    conn = connect(path)
+    conn.execute(SCHEMA)
+    setup_transitions(conn)
+    goals, state = {}, {}
+    raw, transitions = [], []
+    polls = max(1, size // matches)
+    for p in range(polls):
+        now = START + p * POLL_SECONDS
+        ts = datetime.datetime.utcfromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S")
+        generation, age = divmod(p, match_polls)
+        for slot in range(matches):
+            mac_id = str(slot * 100000 + generation)
+            home, away, oran = goals.get(mac_id, (0, 0, "AÇIK"))
+            if rng.random() < 0.003:
+                home += 1
+            if rng.random() < 0.003:
+                away += 1
+            if rng.random() < 0.01:
+                oran = "KAPALI" if oran == "AÇIK" else "AÇIK"
+            goals[mac_id] = (home, away, oran)
+            tracked = (f"{home}-{away}", str(age * POLL_SECONDS // 60), oran)
+            raw.append((ts, mac_id, "Ev", "Dep", *tracked, "2023-11-14", "20:00", "Lig", "1"))
+            # Yazıcı gibi: sadece skor, dakika ya da oran durumu değişince transitions satırı
+            if state.get(mac_id) != tracked:
+                state[mac_id] = tracked
+                transitions.append((now, mac_id) + tracked)
+        if len(raw) >= 50000:
+            flush(conn, raw, transitions)
+    flush(conn, raw, transitions)
+    setup_indexes(conn)
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    last_generation = (polls - 1) // match_polls
+    return str(last_generation), START + (polls - 1) * POLL_SECONDS
+
+def flush(conn, raw, transitions):
+    conn.executemany("INSERT INTO raw(ts, mac_id, ev, dep, skor, dakika, oran, tarih, saat, lig, mbs) "
+                     "VALUES(?,?,?,?,?,?,?,?,?,?,?)", raw)
+    conn.executemany(TRANSITION_SQL, transitions)
+    conn.commit()
+    raw.clear()
+    transitions.clear()
+
+def measure(conn, mac_id, since, points, repeat):
+    """(transitions ms, raw ms, sonuçlar aynı mı, timeline sözlüğü)"""
+    times, raw_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = timeline.timeline(conn, mac_id, since, timeline.FAR_FUTURE, points)
+        times.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        raw_result = timeline.timeline(conn, mac_id, since, timeline.FAR_FUTURE, points, source="raw")
+        raw_times.append((time.perf_counter() - start) * 1000)
+    same = raw_result["timeline"] == result["timeline"]
+    return statistics.median(times), statistics.median(raw_times), same, result
+
+def score_changes(result):
+    """Zaman çizelgesindeki skor değişimleri [(ts, skor)] ve son skor"""
+    changes, last = [], None
+    for ts, skor, _, _ in result["timeline"]:
+        if skor != last:
+            changes.append((ts, skor))
+            last = skor
+    return changes, last
+
+def check_retention(tmp, matches=5, polls=120):
+    """
+    Saklama süresinden eski maçların zaman çizelgesi özet tablolarından gelmeli.
+    Dönüş: (özetlenen raw satırı, silinen transitions satırı, arşiv örneği, aynı mı)
+    """
+    path = os.path.join(tmp, "timeline_retention.db")
+    conn = connect(path)
+    conn.execute(SCHEMA)
+    conn.commit()
+    rng = random.Random(1)
+    start = int(time.time()) - 100 * 3600
+    now = [start]
+    writer = MatchWriter(conn, mode="upsert", clock=lambda: now[0])
+    goals = {str(m): [0, 0] for m in range(matches)}
+    for p in range(polls):
+        now[0] = start + p * 60
+        records = []
+        for mac_id, score in goals.items():
+            if rng.random() < 0.05:
+                score[rng.random() < 0.5] += 1
+            records.append((mac_id, "Ev", "Dep", f"{score[0]}-{score[1]}", str(p), "AÇIK",
+                            "2023-11-14", "20:00", "Lig", "1"))
+        writer.write(records)
+    before = {mac_id: score_changes(timeline.timeline(conn, mac_id, points=timeline.MAX_POINTS))
+              for mac_id in goals}
+    stats = Retention(conn, writer, time_budget=float("inf")).run(force=True)
+    same, archived = True, 0
+    for mac_id in goals:
+        result = timeline.timeline(conn, mac_id, points=timeline.MAX_POINTS)
+        archived += result["archived"]
+        same = same and score_changes(result) == before[mac_id]
+    conn.close()
+    os.remove(path)
+    return stats["rolled_up"], stats["transitions_pruned"], archived, same
+
+LAYOUTS = (
+    ("(mac_id, ts)", ()),
+    ("(mac_id, id)", ("idx_raw_mac_ts", "idx_transitions_mac_ts")),
+    ("indekssiz", ("idx_raw_mac_ts", "idx_transitions_mac_ts", "idx_raw_mac_id", "idx_transitions_mac")),
+)
+
+def main():
+    parser = argparse.ArgumentParser(description="Zaman çizelgesi yanıt süresini geçmiş boyutuna göre ölçer")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="raw satır sayıları (virgülle)")
+    parser.add_argument("--matches", type=int, default=100, help="Aynı anda canlı maç sayısı")
+    parser.add_argument("--match-polls", type=int, default=720, help="Maç başına döngü (10 sn aralık)")
+    parser.add_argument("--points", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    print(f"{'raw satır':>10}{'düzen':>15}{'transitions ms':>16}{'raw ms':>10}{'örnek':>8}{'değişim':>9}"
+          f"{'nokta':>7}  raw = transitions")
+    for size in (int(s) for s in args.sizes.split(",")):
+        path = os.path.join(tmp, f"timeline_{size}.db")
+        mac_id, last_ts = build(path, size, args.matches, args.match_polls, random.Random(0))
+        conn = connect(path)
+        since = last_ts - 3600
+        for name, drop in LAYOUTS:
+            for index in drop:
+                conn.execute(f"DROP INDEX IF EXISTS {index}")
+            conn.execute("ANALYZE")
+            ms, raw_ms, same, result = measure(conn, mac_id, since, args.points, args.repeat)
+            print(f"{size:>10}{name:>15}{ms:>16.2f}{raw_ms:>10.2f}{result['samples']:>8}{result['changes']:>9}"
+                  f"{result['count']:>7}  {'evet' if same else 'HAYIR'}")
+        conn.close()
+        os.remove(path)
+
+    rolled, pruned, archived, same = check_retention(tmp)
+    print(f"saklama sonrası: {rolled} raw, {pruned} transitions satırı özetlendi; {archived} arşiv örneği, "
+          f"skor değişimleri {'aynı' if same else 'FARKLI'}")
+    if not same or not archived:
+        raise SystemExit("Saklama sonrası zaman çizelgesi skor değişimlerini kaybetti")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Arka Plan Yazma Benchmark'ı
+- Sabit aralıklı bir sorgu döngüsü simüle edilir; her döngüde maçların bir kısmının dakikası değişir
+- Yazıcıya disk baskısı eklenir: her --stall-every yazımda bir yazma kilidi --stall saniye tutulur
+  (vacuum, yavaş disk ya da uzun okuma kilidi gibi)
+- Satır içi yazım ile writebehind.WriteBehind politikaları (coalesce, block, drop) karşılaştırılır:
+  döngü başlangıcındaki kayma (hedef zamana göre gecikme), en büyük kuyruk derinliği, birleştirilen/atılan
+  döngüler ve sondaki veritabanı durumunun son döngüyle aynı olup olmadığı
+
+Kullanım: python benchmarks/bench_writebehind.py [--events 2000] [--cycles 60] [--interval 0.1]
+                                                 [--stall 1.0] [--stall-every 20] [--queue 4]
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from payloads import make_payload
+from ingest import RAW_COLUMNS, build_records
+from storage import MatchWriter, connect
+from writebehind import WriteBehind
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS raw(
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              ts TEXT DEFAULT CURRENT_TIMESTAMP,
+              mac_id TEXT, ev TEXT, dep TEXT, skor TEXT, dakika TEXT,
+              oran TEXT, tarih TEXT, saat TEXT, lig TEXT, mbs TEXT)"""
+
+class StallingWriter(MatchWriter):
+    """Her stall_every yazımda bir, yazmadan önce kilidi stall saniye tutan yazıcı"""
+
+    def __init__(self, conn, stall, stall_every):
+        super().__init__(conn)
+        self.stall = stall
+        self.stall_every = stall_every
+        self.writes = 0
+
+    def write(self, records, meta=None):
+        with self.lock:
+            self.writes += 1
+            if self.writes % self.stall_every == 0:
+                time.sleep(self.stall)
+            return super().write(records, meta)
+
+def run(mode, args):
+    """(kayma ms listesi, en büyük derinlik, kuyruk istatistikleri, son durum doğru mu)"""
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    conn = connect(path, check_same_thread=False)
+    conn.execute(SCHEMA)
+    conn.commit()
+    writer = StallingWriter(conn, args.stall, args.stall_every)
+    queue = None
+    if mode != "inline":
+        queue = WriteBehind(writer, max_pending=args.queue, policy=mode, block_timeout=args.stall * 2)
+        queue.start()
+
+    j1, j2 = make_payload(args.events)
+    sc = j1["data"]["sc"]
+    slips, depth = [], 0
+    start = time.monotonic()
+    for cycle in range(args.cycles):
+        target = start + cycle * args.interval
+        now = time.monotonic()
+        if now < target:
+            time.sleep(target - now)
+        slips.append(max(0.0, time.monotonic() - target) * 1000)
+        for i in range(cycle % 7, len(sc), 7):
+            sc[i]["min"] = str(cycle % 90)
+        records = build_records(j1, j2)[0]
+        if queue is None:
+            writer.write(records)
+        else:
+            queue.submit(records)
+            depth = max(depth, len(queue.pending))
+    if queue is not None:
+        queue.flush()
+
+    # Son döngünün kayıtları veritabanındaki son durumla aynı olmalı
+    check = sqlite3.connect(path)
+    rows = check.execute(f"SELECT {', '.join(RAW_COLUMNS)} FROM raw").fetchall()
+    check.close()
+    correct = sorted(rows) == sorted(records)
+    return slips, depth, queue.stats() if queue is not None else {}, correct
+
+def main():
+    parser = argparse.ArgumentParser(description="Disk baskısı altında sorgu temposunu ölçer")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--cycles", type=int, default=60)
+    parser.add_argument("--interval", type=float, default=0.1, help="Hedef döngü aralığı (saniye)")
+    parser.add_argument("--stall", type=float, default=1.0, help="Yazıcı takılma süresi (saniye)")
+    parser.add_argument("--stall-every", type=int, default=20, help="Kaç yazımda bir takılma")
+    parser.add_argument("--queue", type=int, default=4, help="Kuyruk boyutu (döngü)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"{args.events} maç, {args.cycles} döngü x {args.interval * 1000:.0f} ms, "
+          f"her {args.stall_every} yazımda {args.stall:.1f} sn takılma, kuyruk {args.queue}")
+    print(f"{'düzen':<10}{'kayma p50':>11}{'p95':>9}{'max':>9}{'derinlik':>10}{'birleşen':>10}"
+          f"{'atılan':>8}{'bloklu sn':>11}{'yazım':>7}  son durum")
+    for mode in ("inline", "coalesce", "block", "drop"):
+        slips, depth, stats, correct = run(mode, args)
+        slips.sort()
+        print(f"{mode:<10}{statistics.median(slips):>11.1f}{slips[int(len(slips) * 0.95)]:>9.1f}{slips[-1]:>9.1f}"
+              f"{depth:>10}{stats.get('coalesced', 0):>10}{stats.get('dropped', 0):>8}"
+              f"{stats.get('blocked_s', 0):>11.2f}{stats.get('writes', args.cycles):>7}  "
+              f"{'doğru' if correct else 'YANLIŞ'}")
+
+if __name__ == "__main__":
+    main()
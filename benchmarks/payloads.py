@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Sentetik API Yanıtları
+- İddaa yanıtı: data.sc (liste ya da mac_id anahtarlı sözlük) ve data.events
+- Bilyoner yanıtı: events (liste ya da brdId anahtarlı sözlük)
+- Feed her tick'te maçların bir kısmının dakikasını ilerletir, ara sıra gol ve market durumu değiştirir
+"""
+import random
+
+def make_payload(n, shape="list"):
+    """n event içeren sentetik iddaa ve Bilyoner yanıtları üretir"""
+    sc = [{"id": 1000 + i, "ht": {"c": i % 4}, "at": {"c": i % 3}, "min": str(i % 90)} for i in range(n)]
+    events = [{"i": 1000 + i, "hn": f"Ev {i}", "an": f"Dep {i}", "bri": 5000 + i,
+               "m": [{"s": str(i % 2)}, {"s": "0"}, {"s": "0"}]} for i in range(n)]
+    b_events = [{"brdId": 5000 + i, "esd": "2024-01-01T20:00:00", "strt": "20:00",
+                 "lgn": f"Lig {i % 40}", "mbs": "1"} for i in range(n)]
+    if shape == "dict":
+        return ({"data": {"sc": {str(s["id"]): s for s in sc}, "events": events}},
+                {"events": {str(b["brdId"]): b for b in b_events}})
+    return {"data": {"sc": sc, "events": events}}, {"events": b_events}
+
+class Feed:
+    """Zamanla değişen sentetik bülten (yerel API taklidi ve uçtan uca benchmark için)"""
+
+    def __init__(self, n, shape="list", change_ratio=0.1, seed=0):
+        self.iddaa, self.bilyoner = make_payload(n, shape)
+        self.change_ratio = change_ratio
+        self.random = random.Random(seed)
+        self.version = 1
+        data = self.iddaa["data"]
+        self._scores = list(data["sc"].values()) if isinstance(data["sc"], dict) else data["sc"]
+        self._events = data["events"]
+
+    def tick(self):
+        """Maçların change_ratio kadarını değiştirir; bülten sürümünü artırır"""
+        count = int(len(self._scores) * self.change_ratio)
+        for i in self.random.sample(range(len(self._scores)), count):
+            sc = self._scores[i]
+            sc["min"] = str((int(sc["min"]) + 1) % 91) if sc["min"].isdigit() else "1"
+            roll = self.random.random()
+            if roll < 0.05:
+                sc["ht"]["c"] += 1
+            elif roll < 0.1:
+                sc["at"]["c"] += 1
+            elif roll < 0.15:
+                market = self._events[i]["m"][0]
+                market["s"] = "0" if market["s"] == "1" else "1"
+        self.version += 1
+        self.iddaa["data"]["version"] = self.version
+        return count
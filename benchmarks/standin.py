@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Yerel API Taklidi
+- İddaa ve Bilyoner uç noktalarını sentetik verilerle yerelde sunar (/iddaa, /bilyoner)
+- Gecikme, gecikme sapması ve hata oranı (503 + Retry-After) ayarlanabilir
+- İddaa her istekte bir tick ilerler; Bilyoner sabittir ve ETag/If-None-Match ile 304 döner
+
+Tek başına çalıştırmak için:
+    python benchmarks/standin.py --events 2000 --latency 0.05 --error-rate 0.01 --port 8765
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from payloads import Feed
+
+class StandIn:
+    """Arka plan thread'inde çalışan yerel HTTP sunucusu"""
+
+    def __init__(self, events=1000, shape="list", change_ratio=0.1, latency=0.0, jitter=0.0,
+                 error_rate=0.0, port=0, seed=0):
+        self.feed = Feed(events, shape=shape, change_ratio=change_ratio, seed=seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = {"iddaa": 0, "bilyoner": 0, "errors": 0, "not_modified": 0}
+        self._lock = threading.Lock()
+        self._bilyoner = self._encode(self.feed.bilyoner)
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @staticmethod
+    def _encode(doc):
+        body = json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return body, '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True, name="standin")
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def respond(self, name, if_none_match):
+        """(durum kodu, başlıklar, gövde) döndürür"""
+        with self._lock:
+            self.requests[name] += 1
+            failed = self.random.random() < self.error_rate
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            if not failed and name == "iddaa":
+                self.feed.tick()
+                body, etag = self._encode(self.feed.iddaa)
+            else:
+                body, etag = self._bilyoner
+        time.sleep(delay)
+        if failed:
+            with self._lock:
+                self.requests["errors"] += 1
+            return 503, {"Retry-After": "1"}, b'{"isSuccess":false}'
+        if if_none_match == etag:
+            with self._lock:
+                self.requests["not_modified"] += 1
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag, "Content-Type": "application/json"}, body
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_GET(self):
+                name = self.path.split("?")[0].strip("/")
+                if name not in ("iddaa", "bilyoner"):
+                    status, headers, body = 404, {}, b""
+                else:
+                    status, headers, body = standin.respond(name, self.headers.get("If-None-Match"))
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="İddaa ve Bilyoner için yerel API taklidi")
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--shape", choices=("list", "dict"), default="list")
+    parser.add_argument("--change-ratio", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.0, help="Saniye")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Saniye")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    standin = StandIn(args.events, args.shape, args.change_ratio, args.latency, args.jitter,
+                      args.error_rate, args.port)
+    print(f"{standin.url}/iddaa ve {standin.url}/bilyoner dinleniyor (Ctrl+C ile çık)")
+    try:
+        standin.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,35 @@ PythonAnywhere için Flask ve Worker Birleşik Uygulama
 - PythonAnywhere'in "Web" özelliğini kullanarak sürekli çalışır
 - Worker thread'i arka planda sürekli veri toplar
 - Ücretsiz hesapta bile hiç durmadan çalışır
+- WSGI sunucusu birden çok süreç açarsa sadece dosya kilidini alan süreç veri çeker (leader.py);
+  diğerleri liderin yazdıklarını veritabanından izleyip okuma isteklerine hizmet eder
 """
-from flask import Flask, send_file, jsonify, render_template_string
+from flask import Flask, Response, request, jsonify
 import sqlite3
-import requests
 import time
-import json
 import logging
 import os
 import datetime
 import threading
 from pathlib import Path
+from ingest import RAW_COLUMNS
+from dbsnapshot import DbDownloads, DbSnapshotter
+from fetch import RECORDER, fetch_all
+from leader import LeaderLock
+from logsink import BufferedDbHandler, read_recent
+import metrics
+import odds
+from odds import OddsStore
+from retention import Retention
+from scheduler import PollScheduler
+from sources import breaker_stats, build_all, primary_error, primary_payloads, source_counts
+from storage import RAW_COUNT_KEY, MatchWriter, ReadPool, connect
+import snapshot
+import query
+import timeline
+from stream import Broadcaster, sse_response
+import writebehind
+from writebehind import WriteBehind
 
 # Log yapılandırması
 logging.basicConfig(
@@ -34,7 +52,7 @@ DB_FILE = os.path.join(DATA_DIR, "canli.db")
 
 # SQLite veritabanı yapılandırması
 def setup_db():
-    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    conn = connect(DB_FILE, check_same_thread=False)
     c = conn.cursor()
     
     # Ana veri tablosu
@@ -56,13 +74,6 @@ def setup_db():
     c.execute("""CREATE TABLE IF NOT EXISTS meta(
                    key TEXT PRIMARY KEY,
                    value TEXT)""")
-                   
-    # Log tablosu
-    c.execute("""CREATE TABLE IF NOT EXISTS log(
-                   id INTEGER PRIMARY KEY AUTOINCREMENT,
-                   timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
-                   level TEXT,
-                   message TEXT)""")
     
     conn.commit()
     return conn
@@ -70,17 +81,87 @@ def setup_db():
 # Flask uygulaması
 app = Flask(__name__)
 
-# Veritabanı bağlantısı
-conn = setup_db()
+# Veritabanı bağlantıları: web istekleri için thread başına okuyucular. Yazıcı bağlantısı (şema ve indeks
+# kurulumuyla), saklama ve oran deposu sadece liderde açılır (open_write_paths); takipçiler paylaşılan
+# dosyada yazma kilidi almaz
+readers = ReadPool(DB_FILE)
+conn = None
+writer = None
+retention = None
+
+# Canlı maç farkları yayıncısı (SSE)
+live = Broadcaster()
+
+# Uyarlanabilir zamanlayıcı (canlı maç sayısı, değişim oranı ve hatalara göre aralık)
+scheduler = PollScheduler(min_interval=30, max_interval=180)
+
+# İndirme için tutarlı, sıkıştırılmış veritabanı görüntüleri (futbol_data/snapshots).
+# Görüntüleri sadece lider üretir (open_write_paths); her süreç dizindeki son görüntüyü sunar
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshots")
+snapshots = None
+downloads = DbDownloads(SNAPSHOT_DIR)
+
+# Oran geçmişi (ayrı veritabanı, CANLI_ODDS=0 ile kapatılır). Depo liderde açılır; takipçiler yazılmış batch'leri okur
+ODDS_FILE = odds.default_path(DB_FILE)
+odds_store = None
+odds_readers = ReadPool(ODDS_FILE) if odds.ENABLED else None
+
+# Veritabanı logları: bellekte tamponlanır, arka planda toplu yazılır (log tablosu).
+# Tampon sadece liderde açılır; takipçiler son logları liderin yazdığı log tablosundan okur
+db_log = None
+db_logger = logging.getLogger("canli.dblog")
+db_logger.setLevel(logging.INFO)
+db_logger.propagate = False  # Çağıranlar aynı mesajı zaten konsola logluyor
+db_logger.addHandler(logging.NullHandler())
+
+# Süreçler arası tek toplayıcı seçimi (futbol_data/canli.leader)
+election = LeaderLock(os.path.join(DATA_DIR, "canli.leader"))
+
+def leader_last_updated():
+    """Liderin meta.last_updated'ı (unix); veritabanı henüz oluşmadıysa None"""
+    try:
+        return metrics.meta_timestamp(readers.connection())
+    except sqlite3.Error:
+        return None
+
+# Lider olana kadar tazelik göstergeleri liderin meta.last_updated'ından okunur (her süreç /metrics sunar)
+metrics.follow_meta(leader_last_updated)
+
+# Takipçi süreçte son görülen veritabanı sürümü ve transitions konumu
+follow_state = {"data_version": None, "transition_id": None}
+
+# raw satır sayısı: meta.raw_count henüz yoksa (lider hiç yazmadıysa) bir kez sayılır
+raw_count = None
+
+def open_write_paths():
+    """
+    Lider olunca yazma yolları açılır: yazıcı bağlantısı ve şema, saklama, oran deposu, arka plan yazma kuyruğu,
+    log tablosu yazıcısı ve indirme görüntüsü üreticisi. Takipçiler liderin dosyasında DDL çalıştırmaz, yazmaz.
+    Yazıcı zaten açıksa (liderlik yeniden alındı) durumu veritabanından tazelenir.
+    """
+    global conn, writer, retention, odds_store, write_queue, db_log, snapshots
+    if writer is None:
+        conn = setup_db()
+        # raw satır sayısı meta.raw_count'ta yazımla aynı transaction'da tutulur (takipçiler COUNT yapmaz)
+        writer = MatchWriter(conn, count_key=RAW_COUNT_KEY)
+        # Saklama: son CANLI_RETENTION_HOURS saat tam çözünürlükte, eskiler özetlenip silinir
+        retention = Retention(conn, writer)
+    else:
+        writer.reload()
+    if odds.ENABLED and odds_store is None:
+        odds_store = OddsStore(ODDS_FILE)
+    if writebehind.ENABLED and write_queue is None:
+        write_queue = WriteBehind(writer, after_write, write_failed, maintenance)
+    if db_log is None:
+        db_log = BufferedDbHandler(conn, lock=writer.lock)
+        db_logger.addHandler(db_log)
+    if snapshots is None:
+        snapshots = DbSnapshotter(DB_FILE, SNAPSHOT_DIR)
 
 # Log fonksiyonu
 def log_to_db(level, message):
-    try:
-        c = conn.cursor()
-        c.execute("INSERT INTO log(level, message) VALUES(?, ?)", (level, message))
-        conn.commit()
-    except Exception as e:
-        logger.error(f"Log yazma hatası: {str(e)}")
+    """Mesajı tampona ekler; yazma arka planda toplu yapılır"""
+    db_logger.log(logging.getLevelName(level), message)
 
 # Veri çekme fonksiyonu
 def get_data():
@@ -88,90 +169,63 @@ def get_data():
     logger.info("Veri çekiliyor...")
     log_to_db("INFO", "Veri çekme başlatıldı")
     
-    # API istekleri
-    headers = {
-        "If-Modified-Since": "Sat, 1 Jan 2000 00:00:00 GMT",
-        "Content-Type": "application/json",
-        "User-Agent": "Mozilla/5.0"
-    }
     try:
-        j1 = requests.get("https://sportsbookv2.iddaa.com/sportsbook/events?st=1&type=1&version=0", 
-                        headers=headers, timeout=20).json()
-        j2 = requests.get("https://www.bilyoner.com/api/v3/mobile/aggregator/gamelist/all/v1?tabType=9999&bulletinType=1&liveEventsEnabledForPreBulletin=true", 
-                        headers=headers, timeout=20).json()
+        # API istekleri (kayıtlı kaynaklar paralel, kalıcı bağlantılarla)
+        with metrics.stage("fetch"):
+            sources, errors, changed = fetch_all(read_timeout=20)
+        # Hiçbir ana kaynak (iddaa) gelmediyse döngü hatalıdır; ayrıntı kaynağı (Bilyoner) yoksa ek bilgiler boş kalır
+        error = primary_error(sources, errors)
+        if error:
+            raise error
         
-        # Veri işleme - API yapısını düzeltilmiş şekilde kullan
-        sc_dict = j1.get("data", {}).get("sc", {})  # sc bir sözlük
-        ev_list = j1.get("data", {}).get("events", [])  # events bir liste
-        b_dict = j2.get("events", {})  # bilyoner events bir sözlük
+        # Hiçbir kaynak değişmediyse ayrıştırma ve yazma atlanır
+        if not any(changed.values()):
+            logger.info("Veri değişmedi, döngü atlandı.")
+            scheduler.unchanged()
+            metrics.record_unchanged()
+            return True
         
-        logger.info(f"IDDAA: {len(sc_dict)} maç, {len(ev_list)} event bulundu")
-        logger.info(f"BILYONER: {len(b_dict)} etkinlik bulundu")
-        log_to_db("INFO", f"IDDAA: {len(sc_dict)} maç, BILYONER: {len(b_dict)} etkinlik")
+        # Kaynak başına gelen öğe sayıları
+        counts = ", ".join(f"{name.upper()}: {count}" for name, count in source_counts(sources).items())
+        logger.info(f"{counts} öğe bulundu")
+        log_to_db("INFO", counts)
         
         # Mevcut tarih
         today = datetime.date.today().isoformat()
         
-        # Mevcut maç ID'leri
-        c = conn.cursor()
-        c.execute("SELECT mac_id FROM raw WHERE date(ts) = date('now')")
-        existing_ids = set([r[0] for r in c.fetchall()])
-        
-        # Günlük tabloyu temizle (aynı verileri tekrar tekrar eklememek için)
-        if existing_ids:
-            c.execute("DELETE FROM raw WHERE date(ts) = date('now')")
-            conn.commit()
+        # Tek geçişte eşleştirme (id->event ve brdId->Bilyoner sözlükleriyle)
+        def on_error(mac_id, e):
+            logger.error(f"Maç ID {mac_id} işlenirken hata: {str(e)}")
+            log_to_db("ERROR", f"Maç ID {mac_id} işlenirken hata: {str(e)}")
         
-        processed = 0
-        for mac_id, sc in sc_dict.items():
-            try:
-                # Skor bilgisi
-                skor = f"{sc['ht']['c']}-{sc['at']['c']}"
-                dakika = sc.get("min", "ST")
-                
-                # Eşleşen event bilgisi
-                ev_obj = next((e for e in ev_list if e["i"] == sc["id"]), None)
-                if not ev_obj:
-                    logger.warning(f"Maç ID {mac_id} için event bulunamadı")
-                    continue
-                    
-                ev = ev_obj["hn"]
-                dep = ev_obj["an"]
-                oran = "AÇIK" if any(m.get("s") == "1" for m in ev_obj.get("m", [])[:3]) else "KAPALI"
-                
-                # Bilyoner'den ek bilgiler
-                bilyoner_id = str(ev_obj.get("bri", ""))
-                b_obj = b_dict.get(bilyoner_id)
-                
-                if not b_obj:
-                    tarih, saat, lig, mbs = today, "", "", ""
-                else:
-                    tarih = b_obj["esd"].split("T")[0] if "esd" in b_obj else today
-                    saat = b_obj.get("strt", "")
-                    lig = b_obj.get("lgn", "")
-                    mbs = b_obj.get("mbs", "")
-                
-                # Veritabanına kaydet
-                c.execute("INSERT INTO raw(mac_id,ev,dep,skor,dakika,oran,tarih,saat,lig,mbs) VALUES(?,?,?,?,?,?,?,?,?,?)",
-                        (mac_id, ev, dep, skor, dakika, oran, tarih, saat, lig, mbs))
-                processed += 1
-                
-            except Exception as e:
-                logger.error(f"Maç ID {mac_id} işlenirken hata: {str(e)}")
-                log_to_db("ERROR", f"Maç ID {mac_id} işlenirken hata: {str(e)}")
+        with metrics.stage("join"):
+            records, missing = build_all(sources, today=today, on_error=on_error)
+        if missing:
+            logger.warning(f"{missing} maç için event bulunamadı")
         
-        # Meta veriyi güncelle
-        now = datetime.datetime.now().isoformat()
-        c.execute("INSERT OR REPLACE INTO meta(key, value) VALUES(?, ?)", 
-                  ("last_updated", now))
-        c.execute("INSERT OR REPLACE INTO meta(key, value) VALUES(?, ?)", 
-                  ("record_count", str(processed)))
+        # Canlı maçların oran değişimleri (bellekte; dolan/yaşlanan batch'ler yazımdan sonra diske iner)
+        if odds_store is not None:
+            with metrics.stage("odds"):
+                live_ids = {rec[0] for rec in records}
+                for payload in primary_payloads(sources):
+                    odds_store.capture(payload, live_ids)
         
-        conn.commit()
-        logger.info(f"{processed} adet maç veritabanına kaydedildi.")
-        log_to_db("INFO", f"{processed} adet maç veritabanına kaydedildi")
+        # Veritabanına kaydet (sadece değişen maçlar, meta ile birlikte tek transaction)
+        meta = {
+            "last_updated": datetime.datetime.now().isoformat(),
+            "record_count": len(records),
+        }
+        if write_queue is not None:
+            # Yazıcı thread'i yazar; döngü diski beklemeden biter
+            write_queue.submit(records, meta)
+        else:
+            with metrics.stage("write"):
+                stats = writer.write(records, meta=meta)
+            after_write(records, stats, writer.last_changed)
         
     except Exception as e:
+        scheduler.failure(e)
+        metrics.record_error()
         error_msg = f"Veri çekme hatası: {str(e)}"
         logger.exception(error_msg)
         log_to_db("ERROR", error_msg)
@@ -179,22 +233,200 @@ def get_data():
         
     return True
 
+def after_write(records, stats, changed):
+    """Yazımdan sonraki işler (arka plan yazmada yazıcı thread'inde çağrılır)"""
+    logger.info(f"Yeni: {stats['inserted']}, güncellenen: {stats['updated']}, değişmeyen: {stats['unchanged']}, "
+                f"{stats['rows_per_s']} satır/s, commit {stats['commit_ms']} ms")
+    
+    # Skoru, dakikası veya oran durumu değişen maçları canlı yayına gönder
+    if changed:
+        live.publish({"matches": [dict(zip(RAW_COLUMNS, rec)) for rec in changed]})
+    
+    if odds_store is not None:
+        odds_store.flush()
+    
+    processed = len(records)
+    scheduler.success(processed, len(changed))
+    metrics.record_write(stats, processed, len(changed))
+    logger.info(f"{processed} adet maç veritabanına kaydedildi.")
+    log_to_db("INFO", f"{processed} adet maç veritabanına kaydedildi")
+    
+    # Döngü görüntüsü bu yazım bitmeden yayınlanmış olabilir
+    if write_queue is not None:
+        publish_snapshot()
+
+def write_failed(e):
+    """Arka plan yazma hatası (yazıcı thread'i hatayı loglar)"""
+    scheduler.failure(e)
+    metrics.record_error()
+    log_to_db("ERROR", f"Yazma hatası: {str(e)}")
+
+def maintenance():
+    """Saklama ve indirme görüntüsü (arka plan yazmada yazıcı thread'inde, değilse döngü sonunda)"""
+    try:
+        retention.run()
+    except Exception as e:
+        logger.exception(f"Saklama hatası: {str(e)}")
+        log_to_db("ERROR", f"Saklama hatası: {str(e)}")
+    try:
+        if snapshots is not None:
+            snapshots.refresh()
+    except Exception as e:
+        logger.exception(f"Görüntü hatası: {str(e)}")
+
+# Arka plan yazma kuyruğu (CANLI_WRITE_BEHIND=0 ile yazım döngü içinde yapılır); liderde açılır
+write_queue = None
+
+# Endpoint'lerin sunduğu anlık görüntüyü üret
+def publish_snapshot():
+    """Döngü sonunda durum, maç ve log verilerini okuyup değişmez bir görüntü olarak yayınlar"""
+    global raw_count
+    try:
+        c = readers.connection().cursor()
+        
+        # Meta bilgilerini al
+        c.execute("SELECT * FROM meta")
+        meta = {row[0]: row[1] for row in c.fetchall()}
+        
+        last_updated = "Bilinmiyor"
+        if "last_updated" in meta:
+            try:
+                dt = datetime.datetime.fromisoformat(meta["last_updated"])
+                last_updated = dt.strftime("%d.%m.%Y %H:%M:%S")
+            except:
+                last_updated = meta["last_updated"]
+        
+        # Kayıt sayısı: yazıcının meta'da tuttuğu sayaç; yoksa tam COUNT sadece bir kez
+        if RAW_COUNT_KEY in meta:
+            record_count = int(meta[RAW_COUNT_KEY])
+        else:
+            if raw_count is None:
+                c.execute("SELECT COUNT(*) FROM raw")
+                raw_count = c.fetchone()[0]
+            record_count = raw_count
+        
+        # Son maçları al (API için 50, ana sayfa için ilk 20)
+        c.execute("SELECT * FROM raw ORDER BY id DESC LIMIT 50")
+        columns = [description[0] for description in c.description]
+        match_rows = [dict(zip(columns, row)) for row in c.fetchall()]
+        
+        # Son loglar liderde doğrudan bellekten, takipçide liderin yazdığı log tablosundan
+        logs = db_log.recent_entries(10) if db_log is not None else read_recent(c, 10)
+        
+        now = datetime.datetime.now().isoformat()
+        snapshot.publish(snapshot.Snapshot(
+            docs={
+                "status": {
+                    "status": "up",
+                    "timestamp": now,
+                    "db_file": DB_FILE,
+                    "record_count": record_count,
+                    "last_updated": meta.get("last_updated", "Bilinmiyor"),
+                    "last_log": logs[0] if logs else None,
+                    "writer": writer.last_stats if writer is not None else None,
+                    "scheduler": scheduler.stats(),
+                    "sources": breaker_stats(),
+                    "odds": odds_store.stats if odds_store is not None else None,
+                    "write_queue": write_queue.stats() if write_queue is not None else None,
+                    "recorder": RECORDER.status() if RECORDER is not None else None,
+                    "retention": retention.last_stats if retention is not None else None,
+                    "log": dict(db_log.stats, pending=len(db_log.pending)) if db_log is not None else None,
+                    "leader": election.stats()
+                },
+                "matches": {
+                    "count": len(match_rows),
+                    "timestamp": now,
+                    "matches": match_rows
+                },
+            },
+            context={
+                "last_updated": last_updated,
+                "record_count": meta.get("record_count", "0"),
+                "matches": match_rows[:20],
+                "logs": logs
+            }
+        ))
+    except Exception as e:
+        logger.exception(f"Anlık görüntü hatası: {str(e)}")
+
+def current_snapshot():
+    """Yayınlanmış görüntüyü döndürür, henüz yoksa bir kez üretir"""
+    if snapshot.current() is None:
+        publish_snapshot()
+    return snapshot.current()
+
 # Worker thread fonksiyonu
 def worker_thread():
     """Arka planda sürekli veri çeken thread"""
     logger.info("Worker thread başlatıldı")
     log_to_db("INFO", "Worker thread başlatıldı")
+    if write_queue is not None:
+        write_queue.start()
     
     while True:
+        scheduler.start_cycle()
         try:
-            get_data()
+            with metrics.CYCLE_SECONDS.time():
+                get_data()
         except Exception as e:
             error_msg = f"Beklenmeyen worker hatası: {str(e)}"
             logger.exception(error_msg)
             log_to_db("ERROR", error_msg)
+        if write_queue is None:
+            maintenance()
+        with metrics.stage("publish"):
+            publish_snapshot()
         
-        # Her 60 saniyede bir veri çek
-        time.sleep(60)
+        # Yoğunlukta 30 sn, boşta 180 sn'ye kadar; hatada geri çekilme
+        time.sleep(scheduler.next_delay())
+
+def follow():
+    """
+    Takipçi süreçte liderin yazdıklarını izler: veritabanı değiştiyse anlık görüntüyü yeniler,
+    transitions'a eklenen maçları bu sürecin canlı yayınına aktarır.
+    """
+    c = readers.connection().cursor()
+    # data_version sadece başka bir bağlantı yazdığında değişir; değişmediyse hiçbir şey okunmaz
+    version = c.execute("PRAGMA data_version").fetchone()[0]
+    if version == follow_state["data_version"]:
+        return
+    follow_state["data_version"] = version
+
+    last_id = follow_state["transition_id"]
+    if last_id is None:
+        last_id = c.execute("SELECT COALESCE(MAX(id), 0) FROM transitions").fetchone()[0]
+    else:
+        rows = c.execute("SELECT id, mac_id FROM transitions WHERE id > ? ORDER BY id", (last_id,)).fetchall()
+        if rows:
+            last_id = rows[-1][0]
+            mac_ids = list(dict.fromkeys(row[1] for row in rows))
+            cols = ", ".join(RAW_COLUMNS)
+            changed = []
+            for i in range(0, len(mac_ids), 500):
+                chunk = mac_ids[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                c.execute(f"SELECT {cols} FROM raw WHERE id IN "
+                          f"(SELECT MAX(id) FROM raw WHERE mac_id IN ({marks}) GROUP BY mac_id)", chunk)
+                changed.extend(dict(zip(RAW_COLUMNS, row)) for row in c.fetchall())
+            if changed:
+                live.publish({"matches": changed})
+    follow_state["transition_id"] = last_id
+
+    # Kayıt sayısı liderin meta.raw_count sayacından okunur
+    publish_snapshot()
+
+def lead():
+    """Liderlik alındığında yazma yollarını açıp veri çekme döngüsünü başlatır"""
+    metrics.follow_local()
+    open_write_paths()
+    log_to_db("INFO", f"Liderlik alındı (pid {os.getpid()})")
+    worker_thread()
+
+def start_election():
+    """Liderlik seçimini arka plan thread'inde başlatır; lider olunca worker döngüsü aynı thread'de çalışır"""
+    elector = threading.Thread(target=election.run, args=(lead, follow), daemon=True, name="leader-election")
+    elector.start()
+    return elector
 
 # Ana sayfa HTML şablonu
 HTML_TEMPLATE = """
@@ -309,7 +541,7 @@ HTML_TEMPLATE = """
             <tr>
                 <td>{{ log.timestamp }}</td>
                 <td>{{ log.level }}</td>
-                <td>{{ log.message }}</td>
+                <td>{{ log.message }}{% if log.count > 1 %} (×{{ log.count }}){% endif %}</td>
             </tr>
             {% endfor %}
         </table>
@@ -322,100 +554,34 @@ HTML_TEMPLATE = """
 </html>
 """
 
+# Şablon başlangıçta bir kez derlenir (render_template_string her çağrıda yeniden derler)
+HOME_TEMPLATE = app.jinja_env.from_string(HTML_TEMPLATE)
+
 @app.route('/')
 def home():
     """Ana sayfa"""
     try:
-        c = conn.cursor()
-        
-        # Meta bilgilerini al
-        c.execute("SELECT * FROM meta")
-        meta = {row[0]: row[1] for row in c.fetchall()}
-        
-        last_updated = "Bilinmiyor"
-        if "last_updated" in meta:
-            try:
-                dt = datetime.datetime.fromisoformat(meta["last_updated"])
-                last_updated = dt.strftime("%d.%m.%Y %H:%M:%S")
-            except:
-                last_updated = meta["last_updated"]
-        
-        record_count = meta.get("record_count", "0")
-        
-        # Son maçları al
-        c.execute("""
-            SELECT ev, skor, dep, dakika, lig, tarih, saat, oran 
-            FROM raw 
-            ORDER BY id DESC LIMIT 20
-        """)
+        snap = current_snapshot()
+        if request.if_none_match.contains(snap.etag):
+            return Response(status=304)
         
-        matches = []
-        for row in c.fetchall():
-            matches.append({
-                "ev": row[0],
-                "skor": row[1],
-                "dep": row[2],
-                "dakika": row[3],
-                "lig": row[4],
-                "tarih": row[5],
-                "saat": row[6],
-                "oran": row[7]
-            })
-        
-        # Son logları al
-        c.execute("SELECT timestamp, level, message FROM log ORDER BY id DESC LIMIT 10")
-        logs = []
-        for row in c.fetchall():
-            logs.append({
-                "timestamp": row[0],
-                "level": row[1],
-                "message": row[2]
-            })
-            
-        return render_template_string(
-            HTML_TEMPLATE,
-            last_updated=last_updated,
-            record_count=record_count,
-            status="Aktif ✓",
-            matches=matches,
-            logs=logs
-        )
+        resp = Response(snap.page("home", lambda context: HOME_TEMPLATE.render(status="Aktif ✓", **context)))
+        resp.set_etag(snap.etag)
+        return resp
     except Exception as e:
         logger.exception(f"Ana sayfa hatası: {str(e)}")
         return f"Hata: {str(e)}"
 
 @app.route('/canli.db')
 def db():
-    """Veritabanı indirme endpoint'i"""
-    return send_file(DB_FILE, as_attachment=True)
+    """Veritabanı indirme endpoint'i (tutarlı görüntü, gzip, Range; ?since=N ile fark veritabanı)"""
+    return downloads.response()
 
 @app.route('/api/status')
 def status():
     """API durum bilgisi"""
     try:
-        c = conn.cursor()
-        
-        # Meta bilgilerini al
-        c.execute("SELECT * FROM meta")
-        meta = {row[0]: row[1] for row in c.fetchall()}
-        
-        # Kayıt sayısını al
-        c.execute("SELECT COUNT(*) FROM raw")
-        count = c.fetchone()[0]
-        
-        # Son log mesajını al
-        c.execute("SELECT timestamp, level, message FROM log ORDER BY id DESC LIMIT 1")
-        log = c.fetchone()
-        last_log = {"timestamp": log[0], "level": log[1], "message": log[2]} if log else None
-        
-        return jsonify({
-            "status": "up",
-            "timestamp": datetime.datetime.now().isoformat(),
-            "db_file": DB_FILE,
-            "record_count": count,
-            "last_updated": meta.get("last_updated", "Bilinmiyor"),
-            "last_log": last_log
-        })
+        return snapshot.respond("status", current_snapshot())
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -425,22 +591,24 @@ def status():
 
 @app.route('/api/matches')
 def matches():
-    """Güncel maçları JSON olarak döndür"""
+    """
+    Güncel maçları JSON olarak döndür.
+    Parametresiz istekler anlık görüntüden sunulur; lig, tarih, mac_id, since, until,
+    cursor, limit ve fields parametreleri indeksli sorguya yönlendirilir.
+    """
     try:
-        c = conn.cursor()
-        c.execute("SELECT * FROM raw ORDER BY id DESC LIMIT 50")
-        
-        columns = [description[0] for description in c.description]
-        result = []
-        
-        for row in c.fetchall():
-            result.append(dict(zip(columns, row)))
+        if not query.is_query(request.args):
+            return snapshot.respond("matches", current_snapshot())
         
+        result = query.query_matches(readers.connection(), request.args)
+        result["timestamp"] = datetime.datetime.now().isoformat()
+        return jsonify(result)
+    except ValueError as e:
         return jsonify({
-            "count": len(result),
-            "timestamp": datetime.datetime.now().isoformat(),
-            "matches": result
-        })
+            "status": "error",
+            "error": str(e),
+            "timestamp": datetime.datetime.now().isoformat()
+        }), 400
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -448,11 +616,65 @@ def matches():
             "timestamp": datetime.datetime.now().isoformat()
         }), 500
 
+@app.route('/api/odds/<int:event_id>')
+def odds_history(event_id):
+    """Maçın oran geçmişi (?market=M&since=TS&until=TS, unix saniye)"""
+    if not odds.ENABLED:
+        return jsonify({"status": "error", "error": "Oran geçmişi kapalı (CANLI_ODDS=0)"}), 404
+    try:
+        market, since, until = odds.query_args(request.args)
+        if odds_store is not None:
+            ticks = odds_store.read(event_id, market, since, until)
+        else:
+            # Takipçi: liderin diske yazdığı batch'ler (henüz bellekte olan tic'ler liderdedir)
+            ticks = odds.read(odds_readers.connection(), event_id, market, since, until)
+        return jsonify(odds.to_json(event_id, ticks))
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "error": str(e),
+            "timestamp": datetime.datetime.now().isoformat()
+        }), 400
+
+@app.route('/api/timeline/<mac_id>')
+def match_timeline(mac_id):
+    """Maçın skor, dakika ve oran durumu geçmişi (?since=TS&until=TS&points=N, unix saniye)"""
+    try:
+        since, until, points = timeline.query_args(request.args)
+        return jsonify(timeline.timeline(readers.connection(), mac_id, since, until, points))
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "error": str(e),
+            "timestamp": datetime.datetime.now().isoformat()
+        }), 400
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus metin biçiminde döngü, aşama ve tazelik metrikleri"""
+    return metrics.metrics_response()
+
+@app.route('/api/stream')
+def stream_matches():
+    """Değişen maçların canlı akışı (Server-Sent Events, Last-Event-ID ile devam edilebilir)"""
+    return sse_response(live)
+
 @app.route('/force-update')
 def force_update():
     """Zorla veri güncelleme"""
+    if not election.is_leader or writer is None:
+        # Yazma sadece liderde yapılır; takipçi isteği iki yazıcı oluşturmasın
+        return jsonify({
+            "status": "error",
+            "error": "Bu süreç lider değil",
+            "leader": election.holder(),
+            "timestamp": datetime.datetime.now().isoformat()
+        }), 409
     try:
         success = get_data()
+        if write_queue is not None:
+            write_queue.flush(timeout=30)
+        publish_snapshot()
         return jsonify({
             "status": "success" if success else "error",
             "timestamp": datetime.datetime.now().isoformat(),
@@ -467,22 +689,21 @@ def force_update():
 
 # Uygulama başlatma
 if __name__ == "__main__":
-    # Worker thread'i başlat
-    worker = threading.Thread(target=worker_thread, daemon=True)
-    worker.start()
+    # Liderlik seçimini başlat (başka bir süreç veri çekiyorsa bu süreç sadece okur)
+    start_election()
     
     # Flask uygulamasını başlat
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=False)
 else:
-    # WSGI sunucusu tarafından içe aktarıldığında worker'ı başlat
+    # WSGI sunucusu tarafından içe aktarıldığında liderlik seçimini başlat.
+    # Her süreç seçime katılır, sadece kilidi alan veri çeker; lider ölürse biri devralır.
+    # (CANLI_WORKER=0 ile sadece web sunucusu çalışır)
     try:
-        # Daha önce worker başlatılmış mı kontrol et
-        if not any(t.name == "worker-thread" for t in threading.enumerate()):
-            worker = threading.Thread(target=worker_thread, daemon=True, name="worker-thread")
-            worker.start()
-            logger.info("Worker thread WSGI modunda başlatıldı")
-            log_to_db("INFO", "Worker thread WSGI modunda başlatıldı")
+        if os.environ.get("CANLI_WORKER", "1") != "0":
+            start_election()
+            logger.info("Liderlik seçimi WSGI modunda başlatıldı")
+            log_to_db("INFO", "Liderlik seçimi WSGI modunda başlatıldı")
     except Exception as e:
-        logger.exception(f"Worker thread başlatma hatası: {str(e)}")
-        log_to_db("ERROR", f"Worker thread başlatma hatası: {str(e)}")
+        logger.exception(f"Liderlik seçimi başlatma hatası: {str(e)}")
+        log_to_db("ERROR", f"Liderlik seçimi başlatma hatası: {str(e)}")
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Kompakt Depolama Şeması ve Geçiş Aracı
+- Takım ve lig adları boyut tablolarında (teams, leagues) bir kez tutulur
+- Skor iki tam sayı, dakika küçük tam sayı, oran durumu 0/1, zamanlar epoch tam sayı olarak saklanır
+- Sayıya çevrilemeyen değerler ("ST", "İY" gibi) labels tablosunda tutulur ve negatif id ile gösterilir
+- raw adında uyumluluk görünümü (VIEW) ve INSTEAD OF tetikleyicileri sayesinde
+  mevcut kod (yazıcı, sorgular, saklama) hiçbir değişiklik olmadan çalışır
+
+Kullanım:
+    python compact.py eski.db yeni.db [--chunk 50000]   # Mevcut veritabanını parça parça dönüştür
+    python compact.py --init canli.db                   # Boş bir veritabanını kompakt şemayla başlat
+"""
+import argparse
+import calendar
+import datetime
+import logging
+import os
+import re
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS teams(id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS leagues(id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS labels(id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE)",
+    # AUTOINCREMENT: saklama en yüksek id'leri silse de id'ler yeniden kullanılmaz
+    # (/api/matches cursor'ı ve ?since=N fark indirmesi artan id'ye güvenir)
+    """CREATE TABLE IF NOT EXISTS samples(
+         id INTEGER PRIMARY KEY AUTOINCREMENT,
+         ts INTEGER NOT NULL,
+         mac_id INTEGER,
+         home_id INTEGER,
+         away_id INTEGER,
+         home_goals INTEGER,
+         away_goals INTEGER,
+         minute INTEGER,
+         odds_open INTEGER,
+         match_day INTEGER,
+         kickoff INTEGER,
+         league_id INTEGER,
+         mbs INTEGER)""",
+    "CREATE INDEX IF NOT EXISTS idx_samples_mac ON samples(mac_id, id)",
+    "CREATE INDEX IF NOT EXISTS idx_samples_mac_ts ON samples(mac_id, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_samples_league ON samples(league_id, id)",
+    "CREATE INDEX IF NOT EXISTS idx_samples_day ON samples(match_day, id)",
+    "CREATE INDEX IF NOT EXISTS idx_samples_ts ON samples(ts)",
+)
+
+# --- SQL tarafı kodlama ifadeleri (tetikleyiciler için) ---
+
+def _label_id(x):
+    return f"-(SELECT id FROM labels WHERE text = {x})"
+
+# Alan -> (sayıya çevrilebilirlik koşulu, sayısal değer) ; x metne çevrilmiş NEW değeridir
+_SQL_CODECS = {
+    "dakika": (lambda x: f"{x} NOT GLOB '*[^0-9]*' AND CAST(CAST({x} AS INTEGER) AS TEXT) = {x}",
+               lambda x: f"CAST({x} AS INTEGER)"),
+    "mbs": (lambda x: f"{x} NOT GLOB '*[^0-9]*' AND CAST(CAST({x} AS INTEGER) AS TEXT) = {x}",
+            lambda x: f"CAST({x} AS INTEGER)"),
+    "saat": (lambda x: f"{x} GLOB '[0-9][0-9]:[0-5][0-9]'",
+             lambda x: f"CAST(substr({x}, 1, 2) AS INTEGER) * 60 + CAST(substr({x}, 4, 2) AS INTEGER)"),
+    "tarih": (lambda x: f"{x} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]' AND date({x}) = {x}",
+              lambda x: f"CAST(julianday({x}) - 2440587.5 AS INTEGER)"),
+}
+
+def _sql_text(field):
+    return f"CAST(NEW.{field} AS TEXT)"
+
+def _sql_encode(field):
+    x = _sql_text(field)
+    cond, value = _SQL_CODECS[field]
+    return f"CASE WHEN {x} IS NULL OR {x} = '' THEN NULL WHEN {cond(x)} THEN {value(x)} ELSE {_label_id(x)} END"
+
+def _sql_ensure_label(field):
+    x = _sql_text(field)
+    cond, _ = _SQL_CODECS[field]
+    return f"INSERT OR IGNORE INTO labels(text) SELECT {x} WHERE {x} IS NOT NULL AND {x} <> '' AND NOT ({cond(x)});"
+
+def _sql_decode(column, numeric):
+    return (f"CASE WHEN s.{column} IS NULL THEN '' WHEN s.{column} >= 0 THEN {numeric} "
+            f"ELSE (SELECT text FROM labels WHERE id = -s.{column}) END")
+
+_SKOR = "CAST(NEW.skor AS TEXT)"
+_SKOR_OK = f"{_SKOR} GLOB '[0-9]*-[0-9]*' AND {_SKOR} NOT GLOB '*[^0-9-]*'"
+
+def _sql_values():
+    """samples sütunları için tetikleyici değer ifadeleri"""
+    return {
+        "ts": "COALESCE(CAST(strftime('%s', NEW.ts) AS INTEGER), CAST(strftime('%s', 'now') AS INTEGER))",
+        "mac_id": "NEW.mac_id",
+        "home_id": "(SELECT id FROM teams WHERE name = COALESCE(NEW.ev, ''))",
+        "away_id": "(SELECT id FROM teams WHERE name = COALESCE(NEW.dep, ''))",
+        "home_goals": f"CASE WHEN {_SKOR_OK} THEN CAST(substr({_SKOR}, 1, instr({_SKOR}, '-') - 1) AS INTEGER) END",
+        "away_goals": f"CASE WHEN {_SKOR_OK} THEN CAST(substr({_SKOR}, instr({_SKOR}, '-') + 1) AS INTEGER) END",
+        "minute": _sql_encode("dakika"),
+        "odds_open": "CASE NEW.oran WHEN 'AÇIK' THEN 1 WHEN 'KAPALI' THEN 0 END",
+        "match_day": _sql_encode("tarih"),
+        "kickoff": _sql_encode("saat"),
+        "league_id": "(SELECT id FROM leagues WHERE name = COALESCE(NEW.lig, ''))",
+        "mbs": _sql_encode("mbs"),
+    }
+
+def _sql_dimensions():
+    """Tetikleyicilerin başında boyut ve etiket tablolarını dolduran ifadeler"""
+    return "\n".join([
+        "INSERT OR IGNORE INTO teams(name) VALUES (COALESCE(NEW.ev, '')), (COALESCE(NEW.dep, ''));",
+        "INSERT OR IGNORE INTO leagues(name) VALUES (COALESCE(NEW.lig, ''));",
+        *(_sql_ensure_label(f) for f in ("dakika", "saat", "tarih", "mbs")),
+    ])
+
+def view_sql():
+    """raw uyumluluk görünümü: eski sütun adları ve metin biçimleri"""
+    return f"""CREATE VIEW IF NOT EXISTS raw AS
+SELECT s.id AS id,
+       datetime(s.ts, 'unixepoch') AS ts,
+       CAST(s.mac_id AS TEXT) AS mac_id,
+       h.name AS ev,
+       a.name AS dep,
+       CASE WHEN s.home_goals IS NULL THEN '' ELSE s.home_goals || '-' || s.away_goals END AS skor,
+       {_sql_decode("minute", "CAST(s.minute AS TEXT)")} AS dakika,
+       CASE s.odds_open WHEN 1 THEN 'AÇIK' WHEN 0 THEN 'KAPALI' ELSE '' END AS oran,
+       {_sql_decode("match_day", "date(s.match_day * 86400, 'unixepoch')")} AS tarih,
+       {_sql_decode("kickoff", "printf('%02d:%02d', s.kickoff / 60, s.kickoff % 60)")} AS saat,
+       l.name AS lig,
+       {_sql_decode("mbs", "CAST(s.mbs AS TEXT)")} AS mbs
+FROM samples s
+LEFT JOIN teams h ON h.id = s.home_id
+LEFT JOIN teams a ON a.id = s.away_id
+LEFT JOIN leagues l ON l.id = s.league_id"""
+
+def trigger_sql():
+    """raw görünümüne yazmayı samples tablosuna yönlendiren INSTEAD OF tetikleyicileri"""
+    values = _sql_values()
+    cols = ", ".join(values)
+    insert = f"""CREATE TRIGGER IF NOT EXISTS raw_insert INSTEAD OF INSERT ON raw
+BEGIN
+{_sql_dimensions()}
+INSERT INTO samples(id, {cols}) VALUES (NEW.id, {", ".join(values.values())});
+END"""
+    update = f"""CREATE TRIGGER IF NOT EXISTS raw_update INSTEAD OF UPDATE ON raw
+BEGIN
+{_sql_dimensions()}
+UPDATE samples SET {", ".join(f"{c} = {v}" for c, v in values.items())} WHERE id = OLD.id;
+END"""
+    delete = """CREATE TRIGGER IF NOT EXISTS raw_delete INSTEAD OF DELETE ON raw
+BEGIN
+DELETE FROM samples WHERE id = OLD.id;
+END"""
+    return insert, update, delete
+
+# /api/matches filtreleri: görünüm üzerinden değil, samples indeksleri üzerinden çalışır
+FILTERS = {
+    "lig": "id IN (SELECT s.id FROM samples s JOIN leagues l ON l.id = s.league_id WHERE l.name = ?)",
+    "tarih": "id IN (SELECT id FROM samples WHERE match_day = CAST(julianday(?) - 2440587.5 AS INTEGER))",
+    "mac_id": "id IN (SELECT id FROM samples WHERE mac_id = ?)",
+    "since": "id IN (SELECT id FROM samples WHERE ts >= CAST(strftime('%s', ?) AS INTEGER))",
+    "until": "id IN (SELECT id FROM samples WHERE ts < CAST(strftime('%s', ?) AS INTEGER))",
+}
+
+def setup_compact(conn):
+    """Kompakt şemayı, raw görünümünü ve tetikleyicileri oluşturur"""
+    for sql in SCHEMA:
+        conn.execute(sql)
+    conn.execute(view_sql())
+    for sql in trigger_sql():
+        conn.execute(sql)
+    conn.commit()
+
+def check_ids(conn):
+    """
+    samples AUTOINCREMENT'sız oluşturulduysa (eski kompakt dosyalar) uyarır; id'ler yeniden kullanılabilir.
+    Tablo yerinde değiştirilemez, geçiş aracıyla yeniden oluşturulur. Sorun yoksa True.
+    """
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'samples'").fetchone()
+    if row is None or "AUTOINCREMENT" in row[0].upper():
+        return True
+    logger.warning("samples tablosu AUTOINCREMENT'sız, silinen id'ler yeniden kullanılabilir; "
+                   "worker dururken yeniden oluşturun: python compact.py eski.db yeni.db")
+    return False
+
+def is_compact(conn):
+    """raw bir görünümse (kompakt şema) True"""
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'raw'").fetchone()
+    return bool(row) and row[0] == "view"
+
+# --- Python tarafı kodlama (toplu geçiş için, tetikleyicilerle aynı kurallar) ---
+
+_INT_RE = re.compile(r"^(0|[1-9][0-9]*)$")
+_TIME_RE = re.compile(r"^[0-9]{2}:[0-5][0-9]$")
+_DATE_RE = re.compile(r"^[0-9]{4}-[0-9]{2}-[0-9]{2}$")
+_SKOR_RE = re.compile(r"^([0-9]+)-([0-9]+)$")
+_EPOCH_DAY = 719163  # date(1970, 1, 1).toordinal()
+
+class Dimensions:
+    """teams, leagues ve labels için bellek içi id önbelleği"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.cache = {}
+        for table, column in (("teams", "name"), ("leagues", "name"), ("labels", "text")):
+            self.cache[table] = dict(
+                (name, id_) for id_, name in conn.execute(f"SELECT id, {column} FROM {table}"))
+
+    def id(self, table, value):
+        value = "" if value is None else str(value)
+        found = self.cache[table].get(value)
+        if found is None:
+            column = "text" if table == "labels" else "name"
+            found = self.conn.execute(f"INSERT INTO {table}({column}) VALUES(?)", (value,)).lastrowid
+            self.cache[table][value] = found
+        return found
+
+    def small(self, value, pattern, convert):
+        """Sayıya çevrilebiliyorsa sayı, değilse -etiket id'si; boşsa None"""
+        if value is None or value == "":
+            return None
+        text = str(value)
+        if pattern.match(text):
+            try:
+                return convert(text)
+            except ValueError:
+                pass
+        return -self.id("labels", text)
+
+def _epoch(ts):
+    """CURRENT_TIMESTAMP biçimindeki (UTC) zamanı epoch saniyeye çevirir"""
+    try:
+        return calendar.timegm(time.strptime(ts, "%Y-%m-%d %H:%M:%S"))
+    except (TypeError, ValueError):
+        return int(time.time())
+
+def _day(text):
+    return datetime.date.fromisoformat(text).toordinal() - _EPOCH_DAY
+
+def encode_row(dims, row):
+    """(id, ts, mac_id, ev, dep, skor, dakika, oran, tarih, saat, lig, mbs) satırını samples satırına çevirir"""
+    id_, ts, mac_id, ev, dep, skor, dakika, oran, tarih, saat, lig, mbs = row
+    goals = _SKOR_RE.match(str(skor)) if skor is not None else None
+    return (
+        id_,
+        _epoch(ts),
+        int(mac_id) if mac_id is not None and _INT_RE.match(str(mac_id)) else mac_id,
+        dims.id("teams", ev),
+        dims.id("teams", dep),
+        int(goals.group(1)) if goals else None,
+        int(goals.group(2)) if goals else None,
+        dims.small(dakika, _INT_RE, int),
+        {"AÇIK": 1, "KAPALI": 0}.get(oran),
+        dims.small(tarih, _DATE_RE, _day),
+        dims.small(saat, _TIME_RE, lambda t: int(t[:2]) * 60 + int(t[3:])),
+        dims.id("leagues", lig),
+        dims.small(mbs, _INT_RE, int),
+    )
+
+SAMPLE_SQL = "INSERT INTO samples VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?)"
+
+def copy_other_tables(dst, src_path):
+    """
+    raw dışındaki tabloları (meta, log, transitions, ...) indeksleriyle birlikte kopyalar.
+    SQLite'ın iç tabloları (sqlite_sequence, ANALYZE'ın sqlite_stat1'i) oluşturulamaz, atlanır.
+    """
+    dst.execute("ATTACH DATABASE ? AS src", (src_path,))
+    try:
+        objects = dst.execute(
+            "SELECT type, name, tbl_name, sql FROM src.sqlite_master "
+            "WHERE sql IS NOT NULL AND tbl_name <> 'raw' AND tbl_name NOT LIKE 'sqlite\\_%' ESCAPE '\\' "
+            "ORDER BY type = 'index'").fetchall()
+        existing = {row[0] for row in dst.execute("SELECT name FROM main.sqlite_master")}
+        for type_, name, tbl_name, sql in objects:
+            if name in existing or type_ not in ("table", "index"):
+                continue
+            dst.execute(sql)
+            if type_ == "table":
+                dst.execute(f"INSERT INTO main.{name} SELECT * FROM src.{name}")
+                logger.info(f"{name} tablosu kopyalandı")
+        dst.commit()
+    finally:
+        dst.execute("DETACH DATABASE src")
+
+def migrate(src_path, dst_path, chunk=50000):
+    """src'deki raw tablosunu parça parça dst'deki kompakt şemaya aktarır"""
+    if os.path.exists(dst_path):
+        raise SystemExit(f"Hedef dosya zaten var: {dst_path}")
+    src = sqlite3.connect(f"file:{src_path}?mode=ro", uri=True)
+    dst = sqlite3.connect(dst_path)
+    dst.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    dst.execute("PRAGMA journal_mode=WAL")
+    dst.execute("PRAGMA synchronous=OFF")
+    setup_compact(dst)
+    dims = Dimensions(dst)
+
+    last_id, total, start = 0, 0, time.time()
+    cols = "id, ts, mac_id, ev, dep, skor, dakika, oran, tarih, saat, lig, mbs"
+    while True:
+        rows = src.execute(f"SELECT {cols} FROM raw WHERE id > ? ORDER BY id LIMIT ?",
+                           (last_id, chunk)).fetchall()
+        if not rows:
+            break
+        dst.executemany(SAMPLE_SQL, [encode_row(dims, row) for row in rows])
+        dst.commit()
+        last_id = rows[-1][0]
+        total += len(rows)
+        logger.info(f"{total} satır aktarıldı ({total / max(time.time() - start, 1e-6):.0f} satır/s)")
+
+    src.close()
+    copy_other_tables(dst, src_path)
+    dst.execute("PRAGMA synchronous=NORMAL")
+    dst.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    dst.close()
+    before, after = os.path.getsize(src_path), os.path.getsize(dst_path)
+    logger.info(f"Tamamlandı: {total} satır, {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+
+def init(path):
+    """Yeni ya da boş raw tablolu bir veritabanını kompakt şemaya geçirir"""
+    conn = sqlite3.connect(path)
+    if not is_compact(conn):
+        row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'raw'").fetchone()
+        if row:
+            if conn.execute("SELECT 1 FROM raw LIMIT 1").fetchone():
+                raise SystemExit("raw tablosu dolu; önce geçiş aracını kullanın: python compact.py eski.db yeni.db")
+            conn.execute("DROP TABLE raw")
+        # migrate() gibi: saklama boşalan sayfaları artımlı vacuum ile geri alabilsin
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        setup_compact(conn)
+        # Dosyada önceden tablo varsa ayar ancak VACUUM ile geçerli olur (raw boş olduğu için ucuzdur)
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("VACUUM")
+        logger.info(f"{path} kompakt şemayla başlatıldı")
+    conn.close()
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="canli.db dosyasını kompakt şemaya dönüştür")
+    parser.add_argument("src", help="Kaynak veritabanı (--init ile başlatılacak veritabanı)")
+    parser.add_argument("dst", nargs="?", help="Oluşturulacak kompakt veritabanı")
+    parser.add_argument("--chunk", type=int, default=50000, help="Parça başına satır sayısı")
+    parser.add_argument("--init", action="store_true", help="Boş veritabanını kompakt şemayla başlat")
+    args = parser.parse_args()
+
+    if args.init:
+        init(args.src)
+    elif args.dst:
+        migrate(args.src, args.dst, args.chunk)
+    else:
+        parser.error("Hedef dosya ya da --init gerekli")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Veritabanı İndirme Anlık Görüntüleri
+- Worker döngü sonunda SQLite online backup API ile tutarlı bir kopya alır (yazıcı beklemez)
+- Kopya önceden gzip'lenir; /canli.db gzip kabul eden istemciye sıkıştırılmış dosyayı sunar
+- Range ve If-Range desteklenir, kopan indirme kaldığı yerden devam eder
+- ?since=N ile sadece id'si N'den büyük satırları içeren küçük bir fark veritabanı indirilir
+- Son görüntü bilgisi latest.json dosyasında tutulur, böylece ayrı süreçteki web uygulaması da sunabilir
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, request, send_file
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SECONDS = float(os.environ.get("CANLI_SNAPSHOT_SECONDS", "60"))
+MANIFEST = "latest.json"
+KEEP_GENERATIONS = 2    # Devam eden indirmeler için bir önceki görüntü de tutulur
+DELTA_CACHE_SIZE = 32
+CHUNK = 1 << 20
+
+RAW_SCHEMA = """CREATE TABLE raw(
+                  id INTEGER PRIMARY KEY,
+                  ts TEXT,
+                  mac_id TEXT,
+                  ev TEXT,
+                  dep TEXT,
+                  skor TEXT,
+                  dakika TEXT,
+                  oran TEXT,
+                  tarih TEXT,
+                  saat TEXT,
+                  lig TEXT,
+                  mbs TEXT)"""
+RAW_SELECT = "SELECT id, ts, mac_id, ev, dep, skor, dakika, oran, tarih, saat, lig, mbs FROM snap.raw"
+
+def _has_table(conn, name, schema="main"):
+    return conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+class DbSnapshotter:
+    """
+    Worker tarafı: refresh() döngü sonunda çağrılır, interval dolmadıysa hiçbir şey yapmaz.
+    Kaynak veritabanına kendi salt okunur bağlantısıyla bağlanır; WAL sayesinde yazıcıyı bekletmez.
+    """
+
+    def __init__(self, db_path, out_dir=None, interval=SNAPSHOT_SECONDS):
+        self.db_path = db_path
+        self.out_dir = out_dir or os.path.join(os.path.dirname(os.path.abspath(db_path)), "snapshots")
+        self.interval = interval
+        self.last_run = 0.0
+        self.last_stats = {}
+        os.makedirs(self.out_dir, exist_ok=True)
+
+    def refresh(self, force=False):
+        """Zamanı geldiyse yeni bir görüntü üretir ve latest.json'u günceller"""
+        now = time.monotonic()
+        if not force and now - self.last_run < self.interval:
+            return None
+        self.last_run = now
+        start = time.perf_counter()
+        generation = int(time.time() * 1000)
+        name = f"canli-{generation}.db"
+        path = os.path.join(self.out_dir, name)
+
+        # Online backup: tek adımda, tek okuma transaction'ı içinde tutarlı kopya
+        tmp = path + ".tmp"
+        src = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        dst = sqlite3.connect(tmp)
+        try:
+            src.backup(dst)
+            dst.execute("PRAGMA journal_mode=DELETE")
+            raw_last_id = dst.execute("SELECT MAX(id) FROM raw").fetchone()[0] or 0
+            transitions_last_id = 0
+            if _has_table(dst, "transitions"):
+                transitions_last_id = dst.execute("SELECT MAX(id) FROM transitions").fetchone()[0] or 0
+        finally:
+            dst.close()
+            src.close()
+        os.replace(tmp, path)
+
+        # Sıkıştırırken ETag için özet de hesaplanır
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f_in, gzip.open(path + ".gz.tmp", "wb", compresslevel=6) as f_out:
+            for block in iter(lambda: f_in.read(CHUNK), b""):
+                digest.update(block)
+                f_out.write(block)
+        os.replace(path + ".gz.tmp", path + ".gz")
+
+        manifest = {
+            "generation": generation,
+            "file": name,
+            "etag": digest.hexdigest(),
+            "size": os.path.getsize(path),
+            "gzip_size": os.path.getsize(path + ".gz"),
+            "raw_last_id": raw_last_id,
+            "transitions_last_id": transitions_last_id,
+        }
+        tmp = os.path.join(self.out_dir, MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, os.path.join(self.out_dir, MANIFEST))
+        self.prune()
+
+        self.last_stats = dict(manifest, seconds=round(time.perf_counter() - start, 3))
+        logger.info(f"Veritabanı görüntüsü hazır: {manifest['size'] / 1e6:.1f} MB "
+                    f"(gzip {manifest['gzip_size'] / 1e6:.1f} MB), {self.last_stats['seconds']} sn")
+        return self.last_stats
+
+    def prune(self):
+        """Son KEEP_GENERATIONS görüntü dışındakileri siler"""
+        files = sorted(f for f in os.listdir(self.out_dir) if f.startswith("canli-") and f.endswith(".db"))
+        for old in files[:-KEEP_GENERATIONS]:
+            for suffix in ("", ".gz"):
+                try:
+                    os.remove(os.path.join(self.out_dir, old + suffix))
+                except FileNotFoundError:
+                    pass
+
+class DbDownloads:
+    """Web tarafı: latest.json'daki görüntüyü ve fark veritabanlarını sunar"""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self._manifest = None
+        self._mtime = None
+        self._deltas = OrderedDict()  # (generation, since, since_transitions) -> gzip'li bayt
+        self._lock = threading.Lock()
+
+    def manifest(self):
+        """latest.json'u okur; dosya değişmediyse bellekteki kopyayı döndürür"""
+        path = os.path.join(self.out_dir, MANIFEST)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime != self._mtime:
+            with open(path) as f:
+                self._manifest = json.load(f)
+            self._mtime = mtime
+        return self._manifest
+
+    def response(self):
+        """/canli.db yanıtı (tam görüntü ya da ?since= ile fark veritabanı)"""
+        manifest = self.manifest()
+        if manifest is None:
+            resp = Response("Veritabanı görüntüsü henüz hazır değil", status=503, mimetype="text/plain")
+            resp.headers["Retry-After"] = "30"
+            return resp
+
+        if "since" in request.args or "since_transitions" in request.args:
+            try:
+                since = int(request.args.get("since", manifest["raw_last_id"]))
+                since_transitions = int(request.args.get("since_transitions", manifest["transitions_last_id"]))
+            except ValueError:
+                return Response("since ve since_transitions tam sayı olmalı", status=400, mimetype="text/plain")
+            return self.delta_response(manifest, since, since_transitions)
+
+        path = os.path.join(self.out_dir, manifest["file"])
+        use_gzip = "gzip" in request.accept_encodings
+        etag = manifest["etag"] + ("-gz" if use_gzip else "")
+        # conditional=True: If-None-Match, Range ve If-Range werkzeug tarafından işlenir
+        resp = send_file(path + ".gz" if use_gzip else path, mimetype="application/vnd.sqlite3",
+                         as_attachment=True, download_name="canli.db", etag=etag,
+                         conditional=True, max_age=0)
+        if use_gzip:
+            resp.headers["Content-Encoding"] = "gzip"
+        self._sync_headers(resp, manifest)
+        return resp
+
+    def delta_response(self, manifest, since, since_transitions):
+        key = (manifest["generation"], since, since_transitions)
+        with self._lock:
+            body = self._deltas.get(key)
+            if body is not None:
+                self._deltas.move_to_end(key)
+        if body is None:
+            body = gzip.compress(build_delta(os.path.join(self.out_dir, manifest["file"]),
+                                             since, since_transitions), compresslevel=6, mtime=0)
+            with self._lock:
+                self._deltas[key] = body
+                while len(self._deltas) > DELTA_CACHE_SIZE:
+                    self._deltas.popitem(last=False)
+
+        use_gzip = "gzip" in request.accept_encodings
+        resp = Response(body if use_gzip else gzip.decompress(body), mimetype="application/vnd.sqlite3")
+        if use_gzip:
+            resp.headers["Content-Encoding"] = "gzip"
+        resp.headers["Content-Disposition"] = f"attachment; filename=canli-delta-{since}.db"
+        resp.set_etag(f"{manifest['etag']}-{since}-{since_transitions}" + ("-gz" if use_gzip else ""))
+        self._sync_headers(resp, manifest)
+        return resp.make_conditional(request, accept_ranges=True)
+
+    @staticmethod
+    def _sync_headers(resp, manifest):
+        """İstemcinin bir sonraki fark isteği için kullanacağı imleçler"""
+        resp.headers["Vary"] = "Accept-Encoding"
+        resp.headers["Cache-Control"] = "no-cache"
+        resp.headers["X-Raw-Last-Id"] = str(manifest["raw_last_id"])
+        resp.headers["X-Transitions-Last-Id"] = str(manifest["transitions_last_id"])
+
+def build_delta(snapshot_path, since, since_transitions):
+    """
+    Görüntüden fark veritabanı üretir ve baytlarını döndürür:
+    - raw: id > since olan satırlar ve since_transitions'tan sonra değişen maçların güncel satırı
+      (upsert modunda satırlar yerinde güncellendiği için; istemci id üzerinden INSERT OR REPLACE yapar)
+    - transitions: id > since_transitions olan değişimler
+    - meta ve sync (imleçler)
+    """
+    fd, tmp = tempfile.mkstemp(suffix=".db", dir=os.path.dirname(snapshot_path))
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(f"file:{tmp}", uri=True)
+        conn.execute("ATTACH DATABASE ? AS snap", (f"file:{snapshot_path}?mode=ro",))
+        conn.execute(RAW_SCHEMA)
+        has_transitions = _has_table(conn, "transitions", "snap")
+        if has_transitions:
+            conn.execute(
+                f"INSERT INTO raw {RAW_SELECT} WHERE id > ? OR id IN ("
+                f"SELECT MAX(id) FROM snap.raw WHERE mac_id IN "
+                f"(SELECT mac_id FROM snap.transitions WHERE id > ?) GROUP BY mac_id)",
+                (since, since_transitions))
+            conn.execute("CREATE TABLE transitions AS SELECT * FROM snap.transitions WHERE id > ?",
+                         (since_transitions,))
+        else:
+            conn.execute(f"INSERT INTO raw {RAW_SELECT} WHERE id > ?", (since,))
+        if _has_table(conn, "meta", "snap"):
+            conn.execute("CREATE TABLE meta AS SELECT * FROM snap.meta")
+        conn.execute("CREATE TABLE sync(key TEXT PRIMARY KEY, value INTEGER)")
+        conn.executemany("INSERT INTO sync VALUES(?, ?)", [
+            ("since", since),
+            ("since_transitions", since_transitions),
+            ("raw_last_id", conn.execute("SELECT MAX(id) FROM snap.raw").fetchone()[0] or 0),
+            ("transitions_last_id",
+             conn.execute("SELECT MAX(id) FROM snap.transitions").fetchone()[0] or 0 if has_transitions else 0),
+        ])
+        conn.commit()
+        conn.execute("DETACH DATABASE snap")
+        conn.close()
+        with open(tmp, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(tmp)
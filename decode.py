@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Bülten Yanıtlarının Çözümlenmesi
+- orjson kuruluysa onu, değilse standart json modülünü kullanır
+- CANLI_JSON_MODE ile çözümleme biçimi seçilir:
+  - full (varsayılan): tüm ağaç sözlük/liste olarak
+  - slim: ağaç çözülür ve hemen sadece kullanılan alanları tutan __slots__'lu kayıtlara indirgenir
+    (fetch önceki yanıtı döngüler arasında sakladığı için kalıcı bellek ciddi ölçüde düşer)
+  - stream: ijson kuruluysa event'ler tek tek akıştan okunup indirgenir, tam ağaç hiç oluşmaz
+    (tepe bellek en düşük; ijson yoksa slim'e düşer)
+- Oran geçmişi (odds.py) açıksa slim/stream event'leri tüm market fiyatlarını kompakt tuple olarak da taşır
+- İndirgenmiş kayıtlar sözlük gibi okunabilir (kayit["hn"], kayit.get("min", "ST"), "esd" in kayit),
+  böylece ingest.build_records ve fetch.merge_delta değişmeden çalışır
+"""
+import json
+import logging
+import os
+
+import odds
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+MODE = os.environ.get("CANLI_JSON_MODE", "full")
+
+if MODE == "stream" and ijson is None:
+    logger.warning("ijson kurulu değil, CANLI_JSON_MODE=stream yerine slim kullanılacak")
+    MODE = "slim"
+
+def loads(body):
+    """bytes/str JSON'u en hızlı mevcut ayrıştırıcıyla çözer"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+# Yanıtta hiç olmayan alan (null'dan ayrı tutulur, böylece .get() varsayılanları tam yanıttakiyle aynı çalışır)
+MISSING = object()
+
+class Record:
+    """Sözlük gibi okunabilen __slots__'lu kayıt; alt sınıflar yanıttaki sözlükten kurulur"""
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        value = getattr(self, key, MISSING)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        value = getattr(self, key, MISSING)
+        return default if value is MISSING else value
+
+    def __contains__(self, key):
+        return getattr(self, key, MISSING) is not MISSING
+
+    def __repr__(self):
+        fields = ", ".join(f"{n}={getattr(self, n)!r}" for n in self.__slots__ if n in self)
+        return f"{type(self).__name__}({fields})"
+
+# Kurucular sıcak yolda (döngü başına binlerce kayıt) olduğu için alanlar tek tek atanır
+
+class Side(Record):
+    __slots__ = ("c",)
+
+    def __init__(self, d):
+        self.c = d.get("c", MISSING)
+
+class Market(Record):
+    __slots__ = ("s",)
+
+    def __init__(self, d):
+        self.s = d.get("s", MISSING)
+
+class Score(Record):
+    __slots__ = ("id", "ht", "at", "min")
+
+    def __init__(self, d):
+        get = d.get
+        self.id = get("id", MISSING)
+        ht, at = get("ht", MISSING), get("at", MISSING)
+        self.ht = Side(ht) if type(ht) is dict else ht
+        self.at = Side(at) if type(at) is dict else at
+        self.min = get("min", MISSING)
+
+class Event(Record):
+    __slots__ = ("i", "hn", "an", "bri", "m", "odds")
+
+    def __init__(self, d):
+        get = d.get
+        self.i = get("i", MISSING)
+        self.hn = get("hn", MISSING)
+        self.an = get("an", MISSING)
+        self.bri = get("bri", MISSING)
+        # Oran durumu için sadece ilk üç marketin durumu gerekir (ingest.odds_status)
+        markets = get("m", MISSING)
+        self.m = [Market(m) for m in markets[:3]] if type(markets) is list else markets
+        # Oran geçmişi açıksa tüm marketlerin fiyatları tam sayılara indirgenmiş olarak tutulur (odds.py)
+        self.odds = odds.extract(d) if odds.ENABLED else MISSING
+
+class Bulletin(Record):
+    __slots__ = ("brdId", "esd", "strt", "lgn", "mbs")
+
+    def __init__(self, d):
+        get = d.get
+        self.brdId = get("brdId", MISSING)
+        self.esd = get("esd", MISSING)
+        self.strt = get("strt", MISSING)
+        self.lgn = get("lgn", MISSING)
+        self.mbs = get("mbs", MISSING)
+
+def _slim_items(items, fn):
+    """Sözlük ya da liste şeklindeki öğeleri aynı şekli koruyarak indirger"""
+    if isinstance(items, dict):
+        return {k: fn(v) for k, v in items.items()}
+    return [fn(v) for v in items or []]
+
+def slim_iddaa(payload):
+    data = (payload or {}).get("data") or {}
+    slim = {k: data[k] for k in ("version", "isdiff") if k in data}
+    slim["sc"] = _slim_items(data.get("sc"), Score)
+    slim["events"] = _slim_items(data.get("events"), Event)
+    return {"data": slim}
+
+def slim_bilyoner(payload):
+    return {"events": _slim_items((payload or {}).get("events"), Bulletin)}
+
+def _stream_items(body, prefix, fn, dict_first):
+    """
+    prefix altındaki sözlük ya da listeyi akıştan okuyup indirger.
+    Her deneme gövdenin tamamını taradığı için önce kaynağın genelde kullandığı şekil denenir.
+    """
+    def as_dict():
+        return {k: fn(v) for k, v in ijson.kvitems(body, prefix, use_float=True)}
+
+    def as_list():
+        return [fn(v) for v in ijson.items(body, prefix + ".item", use_float=True)]
+
+    first, second = (as_dict, as_list) if dict_first else (as_list, as_dict)
+    return first() or second()
+
+def stream_iddaa(body):
+    slim = {}
+    for key in ("version", "isdiff"):
+        # Gövdede hiç geçmeyen alan için tam tarama yapılmaz
+        if f'"{key}"'.encode() not in body:
+            continue
+        value = next(ijson.items(body, f"data.{key}", use_float=True), None)
+        if value is not None:
+            slim[key] = value
+    slim["sc"] = _stream_items(body, "data.sc", Score, dict_first=True)
+    slim["events"] = _stream_items(body, "data.events", Event, dict_first=False)
+    return {"data": slim}
+
+def stream_bilyoner(body):
+    return {"events": _stream_items(body, "events", Bulletin, dict_first=True)}
+
+SLIM = {"iddaa": slim_iddaa, "bilyoner": slim_bilyoner}
+STREAM = {"iddaa": stream_iddaa, "bilyoner": stream_bilyoner}
+
+def decode(name, body, mode=None):
+    """Kaynağın yanıt gövdesini seçilen biçimde çözer"""
+    mode = mode or MODE
+    if mode == "stream" and name in STREAM:
+        return STREAM[name](body)
+    payload = loads(body)
+    if mode in ("slim", "stream") and name in SLIM:
+        return SLIM[name](payload)
+    return payload
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Ortak Veri Çekme Modülü
+- sources.py'de kayıtlı kaynakları aynı anda (eşzamanlılığı sınırlı thread havuzunda) çeker
+- Devre kesicisi açık kaynaklar istenmez, hatası SourceUnavailable olarak döner
+- Her havuz thread'i kaynak başına kalıcı (keep-alive) bir requests.Session tutar
+- Her kaynağın kendi bağlantı/okuma zaman aşımı vardır, biri yavaşsa diğerinin verisi yine gelir
+- Koşullu istek: kaynak başına ETag / Last-Modified saklanır, 304 gelirse yanıt ayrıştırılmaz
+- İddaa için son görülen version gönderilir; fark (isdiff) yanıtları önceki veriyle birleştirilir
+- Yanıt gövdesinin özeti aynıysa JSON ayrıştırması atlanır ve kaynak "değişmedi" sayılır
+- Ayrıştırma decode.py ile yapılır (orjson varsa o; CANLI_JSON_MODE=slim/stream ile sadece gerekli alanlar)
+- CANLI_RECORD_DB verilirse her yanıt gövdesi recorder.py ile kaydedilir; yeniden oynatma aynı
+  apply_body() yolundan geçer
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+import recorder
+from sources import SOURCES, SourceUnavailable, configured
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "User-Agent": "Mozilla/5.0"
+}
+
+DELTA_ENABLED = os.environ.get("CANLI_DELTA", "1") != "0"
+# Fark birleştirmede biriken bitmiş maçları temizlemek için bu aralıkla tam bülten istenir
+FULL_REFRESH_SECONDS = 300
+
+_local = threading.local()
+# Aynı anda en fazla bu kadar kaynak çekilir
+FETCH_CONCURRENCY = int(os.environ.get("CANLI_FETCH_CONCURRENCY", 4))
+_pool = ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY, thread_name_prefix="fetch")
+
+# Kaynak adı -> {"etag", "last_modified", "hash", "version", "data", "full_at"}
+_state = {}
+_state_lock = threading.Lock()
+
+# Ham yanıt kaydedici (CANLI_RECORD_DB yoksa None)
+RECORDER = recorder.from_env()
+
+def get_session(name):
+    """Çağıran thread için kaynağa özel kalıcı Session döndürür"""
+    sessions = getattr(_local, "sessions", None)
+    if sessions is None:
+        sessions = _local.sessions = {}
+    session = sessions.get(name)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        sessions[name] = session
+    return session
+
+def _merge_items(prev_items, new_items, key):
+    """Liste ya da sözlük şeklindeki öğeleri anahtara göre birleştirir"""
+    if isinstance(prev_items, dict) or isinstance(new_items, dict):
+        merged = dict(prev_items or {})
+        merged.update(new_items or {})
+        return merged
+    merged = {item[key]: item for item in prev_items or []}
+    for item in new_items or []:
+        merged[item[key]] = item
+    return list(merged.values())
+
+def merge_delta(prev, payload):
+    """İddaa fark (isdiff) yanıtını önceki tam veriyle birleştirir; tam yanıtı aynen döndürür"""
+    data = (payload or {}).get("data") or {}
+    if not data.get("isdiff") or prev is None:
+        return payload
+    prev_data = prev.get("data") or {}
+    merged = dict(prev_data)
+    merged.update({k: v for k, v in data.items() if k not in ("events", "sc")})
+    merged["events"] = _merge_items(prev_data.get("events"), data.get("events"), "i")
+    merged["sc"] = _merge_items(prev_data.get("sc"), data.get("sc"), "id")
+    merged["isdiff"] = False
+    return dict(payload, data=merged)
+
+def apply_body(source, state, content, digest=None, now=None):
+    """
+    Yanıt gövdesini kaynağın durumuna (state sözlüğü) işler: özet aynıysa ayrıştırma atlanır,
+    fark yanıtları önceki veriyle birleştirilir. Dönüş: değişti_mi.
+    Yeniden oynatma (recorder.py) da bu fonksiyonu kullanır; now kaydın zamanıdır.
+    """
+    if digest is None:
+        digest = hashlib.blake2b(content, digest_size=16).digest()
+    changed = digest != state.get("hash") or "data" not in state
+    if changed:
+        with metrics.stage("parse"):
+            payload = source.parse(content)
+        if source.versioned:
+            data = (payload or {}).get("data") or {}
+            if not data.get("isdiff"):
+                state["full_at"] = time.time() if now is None else now
+            state["version"] = data.get("version", state.get("version", 0))
+            payload = merge_delta(state.get("data"), payload)
+        state["data"] = payload
+        state["hash"] = digest
+    return changed
+
+def fetch_source(source, timeout=None):
+    """
+    Tek bir kaynağı koşullu olarak çeker.
+    Dönüş: (veri, değişti_mi). Kaynak değişmediyse önceki veri ve False döner.
+    """
+    name = source.name
+    with _state_lock:
+        state = dict(_state.get(name, {}))
+
+    headers = {}
+    if "data" in state:
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+    version = None
+    if source.versioned:
+        fresh = time.time() - state.get("full_at", 0) < FULL_REFRESH_SECONDS
+        version = state.get("version", 0) if DELTA_ENABLED and fresh and "data" in state else 0
+    params = source.params(version)
+
+    resp = get_session(name).get(source.url, params=params, headers=headers, timeout=timeout or source.timeout)
+    metrics.FETCH_RESPONSES.inc(source=name, status=str(resp.status_code))
+    if resp.status_code == 304 and "data" in state:
+        metrics.SOURCE_SEEN[name] = time.time()
+        return state["data"], False
+    resp.raise_for_status()
+    metrics.FETCH_BYTES.inc(len(resp.content), source=name)
+
+    state["etag"] = resp.headers.get("ETag")
+    state["last_modified"] = resp.headers.get("Last-Modified")
+    digest = hashlib.blake2b(resp.content, digest_size=16).digest()
+    if RECORDER is not None:
+        RECORDER.record(name, resp.content, digest)
+    changed = apply_body(source, state, resp.content, digest)
+
+    with _state_lock:
+        _state[name] = state
+    metrics.SOURCE_SEEN[name] = time.time()
+    return state["data"], changed
+
+def fetch_all(read_timeout=None):
+    """
+    Yapılandırılmış tüm kaynakları paralel çeker.
+    Dönüş: (veriler, hatalar, değişenler) - veriler[kaynak] başarısız ya da devre kesicisi açık
+    kaynaklar için None olur, değişenler[kaynak] kaynağın son çekimden beri değişip değişmediğini gösterir.
+    read_timeout verilirse tüm kaynakların okuma zaman aşımını ezer.
+    """
+    data, errors, changed, futures = {}, {}, {}, {}
+    if RECORDER is not None:
+        RECORDER.start_cycle()
+    for source in configured():
+        if not source.breaker.allow():
+            data[source.name], changed[source.name] = None, False
+            errors[source.name] = SourceUnavailable(f"{source.name} devre kesicisi açık")
+            metrics.FETCH_RESPONSES.inc(source=source.name, status="skipped")
+            continue
+        timeout = source.timeout
+        if read_timeout is not None:
+            timeout = (timeout[0], read_timeout)
+        futures[source.name] = (source, _pool.submit(fetch_source, source, timeout))
+
+    for name, (source, future) in futures.items():
+        try:
+            data[name], changed[name] = future.result()
+            source.breaker.success()
+        except Exception as e:
+            data[name], changed[name] = None, False
+            errors[name] = e
+            source.breaker.failure()
+            if getattr(e, "response", None) is None:
+                metrics.FETCH_RESPONSES.inc(source=name, status="error")
+            logger.warning(f"{name} verisi alınamadı: {str(e)}")
+    return data, errors, changed
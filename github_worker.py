@@ -1,15 +1,18 @@
 #!/usr/bin/env python3
 """
 GitHub Actions için Futbol Veri Toplama Scripti
-Her çalıştığında verileri çeker ve SQLite veritabanına kaydeder
+Her çalıştığında verileri çeker ve SQLite veritabanına kaydeder.
+CANLI_OUTPUT=shards ile veritabanı yerine data/shards altındaki günlük, sadece eklenen
+sıkıştırılmış dosyalara yazar (git geçmişinde her çalıştırma küçük bir fark olarak kalır).
 """
-import sqlite3
-import requests
-import time
-import json
 import logging
 import os
 import datetime
+from fetch import fetch_all
+from retention import Retention
+from shards import ShardWriter
+from sources import build_all, primary_error
+from storage import MatchWriter, connect
 
 # Log yapılandırması
 logging.basicConfig(
@@ -21,100 +24,82 @@ logger = logging.getLogger(__name__)
 # Veritabanı yolu
 os.makedirs('data', exist_ok=True)
 DB_FILE = "data/canli.db"
+SHARD_DIR = "data/shards"
 
-# SQLite veritabanı yapılandırması
-conn = sqlite3.connect(DB_FILE)
-c = conn.cursor()
+# Çıktı modu: sqlite (varsayılan) veya shards
+OUTPUT_MODE = os.environ.get("CANLI_OUTPUT", "sqlite")
 
-# Tablo oluştur (yoksa)
-c.execute("""CREATE TABLE IF NOT EXISTS raw(
-               id INTEGER PRIMARY KEY AUTOINCREMENT,
-               ts TEXT DEFAULT CURRENT_TIMESTAMP,
-               mac_id TEXT,
-               ev TEXT,
-               dep TEXT,
-               skor TEXT,
-               dakika TEXT,
-               oran TEXT,
-               tarih TEXT,
-               saat TEXT,
-               lig TEXT,
-               mbs TEXT)""")
+if OUTPUT_MODE == "shards":
+    # Günlük shard yazıcısı (sadece değişen maçlar eklenir)
+    shard_writer = ShardWriter(SHARD_DIR)
+else:
+    # SQLite veritabanı yapılandırması
+    conn = connect(DB_FILE)
+    c = conn.cursor()
 
-# GitHub için özel tablo - son güncelleme zamanı
-c.execute("""CREATE TABLE IF NOT EXISTS meta(
-               key TEXT PRIMARY KEY,
-               value TEXT)""")
-conn.commit()
+    # Tablo oluştur (yoksa)
+    c.execute("""CREATE TABLE IF NOT EXISTS raw(
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   ts TEXT DEFAULT CURRENT_TIMESTAMP,
+                   mac_id TEXT,
+                   ev TEXT,
+                   dep TEXT,
+                   skor TEXT,
+                   dakika TEXT,
+                   oran TEXT,
+                   tarih TEXT,
+                   saat TEXT,
+                   lig TEXT,
+                   mbs TEXT)""")
+
+    # GitHub için özel tablo - son güncelleme zamanı
+    c.execute("""CREATE TABLE IF NOT EXISTS meta(
+                   key TEXT PRIMARY KEY,
+                   value TEXT)""")
+    conn.commit()
+
+    # Artımlı yazıcı (mac_id anahtarlı upsert + değişim günlüğü)
+    writer = MatchWriter(conn)
+
+    # Saklama: son CANLI_RETENTION_HOURS saat tam çözünürlükte, eskiler özetlenip silinir
+    retention = Retention(conn, writer, time_budget=10)
 
 def get_data():
     """İki API'den veri çeker ve veritabanına kaydeder"""
     logger.info("Veri çekiliyor...")
     
-    # API istekleri
-    headers = {
-        "If-Modified-Since": "Sat, 1 Jan 2000 00:00:00 GMT",
-        "Content-Type": "application/json",
-        "User-Agent": "Mozilla/5.0"
-    }
     try:
-        j1 = requests.get("https://sportsbookv2.iddaa.com/sportsbook/events?st=1&type=1&version=0", 
-                        headers=headers, timeout=10).json()
-        j2 = requests.get("https://www.bilyoner.com/api/v3/mobile/aggregator/gamelist/all/v1?tabType=9999&bulletinType=1&liveEventsEnabledForPreBulletin=true", 
-                        headers=headers, timeout=10).json()
-        
-        # Veri işleme
-        sc_list = j1.get("data", {}).get("sc", [])
-        ev_list = j1.get("data", {}).get("events", [])
-        b_list = j2.get("events", [])
-        
-        # Mevcut maç ID'leri
-        c.execute("SELECT mac_id FROM raw WHERE tarih = date('now')")
-        existing_ids = set([r[0] for r in c.fetchall()])
+        # API istekleri (kayıtlı kaynaklar paralel, kalıcı bağlantılarla)
+        sources, errors, changed = fetch_all()
+        # Hiçbir ana kaynak (iddaa) gelmediyse döngü hatalıdır; ayrıntı kaynağı (Bilyoner) yoksa ek bilgiler boş kalır
+        error = primary_error(sources, errors)
+        if error:
+            raise error
         
-        # Günlük tabloyu temizle (aynı verileri tekrar tekrar eklememek için)
-        if existing_ids:
-            c.execute("DELETE FROM raw WHERE tarih = date('now')")
-            conn.commit()
+        # Hiçbir kaynak değişmediyse ayrıştırma ve yazma atlanır
+        if not any(changed.values()):
+            logger.info("Veri değişmedi, döngü atlandı.")
+            return True
         
-        processed = 0
-        for sc in sc_list:
-            mac_id = sc["id"]
-            skor = f"{sc['ht']['c']}-{sc['at']['c']}"
-            dakika = sc.get("min", "ST")
-            
-            # Eşleşen event bilgisi
-            ev_obj = next((e for e in ev_list if e["i"] == mac_id), None)
-            if not ev_obj:
-                continue
-                
-            ev = ev_obj["hn"]
-            dep = ev_obj["an"]
-            oran = "AÇIK" if any(m.get("s") == "1" for m in ev_obj.get("m", [])[:3]) else "KAPALI"
-            
-            # Bilyoner'den ek bilgiler
-            b_obj = next((b for b in b_list if b.get("brdId") == ev_obj.get("bri")), None)
-            if not b_obj:
-                tarih, saat, lig, mbs = "", "", "", ""
-            else:
-                tarih = b_obj["esd"].split("T")[0] if "esd" in b_obj else datetime.date.today().isoformat()
-                saat = b_obj.get("strt", "")
-                lig = b_obj.get("lgn", "")
-                mbs = b_obj.get("mbs", "")
-            
-            # Veritabanına kaydet
-            c.execute("INSERT INTO raw(mac_id,ev,dep,skor,dakika,oran,tarih,saat,lig,mbs) VALUES(?,?,?,?,?,?,?,?,?,?)",
-                    (mac_id, ev, dep, skor, dakika, oran, tarih, saat, lig, mbs))
-            processed += 1
+        # Veri işleme (tek geçişte eşleştirme)
+        # Bilyoner kaydında başlangıç tarihi yoksa bugünün tarihi, kayıt hiç yoksa boş
+        records, missing = build_all(sources, today=datetime.date.today().isoformat(), unmatched_date="")
         
-        # Meta veriyi güncelle
-        now = datetime.datetime.now().isoformat()
-        c.execute("INSERT OR REPLACE INTO meta(key, value) VALUES(?, ?)", 
-                  ("last_updated", now))
-        c.execute("INSERT OR REPLACE INTO meta(key, value) VALUES(?, ?)", 
-                  ("record_count", str(processed)))
+        processed = len(records)
+        if OUTPUT_MODE == "shards":
+            # Günün shard'ına ekle (sadece değişen maçlar, tek gzip üyesi)
+            stats = shard_writer.write(records)
+            logger.info(f"Yazılan: {stats['written']}, değişmeyen: {stats['unchanged']}, "
+                        f"{stats['file']} ({stats['bytes']} bayt), {stats['ms']} ms")
+            return True
         
-        conn.commit()
+        # Veritabanına kaydet (sadece değişen maçlar, meta ile birlikte tek transaction)
+        stats = writer.write(records, meta={
+            "last_updated": datetime.datetime.now().isoformat(),
+            "record_count": processed,
+        })
+        logger.info(f"Yeni: {stats['inserted']}, güncellenen: {stats['updated']}, değişmeyen: {stats['unchanged']}, "
+                    f"{stats['rows_per_s']} satır/s, commit {stats['commit_ms']} ms")
         logger.info(f"{processed} adet maç veritabanına kaydedildi.")
         
     except Exception as e:
@@ -127,6 +112,11 @@ def main():
     """Ana fonksiyon"""
     try:
         success = get_data()
+        if OUTPUT_MODE == "shards":
+            return
+        # Çekim ya da yazım başarısızsa saklama bir sonraki çalıştırmaya bırakılır
+        if success:
+            retention.run()
         
         # Veritabanı bilgilerini göster
         c.execute("SELECT COUNT(*) FROM raw")
@@ -142,7 +132,8 @@ def main():
     except Exception as e:
         logger.exception(f"Beklenmeyen hata: {str(e)}")
     finally:
-        conn.close()
+        if OUTPUT_MODE != "shards":
+            conn.close()
 
 if __name__ == "__main__":
     main()
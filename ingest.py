@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Ortak Veri İşleme Modülü
+- İddaa ve Bilyoner yanıtlarını tek geçişte eşleştirir
+- Her döngüde id->event ve brdId->Bilyoner sözlüklerini bir kez kurar
+- Tüm giriş noktaları (worker, github_worker, pythonanywhere_worker, combined_app) bunu kullanır
+"""
+import logging
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# raw tablosuna yazılan sütunlar (kayıt tuple'ları bu sırayla üretilir)
+RAW_COLUMNS = ("mac_id", "ev", "dep", "skor", "dakika", "oran", "tarih", "saat", "lig", "mbs")
+
+def iter_scores(sc_data):
+    """sc alanını (sözlük ya da liste) (mac_id, sc) çiftlerine çevirir"""
+    if isinstance(sc_data, dict):
+        for key, sc in sc_data.items():
+            yield str(sc.get("id", key)), sc
+    else:
+        for sc in sc_data or []:
+            yield str(sc["id"]), sc
+
+def index_events(ev_list):
+    """İddaa event listesini id->event sözlüğüne çevirir"""
+    return {str(e["i"]): e for e in ev_list or [] if "i" in e}
+
+def index_bilyoner(b_data):
+    """Bilyoner events alanını (sözlük ya da liste) brdId->event sözlüğüne çevirir"""
+    if isinstance(b_data, dict):
+        return {str(k): v for k, v in b_data.items()}
+    return {str(b["brdId"]): b for b in b_data or [] if b.get("brdId") is not None}
+
+def _text(value):
+    """
+    API'nin sayı olarak da döndürebildiği alanları metne çevirir: raw sütunları TEXT'tir,
+    yeniden yüklenen durumla karşılaştırmada 45 ile '45' farklı görünmesin (None olduğu gibi kalır)
+    """
+    return value if value is None or isinstance(value, str) else str(value)
+
+def odds_status(ev_obj):
+    """İlk üç marketten biri açıksa AÇIK, değilse KAPALI"""
+    return "AÇIK" if any(m.get("s") == "1" for m in ev_obj.get("m", [])[:3]) else "KAPALI"
+
+def build_records(j1, j2, today="", on_error=None, unmatched_date=None):
+    """
+    İki API yanıtını tek geçişte raw kayıtlarına dönüştürür.
+    Dönüş: (kayıtlar, eşleşmeyen maç sayısı). Kayıtlar RAW_COLUMNS sırasında, alanları metin olan tuple'lardır.
+    on_error(mac_id, hata) verilirse maç bazındaki hatalar ona iletilir, yoksa loglanır.
+    today: Bilyoner kaydında esd yoksa tarih; unmatched_date: Bilyoner kaydı hiç yoksa tarih (None ise today).
+    """
+    if unmatched_date is None:
+        unmatched_date = today
+    data = (j1 or {}).get("data", {}) or {}
+    events = index_events(data.get("events", []))
+    bilyoner = index_bilyoner((j2 or {}).get("events", []))
+
+    records = []
+    missing = 0
+    for mac_id, sc in iter_scores(data.get("sc", [])):
+        try:
+            # Eşleşen event bilgisi
+            ev_obj = events.get(mac_id)
+            if not ev_obj:
+                missing += 1
+                continue
+
+            skor = f"{sc['ht']['c']}-{sc['at']['c']}"
+            dakika = _text(sc.get("min", "ST"))
+
+            # Bilyoner'den ek bilgiler
+            b_obj = bilyoner.get(str(ev_obj.get("bri", "")))
+            if not b_obj:
+                tarih, saat, lig, mbs = unmatched_date, "", "", ""
+            else:
+                tarih = b_obj["esd"].split("T")[0] if "esd" in b_obj else today
+                saat = _text(b_obj.get("strt", ""))
+                lig = _text(b_obj.get("lgn", ""))
+                mbs = _text(b_obj.get("mbs", ""))
+
+            records.append((mac_id, _text(ev_obj["hn"]), _text(ev_obj["an"]), skor, dakika,
+                            odds_status(ev_obj), tarih, saat, lig, mbs))
+        except Exception as e:
+            metrics.ROW_FAILURES.inc()
+            if on_error:
+                on_error(mac_id, e)
+            else:
+                logger.error(f"Maç ID {mac_id} işlenirken hata: {str(e)}")
+
+    metrics.EVENTS.inc(len(events))
+    metrics.MATCHES.inc(len(records))
+    metrics.MISSING.inc(missing)
+    return records, missing
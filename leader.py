@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tek Toplayıcı Seçimi (Dosya Kilidi)
+- WSGI sunucusu birden çok süreç açtığında sadece kilidi alan süreç (lider) veri çeker ve yazar
+- Kilit flock ile alınır; lider süreç ölünce işletim sistemi kilidi bırakır ve bekleyen
+  süreçlerden biri RETRY_SECONDS içinde devralır
+- Kilidi alamayan süreçler (takipçiler) okuma isteklerine hizmet etmeye devam eder
+- Kilit dosyasında liderin pid'i, makine adı ve liderlik başlangıcı tutulur (/api/status için)
+- fcntl olmayan sistemlerde (Windows) seçim yapılmaz, her süreç kendini lider sayar
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+RETRY_SECONDS = float(os.environ.get("CANLI_LEADER_RETRY_SECONDS", 5))
+
+class LeaderLock:
+    """Süreçler arası tek lider seçimi; kilit süreç yaşadığı sürece bırakılmaz"""
+
+    def __init__(self, path, retry_seconds=RETRY_SECONDS):
+        self.path = path
+        self.retry_seconds = retry_seconds
+        self.is_leader = False
+        self.since = None
+        self._fd = None
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Kilidi beklemeden almayı dener; alındıysa True"""
+        with self._lock:
+            if self.is_leader:
+                return True
+            if fcntl is None:
+                self.is_leader, self.since = True, time.time()
+                return True
+            # Her denemede yeni bir dosya tanımlayıcısı açılır: fork ile devralınan
+            # tanımlayıcılar kilidi paylaştığı için onlara güvenilmez
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            self._fd = fd
+            self.is_leader, self.since = True, time.time()
+            info = {"pid": os.getpid(), "host": socket.gethostname(), "since": self.since}
+            os.ftruncate(fd, 0)
+            os.pwrite(fd, json.dumps(info).encode(), 0)
+            return True
+
+    def release(self):
+        with self._lock:
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+                os.close(self._fd)
+                self._fd = None
+            self.is_leader, self.since = False, None
+
+    def holder(self):
+        """Kilit dosyasındaki lider bilgisi (yoksa None)"""
+        try:
+            with open(self.path) as f:
+                return json.loads(f.read() or "null")
+        except (OSError, ValueError):
+            return None
+
+    def stats(self):
+        return {
+            "role": "leader" if self.is_leader else "follower",
+            "pid": os.getpid(),
+            "leader": self.holder(),
+        }
+
+    def run(self, on_leader, on_follower=None):
+        """
+        Lider olana kadar her retry_seconds'ta kilidi dener; arada on_follower() çağrılır.
+        Kilit alınınca on_leader() çalıştırılır (normalde hiç dönmez).
+        """
+        while not self.try_acquire():
+            if on_follower is not None:
+                try:
+                    on_follower()
+                except Exception as e:
+                    logger.exception(f"Takipçi döngüsü hatası: {str(e)}")
+            time.sleep(self.retry_seconds)
+        logger.info(f"Liderlik alındı (pid {os.getpid()})")
+        on_leader()
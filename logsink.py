@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tamponlu Veritabanı Log Yazıcısı
+- log tablosuna her mesajda INSERT + commit yerine, mesajlar bellekte sınırlı bir tamponda toplanır
+- Arka plan thread'i tamponu belirli aralıklarla tek transaction'da yazar
+- Aynı seviye ve metindeki tekrarlar tek satırda sayaçla (count) birleştirilir
+- Tablo en fazla max_rows satırda tutulur
+- Son mesajlar (ana sayfadaki "Son Loglar") doğrudan bellekten okunur; yazmayan süreçler
+  (ör. takipçiler) read_recent() ile log tablosundan okur
+"""
+import contextlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+INSERT_SQL = "INSERT INTO log(timestamp, level, message, count) VALUES(?, ?, ?, ?)"
+
+def setup_log_table(conn):
+    """log tablosunu oluşturur, eski tablolara count sütununu ekler"""
+    conn.execute("""CREATE TABLE IF NOT EXISTS log(
+                      id INTEGER PRIMARY KEY AUTOINCREMENT,
+                      timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+                      level TEXT,
+                      message TEXT,
+                      count INTEGER DEFAULT 1)""")
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(log)")]
+    if "count" not in columns:
+        conn.execute("ALTER TABLE log ADD COLUMN count INTEGER DEFAULT 1")
+    conn.commit()
+
+def read_recent(conn, limit=10):
+    """log tablosundaki son girdiler (yeniden eskiye), recent_entries() ile aynı biçimde; tablo yoksa boş"""
+    try:
+        rows = conn.execute("SELECT timestamp, level, message, count FROM log ORDER BY id DESC LIMIT ?",
+                            (limit,)).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    return [{"timestamp": ts, "level": level, "message": message, "count": count or 1}
+            for ts, level, message, count in rows]
+
+class BufferedDbHandler(logging.Handler):
+    """
+    log tablosuna tamponlu yazan logging handler'ı.
+    Tampon capacity girdiyi aşarsa en eski yazılmamış girdiler düşürülür (dropped).
+    """
+
+    def __init__(self, conn, lock=None, capacity=1000, flush_interval=2.0, max_rows=5000,
+                 recent_size=100, level=logging.INFO):
+        super().__init__(level)
+        self.conn = conn
+        self.db_lock = lock if lock is not None else contextlib.nullcontext()
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self.pending = OrderedDict()         # (level, message) -> [timestamp, level, message, count]
+        self.recent = deque(maxlen=recent_size)
+        self.stats = {"written": 0, "collapsed": 0, "dropped": 0, "flushes": 0}
+        self._wake = threading.Event()
+        self._closed = False
+        setup_log_table(conn)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="log-flusher")
+        self._thread.start()
+
+    def emit(self, record):
+        try:
+            message = record.getMessage()
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(record.created))
+            key = (record.levelname, message)
+            with self.lock:
+                entry = self.pending.get(key)
+                if entry is not None:
+                    # Aynı mesaj bu pencerede zaten var: sayacı artır, zamanı güncelle
+                    entry[0] = timestamp
+                    entry[3] += 1
+                    self.pending.move_to_end(key)
+                    with contextlib.suppress(ValueError):
+                        self.recent.remove(entry)
+                    self.recent.append(entry)
+                    self.stats["collapsed"] += 1
+                    return
+                if len(self.pending) >= self.capacity:
+                    self.pending.popitem(last=False)
+                    self.stats["dropped"] += 1
+                entry = [timestamp, record.levelname, message, 1]
+                self.pending[key] = entry
+                self.recent.append(entry)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        """Bekleyen girdileri tek transaction'da yazar ve tabloyu sınırlar"""
+        with self.lock:
+            if not self.pending:
+                return
+            batch = [tuple(entry) for entry in self.pending.values()]
+            self.pending = OrderedDict()
+        with self.db_lock:
+            try:
+                self.conn.executemany(INSERT_SQL, batch)
+                self.conn.execute("DELETE FROM log WHERE id <= (SELECT MAX(id) FROM log) - ?", (self.max_rows,))
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        self.stats["written"] += len(batch)
+        self.stats["flushes"] += 1
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Veritabanı logger'ına değil modül logger'ına yazılır (döngüye girmemek için)
+                logger.error(f"Log tamponu yazılamadı: {str(e)}")
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        try:
+            self.flush()
+        except Exception:
+            pass
+        super().close()
+
+    def recent_entries(self, limit=10):
+        """Son girdiler (yeniden eskiye), ana sayfa ve /api/status için"""
+        with self.lock:
+            entries = list(self.recent)[-limit:]
+        return [{"timestamp": ts, "level": level, "message": message, "count": count}
+                for ts, level, message, count in reversed(entries)]
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Prometheus Metrikleri
+- Harici bağımlılık olmadan sayaç (Counter), gösterge (Gauge) ve histogram (Histogram)
+- get_data() aşamaları (fetch, parse, join, write) için süre histogramı: with metrics.stage("join"): ...
+- Kaynak başına çekilen bayt ve yanıt sayıları, işlenen event/maç ve satır hataları
+- Veri tazeliği göstergeleri (son başarılı döngüden, son değişimden ve kaynak başına son yanıttan beri geçen süre)
+- /metrics için Prometheus metin biçimi (0.0.4): render() ve metrics_response()
+"""
+import datetime
+import math
+import sqlite3
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+INF_LABEL = 'le="+Inf"'
+
+REGISTRY = []
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(n, "") for n in self.labels)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, k)} {_format_value(v)}" for k, v in items]
+
+class Gauge(_Metric):
+    """Değer set() ile verilir ya da fn ile okunma anında hesaplanır (fn etiketli göstergede sözlük döndürür)"""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=(), fn=None):
+        super().__init__(name, help_text, labels)
+        self.fn = fn
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels))
+
+    def render(self):
+        if self.fn is not None:
+            value = self.fn()
+            items = sorted(value.items()) if self.labels else [((), value)]
+            items = [(k if isinstance(k, tuple) else (k,), v) for k, v in items if v is not None]
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, k)} {_format_value(v)}" for k, v in items]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=STAGE_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # [kova sayıları..., toplam, adet]
+                counts = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-2] += value
+            counts[-1] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def render(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, counts in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, INF_LABEL)} {counts[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(counts[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {counts[-1]}")
+        return lines
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+# --- Döngü metrikleri ---
+
+STAGE_SECONDS = Histogram("canli_stage_seconds", "get_data() aşama süreleri (saniye)", ("stage",))
+CYCLE_SECONDS = Histogram("canli_cycle_seconds", "Tüm döngünün süresi (saniye)")
+CYCLES = Counter("canli_cycles_total", "Döngü sonuçları (ok, unchanged, error)", ("result",))
+FETCH_BYTES = Counter("canli_fetch_bytes_total", "Kaynaklardan çekilen yanıt gövdesi baytları", ("source",))
+FETCH_RESPONSES = Counter("canli_fetch_responses_total", "Kaynak yanıtları (HTTP durum kodu ya da error)",
+                          ("source", "status"))
+EVENTS = Counter("canli_events_total", "Eşleştirmeye giren iddaa event sayısı")
+MATCHES = Counter("canli_matches_processed_total", "Kayda dönüştürülen maç sayısı")
+MISSING = Counter("canli_matches_missing_total", "Event'i bulunamayan maç sayısı")
+ROW_FAILURES = Counter("canli_row_failures_total", "İşlenirken hata veren maç sayısı")
+ROWS_WRITTEN = Counter("canli_rows_written_total", "Yazılan satırlar (inserted, updated, transitions)", ("kind",))
+LIVE_MATCHES = Gauge("canli_live_matches", "Son döngüde işlenen maç sayısı")
+LAST_SUCCESS = Gauge("canli_last_success_timestamp_seconds", "Son başarılı döngünün zamanı (unix)")
+CIRCUIT_OPEN = Gauge("canli_source_circuit_open", "Kaynağın devre kesicisi açık mı (1/0)", ("source",))
+LAST_CHANGE = Gauge("canli_last_change_timestamp_seconds", "Son değişen maçın yazıldığı zaman (unix)")
+
+# Arka plan yazma kuyruğu (writebehind.py değerleri fn ile bağlar)
+WRITE_QUEUE_DEPTH = Gauge("canli_write_queue_depth", "Yazılmayı bekleyen döngü sayısı")
+WRITE_QUEUE_RECORDS = Gauge("canli_write_queue_records", "Yazılmayı bekleyen maç kaydı sayısı")
+WRITE_QUEUE_AGE = Gauge("canli_write_queue_age_seconds", "En eski bekleyen döngünün kuyrukta geçirdiği süre")
+WRITE_QUEUE_EVENTS = Counter("canli_write_queue_events_total", "Dolu kuyruk olayları (coalesced, dropped, blocked)",
+                             ("event",))
+
+# Kaynak adı -> son başarılı yanıt zamanı (fetch.py günceller)
+SOURCE_SEEN = {}
+
+def _age_of(value):
+    return time.time() - value if value is not None else None
+
+def _age(gauge):
+    return _age_of(gauge.get())
+
+DATA_AGE = Gauge("canli_data_age_seconds", "Son başarılı döngüden beri geçen süre",
+                 fn=lambda: _age(LAST_SUCCESS))
+CHANGE_AGE = Gauge("canli_change_age_seconds", "Son değişen maçtan beri geçen süre",
+                   fn=lambda: _age(LAST_CHANGE))
+SOURCE_AGE = Gauge("canli_source_age_seconds", "Kaynaktan son başarılı yanıttan beri geçen süre", ("source",),
+                   fn=lambda: {name: time.time() - ts for name, ts in list(SOURCE_SEEN.items())})
+
+def meta_timestamp(conn):
+    """Yazıcının meta.last_updated değeri (yerel saat, ISO) unix zaman olarak; yoksa None"""
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'last_updated'").fetchone()
+        if row:
+            return datetime.datetime.fromisoformat(row[0]).timestamp()
+    except (sqlite3.Error, ValueError):
+        pass
+    return None
+
+def follow_meta(last_updated):
+    """
+    Yazımı başka bir süreç yapıyorsa son başarı ve tazelik göstergelerini veritabanına bağlar:
+    last_updated() okunma anında meta.last_updated'ı (unix) döndürür
+    """
+    LAST_SUCCESS.fn = last_updated
+    DATA_AGE.fn = lambda: _age_of(LAST_SUCCESS.fn())
+
+def follow_local():
+    """Göstergeleri yeniden bu sürecin döngülerine bağlar (süreç yazıcı olduğunda)"""
+    LAST_SUCCESS.fn = None
+    DATA_AGE.fn = lambda: _age(LAST_SUCCESS)
+
+def stage(name):
+    """Aşama süresini ölçen bağlam yöneticisi"""
+    return STAGE_SECONDS.time(stage=name)
+
+def record_write(stats, live, changed):
+    """Başarılı bir yazma döngüsünü kaydeder"""
+    now = time.time()
+    for kind in ("inserted", "updated", "transitions"):
+        if stats.get(kind):
+            ROWS_WRITTEN.inc(stats[kind], kind=kind)
+    LIVE_MATCHES.set(live)
+    LAST_SUCCESS.set(now)
+    if changed:
+        LAST_CHANGE.set(now)
+    CYCLES.inc(result="ok")
+
+def record_unchanged():
+    LAST_SUCCESS.set(time.time())
+    CYCLES.inc(result="unchanged")
+
+def record_error():
+    CYCLES.inc(result="error")
+
+def render():
+    """Tüm metrikleri Prometheus metin biçiminde döndürür"""
+    lines = []
+    for metric in REGISTRY:
+        body = metric.render()
+        if body:
+            lines.extend(metric.header())
+            lines.extend(body)
+    return "\n".join(lines) + "\n"
+
+def metrics_response():
+    """Flask için /metrics yanıtı"""
+    # flask sadece burada gerekir; github_worker gibi web sunucusu olmayan giriş noktaları da bu modülü kullanır
+    from flask import Response
+    return Response(render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Oran Geçmişi (Tick Deposu)
+- Canlı maçların tüm marketlerindeki oranlar ve market durumları ayrı bir veritabanına (odds.db) kaydedilir
+- Sadece değişen sonuçlar (outcome) yazılır; oranlar yüzde bir hassasiyetle tam sayıya çevrilir
+- Ticler event başına bellekte sütunlu array'lerde toplanır: zaman farkı, market, sonuç no, değer farkı
+  (her (market, sonuç) çiftinin batch içindeki ilk değeri mutlak, sonrakiler bir öncekine göre fark)
+- Batch BATCH_TICKS tice ya da BATCH_SECONDS yaşa ulaşınca zlib ile sıkıştırılıp tek satır olarak yazılır;
+  her batch kendi başına çözülebilir, bu yüzden aralık okumada sadece kesişen batch'ler açılır
+- Market durumu (s) STATUS sonuç numarasıyla aynı akışta tutulur
+- Eski batch'ler CANLI_ODDS_RETENTION_HOURS sonra silinir
+
+Ortam değişkenleri:
+- CANLI_ODDS: 0 ise oran geçmişi tutulmaz (varsayılan 1)
+- CANLI_ODDS_DB: veritabanı yolu (varsayılan ana veritabanının yanında odds.db)
+- CANLI_ODDS_RETENTION_HOURS: saklama süresi (varsayılan 168)
+
+Tek başına okuma:
+    python odds.py /data/odds.db EVENT_ID [--market M] [--since TS] [--until TS]
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from array import array
+
+from storage import ReadPool, connect
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("CANLI_ODDS", "1") != "0"
+KEEP_HOURS = float(os.environ.get("CANLI_ODDS_RETENTION_HOURS", "168"))
+BATCH_TICKS = 512
+BATCH_SECONDS = 60
+PRICE_SCALE = 100
+# Market durumunun tutulduğu sonuç numarası
+STATUS = -1
+# Saklama temizliği en fazla bu aralıkla çalışır
+PRUNE_SECONDS = 600
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS odds_batches(
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              event_id INTEGER NOT NULL,
+              t0 INTEGER NOT NULL,
+              t1 INTEGER NOT NULL,
+              n INTEGER NOT NULL,
+              data BLOB NOT NULL)"""
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_odds_event ON odds_batches(event_id, t0)",
+    "CREATE INDEX IF NOT EXISTS idx_odds_t1 ON odds_batches(t1)",
+)
+INSERT_SQL = "INSERT INTO odds_batches(event_id, t0, t1, n, data) VALUES(?,?,?,?,?)"
+
+def default_path(db_file):
+    return os.environ.get("CANLI_ODDS_DB") or os.path.join(os.path.dirname(db_file), "odds.db")
+
+def _int(value, default=None):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+def _price(value):
+    try:
+        return round(float(value) * PRICE_SCALE)
+    except (TypeError, ValueError):
+        return None
+
+def extract(ev_obj):
+    """
+    Event'in marketlerini ((market_id, durum, ((sonuç_no, oran_int), ...)), ...) olarak çıkarır.
+    Market id'si yoksa listedeki sırası kullanılır.
+    """
+    markets = []
+    for pos, m in enumerate(ev_obj.get("m") or []):
+        outcomes = []
+        for k, o in enumerate(m.get("o") or []):
+            price = _price(o.get("odd"))
+            if price is not None:
+                outcomes.append((_int(o.get("no"), k), price))
+        markets.append((_int(m.get("i"), pos), _int(m.get("s"), 0), tuple(outcomes)))
+    return tuple(markets)
+
+def _pack(values):
+    """Array'i platformdan bağımsız (little-endian) baytlara çevirir"""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _unpack(typecode, raw):
+    values = array(typecode)
+    values.frombytes(raw)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+class Batch:
+    """Tek event için açık batch: sütunlu tam sayı array'leri"""
+    __slots__ = ("t0", "t1", "dt", "market", "no", "val", "prev")
+
+    def __init__(self, t0):
+        self.t0 = self.t1 = t0
+        self.dt = array("I")
+        self.market = array("i")
+        self.no = array("i")
+        self.val = array("i")
+        self.prev = {}  # (market, sonuç no) -> batch içindeki son değer
+
+    def add(self, ts, market_id, no, value):
+        key = (market_id, no)
+        self.dt.append(ts - self.t0)
+        self.market.append(market_id)
+        self.no.append(no)
+        self.val.append(value - self.prev.get(key, 0))
+        self.prev[key] = value
+        self.t1 = ts
+
+    def __len__(self):
+        return len(self.dt)
+
+    def encode(self):
+        return zlib.compress(_pack(self.dt) + _pack(self.market) + _pack(self.no) + _pack(self.val), 6)
+
+    def ticks(self, market_id=None):
+        """(ts, market_id, sonuç_no, değer) dizisi"""
+        return decode_ticks(self.t0, self.dt, self.market, self.no, self.val, market_id)
+
+def decode_ticks(t0, dt, market, no, val, market_id=None):
+    # Fark zincirleri (market, sonuç) başına ayrı olduğu için diğer marketler çözülmeden atlanabilir
+    prev = {}
+    for d, m, n, v in zip(dt, market, no, val):
+        if market_id is not None and m != market_id:
+            continue
+        value = prev.get((m, n), 0) + v
+        prev[(m, n)] = value
+        yield t0 + d, m, n, value
+
+def decode_batch(t0, n, data, market_id=None):
+    raw = zlib.decompress(data)
+    size = n * 4
+    return decode_ticks(t0, _unpack("I", raw[:size]), _unpack("i", raw[size:2 * size]),
+                        _unpack("i", raw[2 * size:3 * size]), _unpack("i", raw[3 * size:]), market_id)
+
+class OddsStore:
+    """
+    Kullanım:
+        store.capture(iddaa_verisi, canlı_mac_idleri)   # her döngüde, yazıcı thread'inde
+        store.flush()                                    # dolan/yaşlanan batch'leri yazar
+        store.read(event_id, market_id, since, until)    # herhangi bir thread'den
+    """
+
+    def __init__(self, path, batch_ticks=BATCH_TICKS, batch_seconds=BATCH_SECONDS, keep_hours=KEEP_HOURS):
+        self.path = path
+        self.batch_ticks = batch_ticks
+        self.batch_seconds = batch_seconds
+        self.keep_hours = keep_hours
+        self.conn = connect(path, check_same_thread=False)
+        self.conn.execute(SCHEMA)
+        for sql in INDEXES:
+            self.conn.execute(sql)
+        self.conn.commit()
+        self.readers = ReadPool(path)
+        self.last = {}  # event -> son market tuple'ı (extract çıktısı)
+        self.seen = {}  # event -> son görülme zamanı
+        self.open = {}  # event -> Batch
+        self.last_prune = 0
+        self.stats = {"ticks": 0, "batches": 0, "bytes": 0, "pruned": 0}
+        self._lock = threading.Lock()
+
+    def capture(self, payload, live_ids=None, now=None):
+        """
+        İddaa verisindeki event'lerin değişen oranlarını açık batch'lere ekler.
+        live_ids verilirse sadece o maçlar (str mac_id) işlenir. Dönüş: eklenen tic sayısı.
+        """
+        now = int(now or time.time())
+        events = ((payload or {}).get("data") or {}).get("events") or []
+        if isinstance(events, dict):
+            events = events.values()
+        added = 0
+        with self._lock:
+            for ev_obj in events:
+                event_id = _int(ev_obj.get("i"))
+                if event_id is None or (live_ids is not None and str(event_id) not in live_ids):
+                    continue
+                self.seen[event_id] = now
+                # Kompakt (slim) event'ler oranları çözümleme sırasında çıkarılmış olarak taşır
+                markets = ev_obj["odds"] if "odds" in ev_obj else extract(ev_obj)
+                # Çoğu event döngüler arasında değişmez; tuple karşılaştırması tek tek bakmaktan ucuz
+                previous = self.last.get(event_id)
+                if previous == markets:
+                    continue
+                self.last[event_id] = markets
+                previous = {m[0]: m for m in previous or ()}
+                for market in markets:
+                    market_id, status, outcomes = market
+                    before = previous.get(market_id)
+                    if before == market:
+                        continue
+                    old = {}
+                    if before is not None:
+                        old = dict(before[2])
+                        old[STATUS] = before[1]
+                    batch = self.open.get(event_id)
+                    if batch is None:
+                        batch = self.open[event_id] = Batch(now)
+                    for no, value in ((STATUS, status),) + outcomes:
+                        if old.get(no) != value:
+                            batch.add(now, market_id, no, value)
+                            added += 1
+            self.stats["ticks"] += added
+        return added
+
+    def flush(self, force=False, now=None):
+        """Dolan ya da yaşlanan (force ile tüm) batch'leri tek transaction'da yazar; yazılan batch sayısı"""
+        now = int(now or time.time())
+        with self._lock:
+            ready = [(key, batch) for key, batch in self.open.items()
+                     if force or len(batch) >= self.batch_ticks or now - batch.t0 >= self.batch_seconds]
+            for key, _ in ready:
+                del self.open[key]
+        if ready:
+            rows = [(event_id, batch.t0, batch.t1, len(batch), batch.encode()) for event_id, batch in ready]
+            with self.conn:
+                self.conn.executemany(INSERT_SQL, rows)
+            self.stats["batches"] += len(rows)
+            self.stats["bytes"] += sum(len(row[4]) for row in rows)
+        if now - self.last_prune >= PRUNE_SECONDS:
+            self.prune(now)
+        return len(ready)
+
+    def prune(self, now=None):
+        """Saklama süresini aşan batch'leri siler"""
+        now = int(now or time.time())
+        self.last_prune = now
+        with self.conn:
+            deleted = self.conn.execute("DELETE FROM odds_batches WHERE t1 < ?",
+                                        (now - int(self.keep_hours * 3600),)).rowcount
+        self.stats["pruned"] += deleted
+        # Bir saattir görülmeyen (biten) maçların son değerleri unutulur
+        with self._lock:
+            stale = {event_id for event_id, ts in self.seen.items() if now - ts > 3600 and event_id not in self.open}
+            for event_id in stale:
+                del self.seen[event_id]
+                self.last.pop(event_id, None)
+        return deleted
+
+    def read(self, event_id, market_id=None, since=None, until=None):
+        """Yazılmış batch'lerle birlikte henüz bellekte olan ticleri de döndürür (bkz. read)"""
+        ticks = read(self.readers.connection(), event_id, market_id, since, until)
+        with self._lock:
+            batch = self.open.get(int(event_id))
+            if batch is not None:
+                ticks.extend(_select(batch.ticks(market_id), since, until))
+        ticks.sort(key=lambda t: t[0])
+        return ticks
+
+def _select(ticks, since, until):
+    return [t for t in ticks if (since is None or t[0] >= since) and (until is None or t[0] <= until)]
+
+def read(conn, event_id, market_id=None, since=None, until=None):
+    """
+    Event'in (isteğe bağlı tek market) yazılmış oran geçmişi, zamana göre sıralı.
+    Sadece aralıkla kesişen batch'ler açılır (idx_odds_event); market verilirse diğer marketlerin ticleri çözülmez.
+    Dönüş: [(ts, market_id, sonuç_no, değer)]; değer STATUS için market durumu, diğerlerinde oran*100.
+    """
+    sql = "SELECT t0, n, data FROM odds_batches WHERE event_id = ?"
+    params = [int(event_id)]
+    if since is not None:
+        sql += " AND t1 >= ?"
+        params.append(int(since))
+    if until is not None:
+        sql += " AND t0 <= ?"
+        params.append(int(until))
+    ticks = [tick for t0, n, data in conn.execute(sql, params).fetchall()
+             for tick in _select(decode_batch(t0, n, data, market_id), since, until)]
+    ticks.sort(key=lambda t: t[0])
+    return ticks
+
+def to_json(event_id, ticks):
+    """read() çıktısını API yanıtına çevirir: oranlar ve market durumları ayrı listelerde"""
+    return {
+        "event_id": int(event_id),
+        "odds": [[ts, m, no, value / PRICE_SCALE] for ts, m, no, value in ticks if no != STATUS],
+        "status": [[ts, m, value] for ts, m, no, value in ticks if no == STATUS],
+    }
+
+def query_args(args):
+    """İstek parametrelerinden (market, since, until) çıkarır; geçersizse ValueError"""
+    values = []
+    for name in ("market", "since", "until"):
+        raw = args.get(name)
+        if raw in (None, ""):
+            values.append(None)
+            continue
+        try:
+            values.append(int(raw))
+        except ValueError:
+            raise ValueError(f"{name} tam sayı olmalı: {raw}")
+    return tuple(values)
+
+def main():
+    parser = argparse.ArgumentParser(description="Oran geçmişini okur")
+    parser.add_argument("db")
+    parser.add_argument("event_id", type=int)
+    parser.add_argument("--market", type=int)
+    parser.add_argument("--since", type=int)
+    parser.add_argument("--until", type=int)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    ticks = read(conn, args.event_id, args.market, args.since, args.until)
+    print(json.dumps(to_json(args.event_id, ticks), ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,14 @@
 PythonAnywhere için Flask web uygulaması
 Veritabanına web üzerinden erişim sağlar
 """
-from flask import Flask, send_file
+from flask import Flask, jsonify, request
 import os
+import sqlite3
 from pathlib import Path
+from dbsnapshot import DbDownloads
+import metrics
+import odds
+import timeline
 
 app = Flask(__name__)
 
@@ -13,6 +18,25 @@ HOME = str(Path.home())
 DATA_DIR = os.path.join(HOME, "futbol_data")
 DB_FILE = os.path.join(DATA_DIR, "canli.db")
 
+# Worker'ın yazdığı oran geçmişi
+ODDS_DB = odds.default_path(DB_FILE)
+
+# Worker'ın ürettiği tutarlı veritabanı görüntüleri
+downloads = DbDownloads(os.path.join(DATA_DIR, "snapshots"))
+
+def last_updated():
+    """Worker ayrı bir süreçte çalışır; tazelik veritabanındaki meta.last_updated'dan hesaplanır"""
+    try:
+        conn = sqlite3.connect(f"file:{DB_FILE}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return None
+    try:
+        return metrics.meta_timestamp(conn)
+    finally:
+        conn.close()
+
+metrics.follow_meta(last_updated)
+
 @app.route('/')
 def home():
     """Ana sayfa"""
@@ -40,8 +64,41 @@ def home():
 
 @app.route('/canli.db')
 def db():
-    """Veritabanı indirme endpoint'i"""
-    return send_file(DB_FILE, as_attachment=True)
+    """Veritabanı indirme endpoint'i (tutarlı görüntü, gzip, Range; ?since=N ile fark veritabanı)"""
+    return downloads.response()
+
+@app.route('/api/odds/<int:event_id>')
+def odds_history(event_id):
+    """Maçın oran geçmişi (?market=M&since=TS&until=TS); worker'ın yazdığı batch'ler okunur"""
+    try:
+        market, since, until = odds.query_args(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "error": str(e)}), 400
+    if not os.path.exists(ODDS_DB):
+        return jsonify({"status": "error", "error": "Oran geçmişi henüz yok"}), 404
+    conn = sqlite3.connect(f"file:{ODDS_DB}?mode=ro", uri=True)
+    try:
+        return jsonify(odds.to_json(event_id, odds.read(conn, event_id, market, since, until)))
+    finally:
+        conn.close()
+
+@app.route('/api/timeline/<mac_id>')
+def match_timeline(mac_id):
+    """Maçın skor, dakika ve oran durumu geçmişi (?since=TS&until=TS&points=N, unix saniye)"""
+    try:
+        since, until, points = timeline.query_args(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "error": str(e)}), 400
+    conn = sqlite3.connect(f"file:{DB_FILE}?mode=ro", uri=True)
+    try:
+        return jsonify(timeline.timeline(conn, mac_id, since, until, points))
+    finally:
+        conn.close()
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus metin biçiminde veri tazeliği"""
+    return metrics.metrics_response()
 
 @app.route('/health')
 def health():
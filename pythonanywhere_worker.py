@@ -3,14 +3,19 @@
 PythonAnywhere için Futbol Veri Toplama Scripti
 Bu script, 'Always-on task' olarak çalıştırılarak sürekli veri toplar.
 """
-import sqlite3
-import requests
 import time
-import json
 import logging
 import os
 import datetime
 from pathlib import Path
+from dbsnapshot import DbSnapshotter
+from fetch import fetch_all
+import odds
+from odds import OddsStore
+from retention import Retention
+from scheduler import PollScheduler
+from sources import build_all, primary_error, primary_payloads
+from storage import MatchWriter, connect
 
 # Log yapılandırması
 logging.basicConfig(
@@ -28,7 +33,7 @@ os.makedirs(DATA_DIR, exist_ok=True)
 DB_FILE = os.path.join(DATA_DIR, "canli.db")
 
 # SQLite veritabanı yapılandırması
-conn = sqlite3.connect(DB_FILE)
+conn = connect(DB_FILE)
 c = conn.cursor()
 
 # Tablo oluştur (yoksa)
@@ -52,77 +57,64 @@ c.execute("""CREATE TABLE IF NOT EXISTS meta(
                value TEXT)""")
 conn.commit()
 
+# Artımlı yazıcı (mac_id anahtarlı upsert + değişim günlüğü)
+writer = MatchWriter(conn)
+
+# Uyarlanabilir zamanlayıcı (canlı maç sayısı, değişim oranı ve hatalara göre aralık)
+scheduler = PollScheduler(min_interval=30, max_interval=180)
+
+# Saklama: son CANLI_RETENTION_HOURS saat tam çözünürlükte, eskiler özetlenip silinir
+retention = Retention(conn, writer)
+
+# Web uygulamasının sunduğu tutarlı veritabanı görüntüleri (futbol_data/snapshots)
+snapshots = DbSnapshotter(DB_FILE)
+
+# Oran geçmişi (ayrı veritabanı, CANLI_ODDS=0 ile kapatılır)
+odds_store = OddsStore(odds.default_path(DB_FILE)) if odds.ENABLED else None
+
 def get_data():
     """İki API'den veri çeker ve veritabanına kaydeder"""
     logger.info("Veri çekiliyor...")
     
-    # API istekleri
-    headers = {
-        "If-Modified-Since": "Sat, 1 Jan 2000 00:00:00 GMT",
-        "Content-Type": "application/json",
-        "User-Agent": "Mozilla/5.0"
-    }
     try:
-        j1 = requests.get("https://sportsbookv2.iddaa.com/sportsbook/events?st=1&type=1&version=0", 
-                        headers=headers, timeout=10).json()
-        j2 = requests.get("https://www.bilyoner.com/api/v3/mobile/aggregator/gamelist/all/v1?tabType=9999&bulletinType=1&liveEventsEnabledForPreBulletin=true", 
-                        headers=headers, timeout=10).json()
-        
-        # Veri işleme
-        sc_list = j1.get("data", {}).get("sc", [])
-        ev_list = j1.get("data", {}).get("events", [])
-        b_list = j2.get("events", [])
+        # API istekleri (kayıtlı kaynaklar paralel, kalıcı bağlantılarla)
+        sources, errors, changed = fetch_all()
+        # Hiçbir ana kaynak (iddaa) gelmediyse döngü hatalıdır; ayrıntı kaynağı (Bilyoner) yoksa ek bilgiler boş kalır
+        error = primary_error(sources, errors)
+        if error:
+            raise error
         
-        # Mevcut maç ID'leri
-        c.execute("SELECT mac_id FROM raw WHERE tarih = date('now')")
-        existing_ids = set([r[0] for r in c.fetchall()])
+        # Hiçbir kaynak değişmediyse ayrıştırma ve yazma atlanır
+        if not any(changed.values()):
+            logger.info("Veri değişmedi, döngü atlandı.")
+            scheduler.unchanged()
+            return True
         
-        # Günlük tabloyu temizle (aynı verileri tekrar tekrar eklememek için)
-        if existing_ids:
-            c.execute("DELETE FROM raw WHERE tarih = date('now')")
-            conn.commit()
+        # Veri işleme (tek geçişte eşleştirme)
+        # Bilyoner kaydında başlangıç tarihi yoksa bugünün tarihi, kayıt hiç yoksa boş
+        records, missing = build_all(sources, today=datetime.date.today().isoformat(), unmatched_date="")
         
-        processed = 0
-        for sc in sc_list:
-            mac_id = sc["id"]
-            skor = f"{sc['ht']['c']}-{sc['at']['c']}"
-            dakika = sc.get("min", "ST")
-            
-            # Eşleşen event bilgisi
-            ev_obj = next((e for e in ev_list if e["i"] == mac_id), None)
-            if not ev_obj:
-                continue
-                
-            ev = ev_obj["hn"]
-            dep = ev_obj["an"]
-            oran = "AÇIK" if any(m.get("s") == "1" for m in ev_obj.get("m", [])[:3]) else "KAPALI"
-            
-            # Bilyoner'den ek bilgiler
-            b_obj = next((b for b in b_list if b.get("brdId") == ev_obj.get("bri")), None)
-            if not b_obj:
-                tarih, saat, lig, mbs = "", "", "", ""
-            else:
-                tarih = b_obj["esd"].split("T")[0] if "esd" in b_obj else datetime.date.today().isoformat()
-                saat = b_obj.get("strt", "")
-                lig = b_obj.get("lgn", "")
-                mbs = b_obj.get("mbs", "")
-            
-            # Veritabanına kaydet
-            c.execute("INSERT INTO raw(mac_id,ev,dep,skor,dakika,oran,tarih,saat,lig,mbs) VALUES(?,?,?,?,?,?,?,?,?,?)",
-                    (mac_id, ev, dep, skor, dakika, oran, tarih, saat, lig, mbs))
-            processed += 1
+        # Veritabanına kaydet (sadece değişen maçlar, meta ile birlikte tek transaction)
+        processed = len(records)
+        stats = writer.write(records, meta={
+            "last_updated": datetime.datetime.now().isoformat(),
+            "record_count": processed,
+        })
+        logger.info(f"Yeni: {stats['inserted']}, güncellenen: {stats['updated']}, değişmeyen: {stats['unchanged']}, "
+                    f"{stats['rows_per_s']} satır/s, commit {stats['commit_ms']} ms")
         
-        # Meta veriyi güncelle
-        now = datetime.datetime.now().isoformat()
-        c.execute("INSERT OR REPLACE INTO meta(key, value) VALUES(?, ?)", 
-                  ("last_updated", now))
-        c.execute("INSERT OR REPLACE INTO meta(key, value) VALUES(?, ?)", 
-                  ("record_count", str(processed)))
+        # Canlı maçların oran geçmişi (sadece değişen oranlar; dolan/yaşlanan batch'ler yazılır)
+        if odds_store is not None:
+            live_ids = {rec[0] for rec in records}
+            for payload in primary_payloads(sources):
+                odds_store.capture(payload, live_ids)
+            odds_store.flush()
         
-        conn.commit()
+        scheduler.success(processed, len(writer.last_changed))
         logger.info(f"{processed} adet maç veritabanına kaydedildi.")
         
     except Exception as e:
+        scheduler.failure(e)
         logger.exception(f"Veri çekme hatası: {str(e)}")
         return False
         
@@ -133,16 +125,21 @@ def main_loop():
     logger.info("Worker servisi başlatıldı.")
     
     while True:
+        scheduler.start_cycle()
         try:
             get_data()
         except Exception as e:
             logger.exception(f"Beklenmeyen hata: {str(e)}")
+        try:
+            retention.run()
+        except Exception as e:
+            logger.exception(f"Saklama hatası: {str(e)}")
+        try:
+            snapshots.refresh()
+        except Exception as e:
+            logger.exception(f"Görüntü hatası: {str(e)}")
         
-        # Web sunucu için ek iş yapmaya gerek yok, veritabanını doğrudan erişilebilir kılabiliriz
-        # PythonAnywhere'de /home/username/ altındaki dosyalar username.pythonanywhere.com/ 
-        # üzerinden erişilebilir olacak
-        
-        time.sleep(60)  # 60 saniyede bir güncelle
+        time.sleep(scheduler.next_delay())  # Yoğunlukta 30 sn, boşta 180 sn'ye kadar
 
 if __name__ == "__main__":
     main_loop()
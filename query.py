@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Maç Sorgu Modülü
+- /api/matches için filtreli, id üzerinde keyset (cursor) sayfalamalı sorgular
+- Filtreler: lig, tarih, mac_id, since/until (ts aralığı)
+- fields ile sütun seçimi (projeksiyon) yapılabilir
+"""
+import compact
+
+RAW_FIELDS = ("id", "ts", "mac_id", "ev", "dep", "skor", "dakika", "oran", "tarih", "saat", "lig", "mbs")
+
+# Sorgu parametresi -> (sütun, karşılaştırma)
+FILTERS = {
+    "lig": ("lig", "="),
+    "tarih": ("tarih", "="),
+    "mac_id": ("mac_id", "="),
+    "since": ("ts", ">="),
+    "until": ("ts", "<"),
+}
+
+FILTER_SQL = {key: f"{column} {op} ?" for key, (column, op) in FILTERS.items()}
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+def is_query(args):
+    """İstek varsayılan 'son 50 maç' dışında bir şey istiyorsa True"""
+    return any(k in args for k in ("cursor", "limit", "fields", *FILTERS))
+
+def parse_fields(value):
+    """fields parametresini doğrular; id her zaman dahil edilir"""
+    if not value:
+        return RAW_FIELDS
+    fields = [f.strip() for f in value.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in RAW_FIELDS]
+    if unknown:
+        raise ValueError(f"Bilinmeyen alan: {', '.join(unknown)}")
+    if "id" not in fields:
+        fields.insert(0, "id")
+    return tuple(fields)
+
+def query_matches(conn, args):
+    """
+    Filtreli ve sayfalı maç sorgusu çalıştırır.
+    args: request.args benzeri sözlük. Hatalı parametrede ValueError fırlatır.
+    Dönüş: {"count", "matches", "next_cursor"}
+    """
+    fields = parse_fields(args.get("fields"))
+    try:
+        limit = min(int(args.get("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+        cursor = int(args["cursor"]) if args.get("cursor") else None
+    except ValueError:
+        raise ValueError("limit ve cursor tam sayı olmalı")
+    if limit <= 0:
+        raise ValueError("limit pozitif olmalı")
+
+    # Kompakt şemada filtreler görünüm yerine samples indekslerini kullanır
+    filters = compact.FILTERS if compact.is_compact(conn) else FILTER_SQL
+    where, params = [], []
+    for key, sql in filters.items():
+        if args.get(key):
+            where.append(sql)
+            params.append(args[key])
+    if cursor is not None:
+        where.append("id < ?")
+        params.append(cursor)
+
+    sql = f"SELECT {', '.join(fields)} FROM raw"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+
+    rows = [dict(zip(fields, row)) for row in conn.execute(sql, params).fetchall()]
+    next_cursor = rows[-1]["id"] if len(rows) == limit else None
+    return {"count": len(rows), "matches": rows, "next_cursor": next_cursor}
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Ham Yanıt Kaydedici ve Yeniden Oynatıcı
+- CANLI_RECORD_DB verilirse iddaa ve Bilyoner'den gelen her yanıt gövdesi (304 hariç) zamanıyla kaydedilir
+- Gövdeler içerik özetiyle (fetch'in zaten hesapladığı blake2b) tekilleştirilir: aynı bülten tekrar
+  geldiğinde sadece responses'a küçük bir satır eklenir, gövde bir kez zlib ile sıkıştırılıp saklanır
+- Kayıtlar bellekte toplanır, arka plan thread'i flush_interval'da bir tek transaction'da yazar;
+  sıkıştırma ve disk sorgu döngüsünü bekletmez. Tampon dolarsa en eski kayıtlar düşürülür (dropped)
+- Aynı döngüde çekilen yanıtlar döngünün başlangıç zamanıyla (cycle) gruplanır
+- Yeniden oynatma kayıtları döngü döngü fetch.apply_body() -> build_all() -> MatchWriter yolundan geçirir;
+  raw ve transitions satırları kaydın zamanıyla yazılır. Hız 0 ise bekleme yapılmaz (geriye dönük
+  doldurma), 1 ise orijinal tempoda, N ise N kat hızlı oynatılır
+
+Ortam değişkenleri:
+- CANLI_RECORD_DB: kayıt veritabanı yolu (yoksa kayıt yapılmaz)
+- CANLI_RECORD_RETENTION_HOURS: bu süreden eski yanıtlar ve artık kullanılmayan gövdeler silinir
+  (varsayılan 0: silinmez)
+
+Kullanım:
+    python recorder.py stats KAYIT.db
+    python recorder.py replay KAYIT.db HEDEF.db [--speed 0] [--since TS] [--until TS]
+                                               [--sources iddaa,bilyoner] [--odds ODDS.db]
+"""
+import argparse
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from storage import connect
+
+logger = logging.getLogger(__name__)
+
+RECORD_DB = os.environ.get("CANLI_RECORD_DB")
+KEEP_HOURS = float(os.environ.get("CANLI_RECORD_RETENTION_HOURS", "0"))
+LEVEL = 6
+# Saklama temizliği en fazla bu aralıkla çalışır
+PRUNE_SECONDS = 600
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS bodies(
+         id INTEGER PRIMARY KEY,
+         hash BLOB NOT NULL UNIQUE,
+         size INTEGER NOT NULL,
+         data BLOB NOT NULL)""",
+    """CREATE TABLE IF NOT EXISTS responses(
+         id INTEGER PRIMARY KEY,
+         ts REAL NOT NULL,
+         cycle REAL NOT NULL,
+         source TEXT NOT NULL,
+         body_id INTEGER NOT NULL)""",
+    "CREATE INDEX IF NOT EXISTS idx_responses_cycle ON responses(cycle)",
+)
+BODY_SQL = "INSERT INTO bodies(hash, size, data) VALUES(?,?,?)"
+RESPONSE_SQL = "INSERT INTO responses(ts, cycle, source, body_id) VALUES(?,?,?,?)"
+
+# Hedef veritabanı raw tablosu (worker.py ile aynı)
+RAW_SCHEMA = """CREATE TABLE IF NOT EXISTS raw(
+                  id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  ts TEXT DEFAULT CURRENT_TIMESTAMP,
+                  mac_id TEXT, ev TEXT, dep TEXT, skor TEXT, dakika TEXT,
+                  oran TEXT, tarih TEXT, saat TEXT, lig TEXT, mbs TEXT)"""
+
+def setup(conn):
+    for sql in SCHEMA:
+        conn.execute(sql)
+    conn.commit()
+
+class Recorder:
+    """
+    Kullanım:
+        recorder.start_cycle()                        # fetch_all başında
+        recorder.record(kaynak, gövde, özet)          # her 200 yanıtında, fetch thread'lerinden
+    """
+
+    def __init__(self, path, flush_interval=5.0, capacity=2000, keep_hours=KEEP_HOURS, level=LEVEL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.capacity = capacity
+        self.keep_hours = keep_hours
+        self.level = level
+        self.conn = connect(path, check_same_thread=False)
+        setup(self.conn)
+        self.cycle = time.time()
+        self.pending = []               # (ts, cycle, kaynak, özet, gövde)
+        self.known = OrderedDict()      # özet -> bodies.id (son görülen gövdeler)
+        self.last_prune = 0
+        self.stats = {"responses": 0, "bodies": 0, "bytes_in": 0, "bytes_stored": 0,
+                      "dropped": 0, "flushes": 0, "pruned": 0}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="recorder")
+        self._thread.start()
+        # Süreç kapanırken tamponda kalanlar yazılır
+        atexit.register(self.close)
+
+    def start_cycle(self):
+        """Yeni döngünün başlangıç zamanı; bu döngüdeki yanıtlar bununla gruplanır"""
+        self.cycle = time.time()
+
+    def record(self, source, content, digest=None):
+        """Yanıt gövdesini yazılmak üzere tampona ekler (sıkıştırma ve disk arka plan thread'inde)"""
+        if digest is None:
+            digest = hashlib.blake2b(content, digest_size=16).digest()
+        with self._lock:
+            if len(self.pending) >= self.capacity:
+                self.pending.pop(0)
+                self.stats["dropped"] += 1
+            self.pending.append((time.time(), self.cycle, source, digest, content))
+
+    def flush(self):
+        """Bekleyen yanıtları tek transaction'da yazar; yeni gövdeler sıkıştırılıp bir kez saklanır"""
+        with self._lock:
+            batch, self.pending = self.pending, []
+        with self._db_lock:
+            if batch:
+                self._write(batch)
+            if self.keep_hours > 0 and time.time() - self.last_prune >= PRUNE_SECONDS:
+                self.prune()
+
+    def _write(self, batch):
+        conn = self.conn
+        rows, new_bodies, stored = [], 0, 0
+        try:
+            for ts, cycle, source, digest, content in batch:
+                body_id = self.known.get(digest)
+                if body_id is None:
+                    row = conn.execute("SELECT id FROM bodies WHERE hash = ?", (digest,)).fetchone()
+                    if row is None:
+                        data = zlib.compress(content, self.level)
+                        body_id = conn.execute(BODY_SQL, (digest, len(content), data)).lastrowid
+                        new_bodies += 1
+                        stored += len(data)
+                    else:
+                        body_id = row[0]
+                    self.known[digest] = body_id
+                    if len(self.known) > 256:
+                        self.known.popitem(last=False)
+                else:
+                    self.known.move_to_end(digest)
+                rows.append((ts, cycle, source, body_id))
+            conn.executemany(RESPONSE_SQL, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            # Geri alınan gövdelerin id'leri artık geçersiz
+            self.known.clear()
+            raise
+        self.stats["responses"] += len(rows)
+        self.stats["bodies"] += new_bodies
+        self.stats["bytes_in"] += sum(len(item[4]) for item in batch)
+        self.stats["bytes_stored"] += stored
+        self.stats["flushes"] += 1
+
+    def prune(self, now=None):
+        """Saklama süresini aşan yanıtları ve artık hiçbir yanıtın kullanmadığı gövdeleri siler"""
+        now = now or time.time()
+        self.last_prune = now
+        with self.conn:
+            deleted = self.conn.execute("DELETE FROM responses WHERE cycle < ?",
+                                        (now - self.keep_hours * 3600,)).rowcount
+            if deleted:
+                self.conn.execute("DELETE FROM bodies WHERE id NOT IN (SELECT body_id FROM responses)")
+        if deleted:
+            self.known.clear()
+            self.stats["pruned"] += deleted
+        return deleted
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Yanıt kaydı yazılamadı: {str(e)}")
+
+    def close(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Yanıt kaydı yazılamadı: {str(e)}")
+
+    def status(self):
+        """/api/status için sayaçlar ve tampon durumu"""
+        with self._lock:
+            return dict(self.stats, path=self.path, pending=len(self.pending))
+
+def from_env():
+    """CANLI_RECORD_DB tanımlıysa Recorder, değilse None"""
+    if not RECORD_DB:
+        return None
+    logger.info(f"Ham yanıtlar kaydediliyor: {RECORD_DB}")
+    return Recorder(RECORD_DB)
+
+def cycles(conn, since=None, until=None, sources=None):
+    """
+    Kayıtları döngü sırasıyla verir: (döngü zamanı, [(kaynak, gövde, özet), ...]).
+    Art arda aynı gövde tekrar açılmaz.
+    """
+    where, params = [], []
+    if since is not None:
+        where.append("r.cycle >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("r.cycle < ?")
+        params.append(until)
+    if sources:
+        where.append(f"r.source IN ({','.join('?' * len(sources))})")
+        params.extend(sources)
+    sql = ("SELECT r.cycle, r.source, b.id, b.hash, b.data FROM responses r JOIN bodies b ON b.id = r.body_id"
+           + (f" WHERE {' AND '.join(where)}" if where else "") + " ORDER BY r.cycle, r.id")
+    current, group, last = None, [], {}
+    for cycle, source, body_id, digest, data in conn.execute(sql, params):
+        if cycle != current:
+            if group:
+                yield current, group
+            current, group = cycle, []
+        cached = last.get(source)
+        if cached is None or cached[0] != body_id:
+            cached = last[source] = (body_id, zlib.decompress(data))
+        group.append((source, cached[1], digest))
+    if group:
+        yield current, group
+
+def replay(rec_path, target_path, speed=0.0, since=None, until=None, sources=None, odds_path=None):
+    """
+    Kayıtları hedef veritabanına ingestion yolundan geçirerek yazar.
+    Dönüş: döngü, yazım ve satır sayıları ile süre (sözlük).
+    """
+    # fetch bu modülü içe aktarır; döngüsel içe aktarmayı önlemek için burada
+    import fetch
+    from odds import OddsStore
+    from sources import SOURCES, build_all, primary_error, primary_payloads
+    from storage import MatchWriter
+
+    rec = connect(rec_path)
+    conn = connect(target_path, check_same_thread=False)
+    conn.execute(RAW_SCHEMA)
+    conn.commit()
+    clock = {"now": time.time()}
+    writer = MatchWriter(conn, clock=lambda: clock["now"])
+    odds_store = OddsStore(odds_path) if odds_path else None
+
+    states = {}
+    totals = {"cycles": 0, "responses": 0, "writes": 0, "unchanged": 0, "failed": 0,
+              "inserted": 0, "updated": 0, "transitions": 0}
+    start, first = time.monotonic(), None
+    try:
+        for cycle, responses in cycles(rec, since, until, sources):
+            if speed > 0:
+                first = cycle if first is None else first
+                delay = (cycle - first) / speed - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            clock["now"] = cycle
+            totals["cycles"] += 1
+            totals["responses"] += len(responses)
+
+            changed = False
+            for name, content, digest in responses:
+                source = SOURCES.get(name)
+                if source is None:
+                    continue
+                state = states.setdefault(name, {})
+                try:
+                    changed = fetch.apply_body(source, state, content, digest, now=cycle) or changed
+                except Exception as e:
+                    logger.warning(f"{name} kaydı işlenemedi ({cycle}): {str(e)}")
+            if not changed:
+                totals["unchanged"] += 1
+                continue
+
+            data = {name: state.get("data") for name, state in states.items()}
+            if primary_error(data, {}):
+                totals["failed"] += 1
+                continue
+            records = build_all(data)[0]
+            if odds_store is not None:
+                live_ids = {r[0] for r in records}
+                for payload in primary_payloads(data):
+                    odds_store.capture(payload, live_ids, now=cycle)
+            stats = writer.write(records)
+            if odds_store is not None:
+                odds_store.flush(now=cycle)
+            totals["writes"] += 1
+            for key in ("inserted", "updated", "transitions"):
+                totals[key] += stats[key]
+    finally:
+        if odds_store is not None:
+            odds_store.flush(force=True, now=clock["now"])
+        rec.close()
+        conn.close()
+    elapsed = time.monotonic() - start
+    totals["elapsed_s"] = round(elapsed, 2)
+    totals["cycles_per_s"] = round(totals["cycles"] / elapsed, 1) if elapsed > 0 else 0.0
+    return totals
+
+def summary(path):
+    """Kayıt veritabanının özeti: yanıt/gövde sayıları, ham ve saklanan boyut, zaman aralığı"""
+    conn = connect(path)
+    try:
+        responses, first, last = conn.execute("SELECT COUNT(*), MIN(ts), MAX(ts) FROM responses").fetchone()
+        cycle_count = conn.execute("SELECT COUNT(DISTINCT cycle) FROM responses").fetchone()[0]
+        bodies, stored = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM bodies").fetchone()
+        raw_bytes = conn.execute("SELECT COALESCE(SUM(b.size), 0) FROM responses r "
+                                 "JOIN bodies b ON b.id = r.body_id").fetchone()[0]
+        per_source = dict(conn.execute("SELECT source, COUNT(*) FROM responses GROUP BY source").fetchall())
+    finally:
+        conn.close()
+    return {
+        "responses": responses,
+        "cycles": cycle_count,
+        "bodies": bodies,
+        "sources": per_source,
+        "raw_bytes": raw_bytes,
+        "stored_bytes": stored,
+        "ratio": round(raw_bytes / stored, 1) if stored else None,
+        "first": first,
+        "last": last,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Kaydedilen ham yanıtları özetler ya da yeniden oynatır")
+    commands = parser.add_subparsers(dest="command", required=True)
+    stats_parser = commands.add_parser("stats", help="Kayıt özeti")
+    stats_parser.add_argument("db", help="Kayıt veritabanı")
+    replay_parser = commands.add_parser("replay", help="Kayıtları hedef veritabanına oynatır")
+    replay_parser.add_argument("db", help="Kayıt veritabanı")
+    replay_parser.add_argument("target", help="Hedef veritabanı (yoksa oluşturulur)")
+    replay_parser.add_argument("--speed", type=float, default=0.0,
+                               help="0: beklemeden, 1: orijinal tempo, N: N kat hızlı")
+    replay_parser.add_argument("--since", type=float, help="Başlangıç (unix saniye)")
+    replay_parser.add_argument("--until", type=float, help="Bitiş (unix saniye, hariç)")
+    replay_parser.add_argument("--sources", help="Sadece bu kaynaklar (virgülle)")
+    replay_parser.add_argument("--odds", help="Oran geçmişi de bu veritabanına yazılır")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.command == "stats":
+        result = summary(args.db)
+    else:
+        sources = args.sources.split(",") if args.sources else None
+        result = replay(args.db, args.target, args.speed, args.since, args.until, sources, args.odds)
+    print(json.dumps(result, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Saklama, Özetleme ve Artımlı VACUUM
+- raw ve transitions tablolarında son N saat tam çözünürlükte tutulur
+- Daha eski raw satırları maç başına son duruma (results) özetlenip silinir
+- Daha eski transitions satırlarının skor değişimleri score_events'e aktarılıp satırlar silinir
+  (upsert modunda büyüyen tablo transitions'tır). transitions tablosu olmayan eski veritabanlarında
+  skor olayları raw satırlarından üretilir
+- İşlem küçük dilimler halinde, her dilim kendi kısa transaction'ında yapılır; canlı yazıcı beklemez
+- Boşalan sayfalar PRAGMA incremental_vacuum ile küçük parçalar halinde dosyadan geri alınır
+
+Komut satırı (ör. ilk kez artımlı vacuum'a geçiş için tek seferlik tam VACUUM):
+    python retention.py /data/canli.db --hours 48 --vacuum
+"""
+import argparse
+import contextlib
+import datetime
+import logging
+import os
+import time
+
+import compact
+from storage import COUNT_SQL, RAW_COUNT_KEY
+
+logger = logging.getLogger(__name__)
+
+KEEP_HOURS = float(os.environ.get("CANLI_RETENTION_HOURS", "48"))
+
+ROW_COLUMNS = ("id", "ts", "mac_id", "ev", "dep", "skor", "dakika", "oran", "tarih", "saat", "lig", "mbs")
+RESULT_COLUMNS = ROW_COLUMNS[2:]
+
+RESULT_SQL = (
+    f"INSERT INTO results({', '.join(RESULT_COLUMNS)}, first_ts, last_ts) "
+    f"VALUES({', '.join('?' * (len(RESULT_COLUMNS) + 2))}) "
+    f"ON CONFLICT(mac_id) DO UPDATE SET "
+    f"{', '.join(f'{c}=excluded.{c}' for c in RESULT_COLUMNS[1:])}, last_ts=excluded.last_ts"
+)
+EVENT_SQL = "INSERT INTO score_events(mac_id, ts, skor, dakika) VALUES(?,?,?,?)"
+
+# Skor olaylarının kaynağı olan en eski transitions satırları (id sırası yazım, dolayısıyla zaman sırasıdır)
+TRANSITIONS_SLICE_SQL = "SELECT id, ts, mac_id, skor, dakika FROM transitions ORDER BY id LIMIT ?"
+LAST_EVENT_SQL = "SELECT skor FROM score_events WHERE mac_id = ? ORDER BY ts DESC, id DESC LIMIT 1"
+
+# Dilim seçimi: düz tabloda raw.ts üzerinden; kompakt şemada raw.ts görünümde hesaplanan bir sütun olduğu
+# için dilimin id'leri samples'ın ts indeksinden (idx_samples_ts) seçilir, sadece o satırlar görünümden okunur
+SLICE_SQL = f"SELECT {', '.join(ROW_COLUMNS)} FROM raw WHERE ts < ? ORDER BY ts, id LIMIT ?"
+COMPACT_SLICE_SQL = (
+    f"SELECT {', '.join(ROW_COLUMNS)} FROM raw WHERE id IN ("
+    f"SELECT id FROM samples WHERE ts < CAST(strftime('%s', ?) AS INTEGER) ORDER BY ts, id LIMIT ?) "
+    f"ORDER BY ts, id"
+)
+
+def setup_rollup(conn):
+    """Özet tablolarını oluşturur"""
+    conn.execute("""CREATE TABLE IF NOT EXISTS results(
+                      mac_id TEXT PRIMARY KEY,
+                      ev TEXT,
+                      dep TEXT,
+                      skor TEXT,
+                      dakika TEXT,
+                      oran TEXT,
+                      tarih TEXT,
+                      saat TEXT,
+                      lig TEXT,
+                      mbs TEXT,
+                      first_ts TEXT,
+                      last_ts TEXT)""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS score_events(
+                      id INTEGER PRIMARY KEY,
+                      mac_id TEXT,
+                      ts TEXT,
+                      skor TEXT,
+                      dakika TEXT)""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_score_events_mac ON score_events(mac_id, ts)")
+    conn.commit()
+
+def enable_incremental_vacuum(conn):
+    """
+    auto_vacuum=INCREMENTAL ayarlar. Yeni (boş) veritabanlarında hemen geçerli olur;
+    dolu veritabanlarında tek seferlik tam VACUUM gerekir (--vacuum). Geçerliyse True döner.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return True
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return True
+    logger.warning("Artımlı vacuum için tek seferlik tam VACUUM gerekli: python retention.py <db> --vacuum")
+    return False
+
+class Retention:
+    """
+    Worker döngüsünden çağrılan saklama görevi.
+    run() her çağrıda en fazla time_budget saniye çalışır, interval dolmadıysa hiçbir şey yapmaz.
+    """
+
+    def __init__(self, conn, writer=None, keep_hours=KEEP_HOURS, batch_size=2000,
+                 vacuum_pages=256, interval=600, time_budget=0.5, count_key=None):
+        self.conn = conn
+        self.writer = writer
+        # meta'daki raw satır sayacı; verilmezse yazıcınınki (yazıcısız komut satırı için ayrıca verilir)
+        self.count_key = count_key or (writer.count_key if writer is not None else None)
+        self.keep_hours = keep_hours
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.interval = interval
+        self.time_budget = time_budget
+        self.last_run = 0.0
+        self.pending = True
+        self.last_stats = {}
+        setup_rollup(conn)
+        self.incremental = enable_incremental_vacuum(conn)
+
+    def cutoff(self):
+        """Bu zamandan eski satırlar özetlenir (ts ile aynı biçimde, UTC)"""
+        limit = datetime.datetime.utcnow() - datetime.timedelta(hours=self.keep_hours)
+        return limit.strftime("%Y-%m-%d %H:%M:%S")
+
+    def rollup_slice(self, cutoff, events=True):
+        """
+        Bir raw dilimini özetleyip siler; işlenen satır sayısını döndürür.
+        events False ise skor olayları üretilmez (transitions'tan gelir).
+        """
+        conn = self.conn
+        is_compact = compact.is_compact(conn)
+        rows = conn.execute(COMPACT_SLICE_SQL if is_compact else SLICE_SQL, (cutoff, self.batch_size)).fetchall()
+        if not rows:
+            return 0
+
+        # Dilimdeki maçların bilinen son skorları (olay üretmek için)
+        last_score = {}
+        for mac_id in {row[2] for row in rows}:
+            found = conn.execute("SELECT skor FROM results WHERE mac_id = ?", (mac_id,)).fetchone()
+            last_score[mac_id] = found[0] if found else None
+
+        results, score_events = {}, []
+        for row in rows:
+            mac_id, ts, skor = row[2], row[1], row[5]
+            if events and skor != last_score[mac_id]:
+                score_events.append((mac_id, ts, skor, row[6]))
+                last_score[mac_id] = skor
+            first_ts = results[mac_id][-2] if mac_id in results else ts
+            results[mac_id] = row[2:] + (first_ts, ts)
+
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(RESULT_SQL, list(results.values()))
+            conn.executemany(EVENT_SQL, score_events)
+            # Kompakt şemada görünümün tetikleyicisi yerine doğrudan samples'tan silinir
+            conn.executemany(f"DELETE FROM {'samples' if is_compact else 'raw'} WHERE id = ?",
+                             [(row[0],) for row in rows])
+            # meta'daki satır sayacı aynı transaction'da düşülür
+            if self.count_key:
+                conn.execute(COUNT_SQL, (-len(rows), self.count_key))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        # Satırı silinen maçları yazıcının belleğinden düşür (yeniden gelirse yeni satır açılır)
+        if self.writer is not None:
+            deleted = {row[0] for row in rows}
+            for mac_id in results:
+                state = self.writer.state.get(mac_id)
+                if state and state[0] in deleted:
+                    del self.writer.state[mac_id]
+        return len(rows)
+
+    def transitions_slice(self, cutoff_ts):
+        """
+        cutoff_ts'den (unix) eski en fazla batch_size transitions satırının skor değişimlerini
+        score_events'e ekleyip satırları siler; işlenen satır sayısını döndürür
+        """
+        conn = self.conn
+        rows = []
+        for row in conn.execute(TRANSITIONS_SLICE_SQL, (self.batch_size,)).fetchall():
+            if row[1] >= cutoff_ts:
+                break
+            rows.append(row)
+        if not rows:
+            return 0
+
+        last_score, events = {}, []
+        for _, ts, mac_id, skor, dakika in rows:
+            if mac_id not in last_score:
+                found = conn.execute(LAST_EVENT_SQL, (mac_id,)).fetchone()
+                last_score[mac_id] = found[0] if found else None
+            if skor != last_score[mac_id]:
+                events.append((mac_id, time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ts)), skor, dakika))
+                last_score[mac_id] = skor
+
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(EVENT_SQL, events)
+            conn.execute("DELETE FROM transitions WHERE id <= ?", (rows[-1][0],))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return len(rows)
+
+    def vacuum_slice(self):
+        """Boş sayfaların bir kısmını dosyadan geri alır; kalan boş sayfa sayısını döndürür"""
+        if not self.incremental:
+            return 0
+        free = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free:
+            self.conn.execute(f"PRAGMA incremental_vacuum({self.vacuum_pages})").fetchall()
+            self.conn.commit()
+            free = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return free
+
+    def run(self, force=False):
+        """Zamanı geldiyse süre bütçesi içinde özetleme ve vacuum dilimleri çalıştırır"""
+        now = time.monotonic()
+        if not force and not self.pending and now - self.last_run < self.interval:
+            return None
+        self.last_run = now
+        deadline = now + self.time_budget
+        cutoff = self.cutoff()
+        cutoff_ts = int(time.time() - self.keep_hours * 3600)
+        has_transitions = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transitions'").fetchone() is not None
+        rolled, pruned, free = 0, 0, 0
+
+        # Her dilim yazıcı kilidini kısa süre tutar, canlı döngü aralarda yazabilir
+        lock = self.writer.lock if self.writer is not None else contextlib.nullcontext()
+        while time.monotonic() < deadline:
+            with lock:
+                n = self.rollup_slice(cutoff, events=not has_transitions)
+            rolled += n
+            if n < self.batch_size:
+                break
+        while has_transitions and time.monotonic() < deadline:
+            with lock:
+                n = self.transitions_slice(cutoff_ts)
+            pruned += n
+            if n < self.batch_size:
+                break
+        while time.monotonic() < deadline:
+            with lock:
+                free = self.vacuum_slice()
+            if not free:
+                break
+
+        # Bütçe yetmediyse bir sonraki döngüde devam et
+        self.pending = time.monotonic() >= deadline
+        self.last_stats = {"rolled_up": rolled, "transitions_pruned": pruned, "free_pages": free,
+                           "pending": self.pending}
+        if rolled or pruned or free:
+            logger.info(f"Saklama: {rolled} satır özetlendi, {pruned} değişim satırı silindi, {free} boş sayfa kaldı")
+        return self.last_stats
+
+def main():
+    import sqlite3
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="raw ve transitions tablolarını özetle ve küçült")
+    parser.add_argument("db", help="SQLite veritabanı dosyası")
+    parser.add_argument("--hours", type=float, default=KEEP_HOURS, help="Tam çözünürlükte tutulacak saat")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="Artımlı vacuum'a geçmek için tek seferlik tam VACUUM çalıştır")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    if args.vacuum:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        logger.info("Tam VACUUM tamamlandı, artımlı vacuum etkin")
+
+    # Canlı yazıcının meta.raw_count sayacı varsa silinen satırlar ondan da düşülür (anahtar yoksa UPDATE boşa gider)
+    has_meta = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'meta'").fetchone()
+    retention = Retention(conn, keep_hours=args.hours, time_budget=float("inf"),
+                          count_key=RAW_COUNT_KEY if has_meta else None)
+    stats = retention.run(force=True)
+    logger.info(f"Sonuç: {stats}")
+    conn.close()
+
+if __name__ == "__main__":
+    main()
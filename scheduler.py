@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Uyarlanabilir Sorgulama Zamanlayıcısı
+- Aralığı canlı maç sayısına ve son döngülerdeki değişim oranına göre belirler
+  (gece boş bültende seyrek, yoğun saatlerde sık sorgu)
+- Hata veya hız sınırı (429) durumunda jitter'lı üstel geri çekilme uygular, Retry-After'a uyar
+- Döngünün kendi süresini aralıktan düşerek sabit bir tempo korur
+"""
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class PollScheduler:
+    """
+    Kullanım:
+        scheduler.start_cycle()
+        ... get_data() içinde scheduler.success(live, changed) veya scheduler.failure(hata) ...
+        time.sleep(scheduler.next_delay())
+    """
+
+    def __init__(self, min_interval, max_interval, busy_live=100, max_backoff=300, smoothing=0.3):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.busy_live = busy_live          # Bu sayıda canlı maçta en kısa aralığa inilir
+        self.max_backoff = max_backoff
+        self.smoothing = smoothing          # Değişim oranı için üstel ortalama katsayısı
+        self.live = 0
+        self.change_rate = 0.0
+        self.failures = 0
+        self.retry_after = None
+        self.cycle_start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def start_cycle(self):
+        """Döngü başlangıcını işaretler (tempo hesabı için)"""
+        self.cycle_start = time.monotonic()
+
+    def success(self, live, changed=0):
+        """Başarılı döngüyü kaydeder: canlı maç sayısı ve değişen maç sayısı"""
+        with self._lock:
+            self.failures = 0
+            self.retry_after = None
+            self.live = live
+            ratio = changed / live if live else 0.0
+            self.change_rate += self.smoothing * (ratio - self.change_rate)
+
+    def unchanged(self):
+        """Kaynakların hiç değişmediği döngüyü kaydeder"""
+        with self._lock:
+            self.failures = 0
+            self.retry_after = None
+            self.change_rate -= self.smoothing * self.change_rate
+
+    def failure(self, error=None):
+        """Başarısız döngüyü kaydeder; HTTP 429/503 için Retry-After başlığı dikkate alınır"""
+        with self._lock:
+            self.failures += 1
+            self.retry_after = None
+            response = getattr(error, "response", None)
+            if response is not None and response.status_code in (429, 503):
+                try:
+                    self.retry_after = float(response.headers.get("Retry-After", ""))
+                except ValueError:
+                    pass
+
+    def interval(self):
+        """Yük ve değişim oranına göre hedef aralığı (saniye) döndürür"""
+        load = min(self.live / self.busy_live, 1.0) if self.busy_live else 1.0
+        # Maçların ~%20'si her döngüde değişiyorsa tam aktivite kabul edilir
+        activity = min(self.change_rate * 5, 1.0)
+        pressure = max(load, activity) if self.live else 0.0
+        return self.max_interval - (self.max_interval - self.min_interval) * pressure
+
+    def next_delay(self):
+        """Bir sonraki döngüye kadar beklenecek süre (döngü süresi düşülmüş)"""
+        with self._lock:
+            if self.failures:
+                # Tam jitter'lı üstel geri çekilme
+                cap = min(self.max_backoff, self.min_interval * 2 ** self.failures)
+                delay = max(self.min_interval, random.uniform(0, cap))
+                if self.retry_after is not None:
+                    delay = max(delay, self.retry_after)
+                logger.info(f"{self.failures}. hata sonrası {delay:.1f} sn beklenecek")
+                return delay
+            target = self.interval()
+        elapsed = time.monotonic() - self.cycle_start
+        return max(0.0, target - elapsed)
+
+    def stats(self):
+        return {
+            "live": self.live,
+            "change_rate": round(self.change_rate, 3),
+            "failures": self.failures,
+            "interval": round(self.interval(), 2),
+        }
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Günlük Shard Çıktısı (GitHub Actions toplayıcısı için)
+- Her gün için tek dosya: data/shards/YYYY-MM-DD.ndjson.gz (UTC)
+- Her çalıştırma sadece değişen maçları, dosyanın sonuna yeni bir gzip üyesi olarak ekler;
+  dosyanın önceki baytları hiç değişmez, git yeni sürümü önceki sürümün küçük bir farkı olarak saklar
+- Her satır bir JSON dizisidir: [ts, mac_id, ev, dep, skor, dakika, oran, tarih, saat, lig, mbs]
+- Gün içindeki son durum aynı günün shard'ından okunur; her günün ilk çalıştırması tüm maçları yazar,
+  böylece her shard tek başına anlamlıdır
+
+Shard'lardan sorgulanabilir SQLite dosyası üretmek için:
+    python shards.py data/shards canli.db [--since 2024-05-01] [--until 2024-05-31]
+"""
+import argparse
+import datetime
+import gzip
+import json
+import logging
+import os
+import time
+import zlib
+
+from ingest import RAW_COLUMNS
+from storage import connect, setup_indexes
+
+logger = logging.getLogger(__name__)
+
+SHARD_COLUMNS = ("ts",) + RAW_COLUMNS
+SUFFIX = ".ndjson.gz"
+BATCH_SIZE = 10000
+
+def shard_path(directory, day):
+    return os.path.join(directory, f"{day}{SUFFIX}")
+
+def list_shards(directory, since=None, until=None):
+    """Dizindeki shard dosyalarını gün sırasıyla döndürür (since/until dahil, YYYY-MM-DD)"""
+    days = sorted(f[:-len(SUFFIX)] for f in os.listdir(directory) if f.endswith(SUFFIX))
+    return [shard_path(directory, d) for d in days
+            if (since is None or d >= since) and (until is None or d <= until)]
+
+def _members(path):
+    """
+    Dosyadaki tam gzip üyelerini (açılmış bayt, üyenin bittiği konum) olarak üretir.
+    Yarım kalmış son üye (ör. kesilen bir çalıştırma) atlanır.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset < len(data):
+        decomp = zlib.decompressobj(wbits=31)
+        try:
+            chunk = decomp.decompress(data[offset:])
+        except zlib.error:
+            chunk = None
+        if chunk is None or not decomp.eof:
+            logger.warning(f"{path}: {offset}. bayttan sonrası yarım kalmış, atlandı")
+            return
+        offset = len(data) - len(decomp.unused_data)
+        yield chunk, offset
+
+def read_shard(path):
+    """Shard satırlarını sırayla üretir"""
+    for chunk, _ in _members(path):
+        for line in chunk.decode("utf-8").splitlines():
+            if line:
+                yield json.loads(line)
+
+class ShardWriter:
+    """Değişen maçları günlük shard'a ekler"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.day = None
+        self.state = {}  # mac_id -> kayıt (aynı gün içindeki son durum)
+        os.makedirs(directory, exist_ok=True)
+
+    def _load(self, day):
+        self.state = {}
+        path = shard_path(self.directory, day)
+        if os.path.exists(path):
+            valid = 0
+            for chunk, valid in _members(path):
+                for line in chunk.decode("utf-8").splitlines():
+                    if line:
+                        row = json.loads(line)
+                        self.state[row[1]] = tuple(row[1:])
+            # Yarım kalmış son üye silinir, yoksa sonraki eklemeler okunamaz
+            if valid < os.path.getsize(path):
+                with open(path, "r+b") as f:
+                    f.truncate(valid)
+        self.day = day
+
+    def write(self, records, now=None):
+        """Değişen kayıtları tek bir gzip üyesi olarak ekler; istatistikleri döndürür"""
+        now = now or datetime.datetime.utcnow()
+        day = now.strftime("%Y-%m-%d")
+        ts = now.strftime("%Y-%m-%d %H:%M:%S")
+        if day != self.day:
+            self._load(day)
+
+        start = time.perf_counter()
+        lines = []
+        for record in records:
+            record = tuple(record)
+            if self.state.get(record[0]) == record:
+                continue
+            self.state[record[0]] = record
+            lines.append(json.dumps([ts, *record], ensure_ascii=False, separators=(",", ":"), default=str))
+
+        path = shard_path(self.directory, day)
+        if lines:
+            payload = gzip.compress(("\n".join(lines) + "\n").encode("utf-8"), compresslevel=9, mtime=0)
+            with open(path, "ab") as f:
+                f.write(payload)
+        return {
+            "written": len(lines),
+            "unchanged": len(records) - len(lines),
+            "file": path,
+            "bytes": os.path.getsize(path) if os.path.exists(path) else 0,
+            "ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+def rebuild(directory, db_path, since=None, until=None):
+    """Shard'lardan raw tablosunu (append modu biçiminde) içeren yeni bir SQLite dosyası üretir"""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    conn = connect(db_path)
+    conn.execute("""CREATE TABLE raw(
+                      id INTEGER PRIMARY KEY AUTOINCREMENT,
+                      ts TEXT DEFAULT CURRENT_TIMESTAMP,
+                      mac_id TEXT,
+                      ev TEXT,
+                      dep TEXT,
+                      skor TEXT,
+                      dakika TEXT,
+                      oran TEXT,
+                      tarih TEXT,
+                      saat TEXT,
+                      lig TEXT,
+                      mbs TEXT)""")
+    conn.execute("""CREATE TABLE meta(
+                      key TEXT PRIMARY KEY,
+                      value TEXT)""")
+    sql = f"INSERT INTO raw({', '.join(SHARD_COLUMNS)}) VALUES({', '.join('?' * len(SHARD_COLUMNS))})"
+
+    total, last_ts = 0, None
+    for path in list_shards(directory, since, until):
+        batch = []
+        for row in read_shard(path):
+            batch.append(row)
+            last_ts = row[0]
+            if len(batch) >= BATCH_SIZE:
+                conn.executemany(sql, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            conn.executemany(sql, batch)
+            total += len(batch)
+        conn.commit()
+        logger.info(f"{os.path.basename(path)} yüklendi, toplam {total} satır")
+
+    if last_ts:
+        conn.execute("INSERT INTO meta VALUES('last_updated', ?)", (last_ts,))
+    conn.commit()
+    setup_indexes(conn)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return total
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Günlük shard'lardan SQLite veritabanı üret")
+    parser.add_argument("shards", help="Shard dizini (ör. data/shards)")
+    parser.add_argument("db", help="Oluşturulacak SQLite dosyası (varsa üzerine yazılır)")
+    parser.add_argument("--since", help="Bu günden itibaren (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Bu güne kadar (YYYY-MM-DD, dahil)")
+    args = parser.parse_args()
+
+    start = time.time()
+    total = rebuild(args.shards, args.db, args.since, args.until)
+    logger.info(f"{total} satır {args.db} dosyasına yazıldı ({time.time() - start:.1f} sn)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Anlık Görüntü (Snapshot) Önbelleği
+- Worker her döngü sonunda değişmez bir görüntü yayınlar
+- Her belge önceden JSON'a çevrilmiş bayt, gzip'li bayt ve güçlü ETag olarak tutulur
+- Endpoint'ler veritabanına hiç dokunmadan bu görüntüyü sunar, If-None-Match için 304 döner
+- HTML sayfaları görüntü başına bir kez üretilip görüntüyle birlikte tutulur
+"""
+import datetime
+import gzip
+import hashlib
+import json
+import threading
+from collections import namedtuple
+
+from flask import Response, request
+
+# Önceden üretilmiş tek bir yanıt gövdesi
+Entry = namedtuple("Entry", "body gzip_body etag gzip_etag")
+
+class Snapshot:
+    """Tek bir döngünün değişmez görüntüsü: JSON belgeleri ve şablon bağlamı"""
+
+    __slots__ = ("created", "entries", "context", "etag", "pages")
+
+    def __init__(self, docs, context=None):
+        self.created = datetime.datetime.now().isoformat()
+        self.entries = {name: make_entry(doc) for name, doc in docs.items()}
+        self.context = context or {}
+        # Görüntünün tamamı için ETag (HTML sayfası gibi türetilmiş yanıtlarda kullanılır)
+        self.etag = hashlib.blake2b("".join(e.etag for e in self.entries.values()).encode(),
+                                    digest_size=16).hexdigest()
+        # Bağlamdan türetilen, ilk istekte bir kez üretilen yanıt gövdeleri (ad -> bayt)
+        self.pages = {}
+
+    def page(self, name, render):
+        """
+        Bağlamdan üretilen sayfayı (ör. ana sayfa HTML'i) görüntü başına bir kez render(context) ile üretir.
+        Sonraki istekler bir sözlük okumasıyla sunulur; iki istek aynı anda üretirse sonuç yine aynıdır.
+        """
+        body = self.pages.get(name)
+        if body is None:
+            body = self.pages[name] = render(self.context).encode("utf-8")
+        return body
+
+def make_entry(doc):
+    """Belgeyi JSON baytlarına, gzip'li baytlara ve ETag'lere çevirir"""
+    body = json.dumps(doc, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    return Entry(body, gzip.compress(body, compresslevel=6, mtime=0), digest, digest + "-gz")
+
+_current = None
+_lock = threading.Lock()
+
+def publish(snap):
+    """Yeni görüntüyü yayınlar (okuyucular eski görüntüyü bitirene kadar kullanabilir)"""
+    global _current
+    with _lock:
+        _current = snap
+
+def current():
+    """Son yayınlanan görüntüyü döndürür (yoksa None)"""
+    return _current
+
+def respond(name, snap=None):
+    """Görüntüdeki belgeyi sunar; gzip ve If-None-Match desteklidir"""
+    snap = snap or _current
+    entry = snap.entries[name]
+    use_gzip = "gzip" in request.headers.get("Accept-Encoding", "")
+    etag = entry.gzip_etag if use_gzip else entry.etag
+
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(entry.gzip_body if use_gzip else entry.body,
+                        mimetype="application/json")
+        if use_gzip:
+            resp.headers["Content-Encoding"] = "gzip"
+    resp.set_etag(etag)
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Kaynak Bağdaştırıcıları
+- Her kaynak bir bağdaştırıcıdır: nereden çekileceği (URL, sorgu, zaman aşımı), nasıl ayrıştırılacağı
+  ve anahtarların nasıl çıkarılacağı
+- Ana kaynaklar (role="primary", ör. iddaa) maç kayıtlarını üretir; ayrıntı kaynakları (role="detail",
+  ör. Bilyoner) brdId -> ek bilgi sözlüğü verir ve tüm ana kaynaklarla eşleştirilir
+- Yeni bir spor, bülten tipi ya da bahis sitesi için get_data() kopyalanmaz, register() ile kaynak eklenir:
+      register(IddaaSource("iddaa-basketbol", query={"st": 2, "type": 1}))
+- Her kaynağın bir devre kesicisi vardır: art arda hatalardan sonra kaynak bir süre hiç istenmez,
+  böylece ölü bir kaynak her döngüde tam zaman aşımına mal olmaz
+
+Ortam değişkenleri:
+- CANLI_SOURCES: çekilecek kaynak adları (virgülle, varsayılan: kayıtlı tüm kaynaklar)
+- CANLI_IDDAA_QUERY: iddaa bülten sorgusu (varsayılan st=1&type=1)
+"""
+import logging
+import os
+import threading
+import time
+from urllib.parse import parse_qsl
+
+import decode
+import metrics
+from ingest import build_records, index_bilyoner
+
+logger = logging.getLogger(__name__)
+
+IDDAA_URL = "https://sportsbookv2.iddaa.com/sportsbook/events"
+IDDAA_QUERY = os.environ.get("CANLI_IDDAA_QUERY", "st=1&type=1")
+BILYONER_URL = "https://www.bilyoner.com/api/v3/mobile/aggregator/gamelist/all/v1?tabType=9999&bulletinType=1&liveEventsEnabledForPreBulletin=true"
+
+# Varsayılan (bağlantı zaman aşımı, okuma zaman aşımı)
+TIMEOUT = (3.05, 10)
+
+class SourceUnavailable(Exception):
+    """Devre kesici açık olduğu için kaynak bu döngüde istenmedi"""
+
+class CircuitBreaker:
+    """
+    closed: istekler normal yapılır
+    open: art arda threshold hatadan sonra cooldown saniye boyunca kaynak atlanır
+    half-open: süre dolunca tek bir deneme yapılır; başarılıysa kapanır, değilse süre ikiye katlanarak yeniden açılır
+    """
+
+    def __init__(self, name, threshold=3, cooldown=30, max_cooldown=600):
+        self.name = name
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Bu döngüde kaynağa istek yapılıp yapılmayacağı"""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    self.skipped += 1
+                    return False
+                self.state = "half-open"
+            return True
+
+    def success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"{self.name} devre kesicisi kapandı")
+            self.state = "closed"
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+        metrics.CIRCUIT_OPEN.set(0, source=self.name)
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half-open":
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            elif self.failures < self.threshold:
+                return
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            logger.warning(f"{self.name} devre kesicisi açıldı, {self.cooldown} sn atlanacak")
+        metrics.CIRCUIT_OPEN.set(1, source=self.name)
+
+    def stats(self):
+        return {"state": self.state, "failures": self.failures, "cooldown": self.cooldown, "skipped": self.skipped}
+
+class Source:
+    """Kaynak bağdaştırıcısı; alt sınıflar parse/index/records'u kaynağa göre tanımlar"""
+    role = "detail"
+    kind = None          # decode.py'deki indirgeme biçimi (iddaa, bilyoner)
+    versioned = False    # version parametresiyle fark yanıtı döndürebilir mi
+
+    def __init__(self, name, url, query=None, timeout=TIMEOUT, breaker=None):
+        self.name = name
+        self.url = url
+        self.query = dict(query or {})
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker(name)
+
+    def params(self, version=None):
+        """İstek sorgu parametreleri (versioned kaynaklarda version eklenir)"""
+        params = dict(self.query)
+        if self.versioned:
+            params["version"] = version or 0
+        return params or None
+
+    def parse(self, body):
+        return decode.decode(self.kind or self.name, body)
+
+    def count(self, payload):
+        """Yanıttaki öğe sayısı (loglama için)"""
+        return 0
+
+    def index(self, payload):
+        """Ayrıntı kaynağı: eşleştirme anahtarı -> öğe"""
+        return {}
+
+    def records(self, payload, details, today="", on_error=None, unmatched_date=None):
+        """Ana kaynak: (kayıtlar, eşleşmeyen maç sayısı)"""
+        return [], 0
+
+class IddaaSource(Source):
+    role = "primary"
+    kind = "iddaa"
+    versioned = True
+
+    def __init__(self, name="iddaa", url=IDDAA_URL, query=None, **kwargs):
+        super().__init__(name, url, query if query is not None else dict(parse_qsl(IDDAA_QUERY)), **kwargs)
+
+    def count(self, payload):
+        return len(((payload or {}).get("data") or {}).get("sc") or [])
+
+    def records(self, payload, details, today="", on_error=None, unmatched_date=None):
+        return build_records(payload, {"events": details}, today=today, on_error=on_error,
+                             unmatched_date=unmatched_date)
+
+class BilyonerSource(Source):
+    kind = "bilyoner"
+
+    def __init__(self, name="bilyoner", url=BILYONER_URL, **kwargs):
+        super().__init__(name, url, **kwargs)
+
+    def count(self, payload):
+        return len((payload or {}).get("events") or [])
+
+    def index(self, payload):
+        return index_bilyoner((payload or {}).get("events", []))
+
+# Kaynak adı -> bağdaştırıcı (kayıt sırası çekme ve eşleştirme sırasıdır)
+SOURCES = {}
+
+def register(source):
+    """Kaynağı kayıt defterine ekler (aynı adla eklenen öncekinin yerine geçer)"""
+    SOURCES[source.name] = source
+    return source
+
+def configured():
+    """CANLI_SOURCES ile seçilmiş kaynaklar (tanımsızsa hepsi)"""
+    names = os.environ.get("CANLI_SOURCES")
+    if not names:
+        return list(SOURCES.values())
+    wanted = [n.strip() for n in names.split(",") if n.strip()]
+    unknown = [n for n in wanted if n not in SOURCES]
+    if unknown:
+        logger.warning(f"Bilinmeyen kaynaklar yok sayıldı: {', '.join(unknown)}")
+    return [SOURCES[n] for n in wanted if n in SOURCES]
+
+register(IddaaSource())
+register(BilyonerSource())
+
+def primary_error(data, errors):
+    """Hiçbir ana kaynaktan veri gelmediyse ilk hatayı, yoksa None döndürür"""
+    primaries = [s.name for s in SOURCES.values() if s.role == "primary" and s.name in data]
+    if not primaries or any(data[name] is not None for name in primaries):
+        return None
+    return errors.get(primaries[0]) or SourceUnavailable(primaries[0])
+
+def breaker_stats():
+    """Kaynak adı -> devre kesici durumu (/api/status için)"""
+    return {name: source.breaker.stats() for name, source in SOURCES.items()}
+
+def primary_payloads(data):
+    """Gelen ana kaynak verileri (oran geçmişi için)"""
+    return [data[s.name] for s in SOURCES.values() if s.role == "primary" and data.get(s.name) is not None]
+
+def source_counts(data):
+    """Gelen kaynak adı -> öğe sayısı"""
+    return {name: SOURCES[name].count(payload) for name, payload in data.items()
+            if payload is not None and name in SOURCES}
+
+def build_all(data, today="", on_error=None, unmatched_date=None):
+    """
+    Çekilen tüm kaynakları tek geçişte eşleştirir.
+    Ayrıntı kaynaklarının indeksleri birleştirilir, her ana kaynağın kayıtları bununla üretilir.
+    Dönüş: (kayıtlar, eşleşmeyen maç sayısı). today ve unmatched_date için bkz. ingest.build_records
+    """
+    details = {}
+    for source in SOURCES.values():
+        if source.role == "detail" and data.get(source.name) is not None:
+            details.update(source.index(data[source.name]))
+
+    records, missing = [], 0
+    for source in SOURCES.values():
+        if source.role == "primary" and data.get(source.name) is not None:
+            recs, miss = source.records(data[source.name], details, today=today, on_error=on_error,
+                                        unmatched_date=unmatched_date)
+            records.extend(recs)
+            missing += miss
+    return records, missing
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Ortak Veritabanı Yazma Modülü
+- raw tablosuna mac_id anahtarlı artımlı yazma (upsert) yapar
+- Sadece skoru, dakikası, oran durumu (veya diğer alanları) değişen satırlar yazılır
+- Her skor/dakika/oran değişimi transitions tablosuna eklenir (sadece ekleme yapılan kompakt günlük)
+- Her döngü executemany ile tek bir açık transaction içinde yazılır
+- Bağlantılar WAL, synchronous=NORMAL, mmap ve boyutlu sayfa önbelleğiyle açılır
+- Web istekleri için thread başına salt-okunur bağlantı havuzu (ReadPool) sağlar
+
+Yazma modu CANLI_WRITE_MODE ortam değişkeniyle seçilir:
+- upsert (varsayılan): raw'da maç başına tek satır tutulur, değişenler güncellenir
+- append: eski davranış, her döngüde tüm maçlar raw'a yeniden eklenir
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import compact
+from ingest import RAW_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+WRITE_MODE = os.environ.get("CANLI_WRITE_MODE", "upsert")
+
+# Bağlantı ayarları (WAL sayesinde okuyucular yazıcının arkasında beklemez)
+PRAGMAS = (
+    ("auto_vacuum", "INCREMENTAL"),  # Sadece yeni dosyalarda etkili (bkz. retention.py)
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("mmap_size", 256 * 1024 * 1024),
+    ("cache_size", -16000),  # KiB cinsinden, ~16 MB
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", 5000),
+)
+
+# transitions tablosuna düşen alanlar (RAW_COLUMNS içindeki sıraları)
+TRACKED = (RAW_COLUMNS.index("skor"), RAW_COLUMNS.index("dakika"), RAW_COLUMNS.index("oran"))
+
+# Sabit SQL metinleri: sqlite3 modülü hazırlanmış ifadeleri metne göre önbelleğe alır
+# ts yazıcının saatinden verilir (CURRENT_TIMESTAMP ile aynı biçim, UTC); yeniden oynatmada kaydın zamanıdır
+INSERT_SQL = f"INSERT INTO raw(ts,{','.join(RAW_COLUMNS)}) VALUES({','.join('?' * (len(RAW_COLUMNS) + 1))})"
+UPDATE_SQL = f"UPDATE raw SET ts=?, {', '.join(c + '=?' for c in RAW_COLUMNS[1:])} WHERE id=?"
+TRANSITION_SQL = "INSERT INTO transitions(ts, mac_id, skor, dakika, oran) VALUES(?,?,?,?,?)"
+META_SQL = "INSERT OR REPLACE INTO meta(key, value) VALUES(?, ?)"
+# raw satır sayacı (meta'da count_key anahtarında): yoksa bir kez tam sayılır, sonra her yazımda artırılır
+RAW_COUNT_KEY = "raw_count"
+COUNT_INIT_SQL = "INSERT OR IGNORE INTO meta(key, value) SELECT ?, COUNT(*) FROM raw"
+COUNT_SQL = "UPDATE meta SET value = CAST(value AS INTEGER) + ? WHERE key = ?"
+
+# raw için ikincil indeksler (mac_id/lig/tarih filtreleri id sıralamasıyla, ts aralıkları, maç zaman çizelgesi)
+RAW_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_raw_mac_id ON raw(mac_id, id)",
+    "CREATE INDEX IF NOT EXISTS idx_raw_mac_ts ON raw(mac_id, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_raw_lig ON raw(lig, id)",
+    "CREATE INDEX IF NOT EXISTS idx_raw_tarih ON raw(tarih, id)",
+    "CREATE INDEX IF NOT EXISTS idx_raw_ts ON raw(ts)",
+)
+
+def apply_pragmas(conn):
+    """Bağlantıya performans ayarlarını uygular"""
+    for name, value in PRAGMAS:
+        conn.execute(f"PRAGMA {name}={value}")
+
+def connect(path, **kwargs):
+    """Ayarlanmış bir SQLite bağlantısı açar"""
+    kwargs.setdefault("cached_statements", 256)
+    conn = sqlite3.connect(path, **kwargs)
+    apply_pragmas(conn)
+    return conn
+
+class ReadPool:
+    """
+    Thread başına salt-okunur bağlantı havuzu.
+    Her Flask istek thread'i kendi bağlantısını bir kez açar ve tekrar kullanır;
+    WAL sayesinde okuyucular birbirini ve yazıcıyı beklemeden paralel çalışır.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns = []
+
+    def connection(self):
+        """Çağıran thread'in salt-okunur bağlantısını döndürür (yoksa açar)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True,
+                                   check_same_thread=False, cached_statements=256)
+            for name, value in PRAGMAS:
+                if name not in ("auto_vacuum", "journal_mode"):
+                    conn.execute(f"PRAGMA {name}={value}")
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def close_all(self):
+        """Havuzdaki tüm bağlantıları kapatır"""
+        with self._lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+
+def setup_indexes(conn):
+    """raw tablosunun ikincil indekslerini oluşturur (kompakt şemada raw bir görünümdür, samples indeksleri kullanılır)"""
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'raw'").fetchone()
+    if row and row[0] != "table":
+        # Sonradan eklenen samples indeksleri mevcut kompakt dosyalarda da oluşturulur
+        for sql in compact.SCHEMA:
+            conn.execute(sql)
+        conn.commit()
+        compact.check_ids(conn)
+        return
+    for sql in RAW_INDEXES:
+        conn.execute(sql)
+    conn.commit()
+
+def setup_transitions(conn):
+    """Skor/dakika/oran değişim tablosunu oluşturur"""
+    conn.execute("""CREATE TABLE IF NOT EXISTS transitions(
+                      id INTEGER PRIMARY KEY,
+                      ts INTEGER,
+                      mac_id TEXT,
+                      skor TEXT,
+                      dakika TEXT,
+                      oran TEXT)""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transitions_mac ON transitions(mac_id, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transitions_mac_ts ON transitions(mac_id, ts)")
+    conn.commit()
+
+class MatchWriter:
+    """
+    raw tablosu için durum bilgili yazıcı.
+    Son yazılan kayıtları mac_id -> (rowid, kayıt) olarak bellekte tutar,
+    böylece değişmeyen maçlar için veritabanına hiç dokunulmaz.
+    """
+
+    def __init__(self, conn, mode=None, clock=time.time, count_key=None):
+        self.conn = conn
+        self.mode = mode or WRITE_MODE
+        # Satır ve değişim zamanlarının kaynağı (yeniden oynatmada kaydedilen yanıtın zamanı)
+        self.clock = clock
+        # Verilirse raw satır sayısı meta tablosunda bu anahtarla, yazımla aynı transaction'da tutulur
+        # (okuyucu süreçler COUNT(*) yapmadan okur)
+        self.count_key = count_key
+        self.count_ready = False
+        self.last_stats = {}
+        # Son yazımda skoru, dakikası veya oran durumu değişen kayıtlar (canlı yayın için)
+        self.last_changed = []
+        # Yazıcı bağlantısını kullanan herkes (ör. log yazımı) bu kilidi almalı
+        self.lock = threading.RLock()
+        setup_indexes(conn)
+        setup_transitions(conn)
+        self.state = self._load_state()
+
+    def reload(self):
+        """Bellekteki durumu veritabanından yeniden yükler (başka bir süreç yazmış olabilir)"""
+        with self.lock:
+            self.state = self._load_state()
+            self.last_changed = []
+            self.count_ready = False
+
+    def _load_state(self):
+        """Her mac_id'nin en son satırını belleğe yükler"""
+        cols = ", ".join(RAW_COLUMNS)
+        rows = self.conn.execute(
+            f"SELECT id, {cols} FROM raw WHERE id IN (SELECT MAX(id) FROM raw GROUP BY mac_id)").fetchall()
+        return {str(row[1]): (row[0], tuple(row[1:])) for row in rows}
+
+    def diff(self, records, now=None):
+        """Kayıtları önceki durumla karşılaştırıp (eklenecek, güncellenecek, değişimler, değişmeyen, değişen kayıtlar) döndürür"""
+        now = int(self.clock() if now is None else now)
+        inserts, updates, transitions, changed = [], [], [], []
+        unchanged = 0
+        for rec in records:
+            prev = self.state.get(rec[0])
+            if prev and prev[1] == rec:
+                if self.mode == "append":
+                    inserts.append(rec)
+                else:
+                    unchanged += 1
+                continue
+
+            if prev is None or self.mode == "append":
+                inserts.append(rec)
+            else:
+                updates.append((prev[0], rec))
+
+            # Skor, dakika veya oran durumu değiştiyse değişim günlüğüne ekle
+            if prev is None or any(prev[1][i] != rec[i] for i in TRACKED):
+                transitions.append((now, rec[0]) + tuple(rec[i] for i in TRACKED))
+                changed.append(rec)
+        return inserts, updates, transitions, unchanged, changed
+
+    def write(self, records, meta=None):
+        """
+        Kayıtları tek transaction içinde yazar ve commit eder.
+        meta verilirse (anahtar -> değer) aynı transaction içinde meta tablosuna yazılır.
+        Dönüş: {"inserted", "updated", "unchanged", "transitions", "rows_per_s", "commit_ms"}
+        """
+        with self.lock:
+            return self._write(records, meta)
+
+    def _write(self, records, meta):
+        start = time.perf_counter()
+        now = int(self.clock())
+        ts = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now))
+        inserts, updates, transitions, unchanged, changed = self.diff(records, now)
+
+        conn = self.conn
+        if conn.in_transaction:
+            conn.commit()
+        c = conn.cursor()
+        try:
+            c.execute("BEGIN IMMEDIATE")
+            max_id = c.execute("SELECT COALESCE(MAX(id), 0) FROM raw").fetchone()[0] if inserts else 0
+            if self.count_key and not self.count_ready:
+                c.execute(COUNT_INIT_SQL, (self.count_key,))
+            c.executemany(INSERT_SQL, [(ts,) + rec for rec in inserts])
+            if self.count_key and inserts:
+                c.execute(COUNT_SQL, (len(inserts), self.count_key))
+            c.executemany(UPDATE_SQL, [(ts,) + rec[1:] + (rowid,) for rowid, rec in updates])
+            c.executemany(TRANSITION_SQL, transitions)
+            if meta:
+                c.executemany(META_SQL, [(k, str(v)) for k, v in meta.items()])
+            # Yeni eklenen satırların rowid'lerini tek sorguda al
+            new_ids = dict(c.execute("SELECT mac_id, id FROM raw WHERE id > ?", (max_id,)).fetchall()) if inserts else {}
+            commit_start = time.perf_counter()
+            conn.commit()
+            commit_ms = (time.perf_counter() - commit_start) * 1000
+        except Exception:
+            conn.rollback()
+            raise
+        self.count_ready = True
+
+        for rec in inserts:
+            self.state[rec[0]] = (new_ids.get(rec[0]), rec)
+        for rowid, rec in updates:
+            self.state[rec[0]] = (rowid, rec)
+        self.last_changed = changed
+
+        elapsed = time.perf_counter() - start
+        rows = len(inserts) + len(updates) + len(transitions)
+        self.last_stats = {
+            "inserted": len(inserts),
+            "updated": len(updates),
+            "unchanged": unchanged,
+            "transitions": len(transitions),
+            "rows_per_s": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+            "commit_ms": round(commit_ms, 2),
+        }
+        logger.debug(f"Yazma: {self.last_stats}")
+        return self.last_stats
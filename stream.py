@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Canlı Maç Farkları Yayını (Server-Sent Events)
+- Worker her döngüde sadece skoru, dakikası veya oran durumu değişen maçları yayınlar
+- Her olay bir kez serileştirilir, tüm istemcilere aynı bayt dizisi iletilir
+- İstemci başına sınırlı tampon: yetişemeyen istemcinin bağlantısı kesilir, Last-Event-ID ile kaldığı yerden devam eder
+- Son olaylar bellekte tutulur; geçmişin dışına düşen istemcilere "reset" olayı gönderilir
+"""
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+from flask import Response, request, stream_with_context
+
+HISTORY_SIZE = 512      # Devam için saklanan son olay sayısı
+CLIENT_BUFFER = 64      # İstemci başına bekleyen olay sınırı
+HEARTBEAT_SECONDS = 15  # Boşta bağlantıyı açık tutmak için yorum satırı aralığı
+
+def format_event(event_id, event, data):
+    """Tek bir SSE mesajını bayt olarak üretir"""
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+class Broadcaster:
+    """Olayları geçmiş tamponuna ekleyip abone istemcilere dağıtır"""
+
+    def __init__(self, history_size=HISTORY_SIZE, client_buffer=CLIENT_BUFFER):
+        self.client_buffer = client_buffer
+        self.history = deque(maxlen=history_size)  # (id, bayt)
+        self.clients = set()
+        # Id'ler zaman tabanlı başlar, böylece yeniden başlatma sonrası eski Last-Event-ID'ler geçmişin dışında kalır
+        self.last_id = int(time.time() * 1000)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def publish(self, data, event="diff"):
+        """Olayı yayınlar; tamponu dolan istemciler düşürülür"""
+        with self._lock:
+            self.last_id += 1
+            message = format_event(self.last_id, event, data)
+            self.history.append((self.last_id, message))
+            for client in list(self.clients):
+                try:
+                    client.put_nowait(message)
+                except queue.Full:
+                    # İstemci yetişemiyor: bağlantıyı kapat, Last-Event-ID ile devam etsin
+                    self.clients.discard(client)
+                    self.dropped += 1
+                    client.overflowed = True
+            return self.last_id
+
+    def subscribe(self, last_event_id=None):
+        """Yeni istemci kuyruğu açar; last_event_id verilirse kaçırılan olaylar önce kuyruğa konur"""
+        client = queue.Queue(maxsize=self.client_buffer)
+        client.overflowed = False
+        with self._lock:
+            if last_event_id is not None and last_event_id != self.last_id:
+                missed = [msg for eid, msg in self.history if eid > last_event_id]
+                oldest = self.history[0][0] if self.history else self.last_id + 1
+                if (last_event_id < oldest - 1 or last_event_id > self.last_id
+                        or len(missed) > self.client_buffer):
+                    # İstenen nokta geçmişin dışında: istemci tam veriyi yeniden çekmeli
+                    missed = [format_event(self.last_id, "reset", {"last_id": self.last_id})]
+                for msg in missed:
+                    client.put_nowait(msg)
+            self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self.clients.discard(client)
+
+    def stats(self):
+        return {"clients": len(self.clients), "last_id": self.last_id, "dropped": self.dropped}
+
+def sse_response(broadcaster):
+    """Flask için SSE yanıtı üretir (Last-Event-ID başlığı veya ?last_id= desteklenir)"""
+    raw_id = request.headers.get("Last-Event-ID") or request.args.get("last_id")
+    try:
+        last_event_id = int(raw_id) if raw_id else None
+    except ValueError:
+        last_event_id = None
+    client = broadcaster.subscribe(last_event_id)
+
+    def generate():
+        try:
+            yield b"retry: 3000\n\n"
+            while not client.overflowed:
+                try:
+                    yield client.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield b": ping\n\n"
+        finally:
+            broadcaster.unsubscribe(client)
+
+    resp = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Maç Zaman Çizelgesi
+- Tek bir maçın skor, dakika ve oran durumu geçmişini döndürür (/api/timeline/<mac_id>)
+- Kaynak transitions tablosudur: yazıcı sadece bu alanlardan biri değiştiğinde satır ekler.
+  Maçın hiç değişim kaydı yoksa (transitions'tan önceki veritabanları) raw okunur
+- Saklama süresinden (retention) eski kısım score_events (skor olayları) ve results (maçın son durumu)
+  tablolarından eklenir; bu örneklerde oran durumu tutulmadığı için None'dır
+- Her iki tablo da (mac_id, ts) indeksiyle okunur, geçmiş büyüse de yanıt süresi maçın kendi satır
+  sayısına bağlı kalır
+- Art arda aynı örnekler (yeniden başlatma, saklama sonrası tekrarlar, raw'daki sorgu tekrarları) birleştirilir
+- points'ten fazla örnek kalırsa seyreltilir: ilk ve son örnek, skor değişimleri, oran durumu değişimleri
+  ve sonra eşit aralıklı dakika değişimleri bu sırayla tutulur
+
+Kullanım: python timeline.py DB MAC_ID [--since TS] [--until TS] [--points N]
+"""
+import argparse
+import json
+
+import compact
+
+DEFAULT_POINTS = 500
+MAX_POINTS = 5000
+
+# Maçın değişim kaydı var mı
+HAS_TRANSITIONS_SQL = "SELECT 1 FROM transitions WHERE mac_id = ? LIMIT 1"
+
+# Kaynak -> (aralık sorgusu, aralık başındaki durumu veren son önceki örnek sorgusu)
+TRANSITIONS_SQL = (
+    "SELECT ts, skor, dakika, oran FROM transitions WHERE mac_id = ? AND ts >= ? AND ts < ? ORDER BY ts, id",
+    "SELECT ts, skor, dakika, oran FROM transitions WHERE mac_id = ? AND ts < ? ORDER BY ts DESC, id DESC LIMIT 1",
+)
+
+_RAW_COLUMNS = "SELECT CAST(strftime('%s', ts) AS INTEGER), skor, dakika, oran FROM raw"
+
+RAW_SQL = (
+    f"{_RAW_COLUMNS} WHERE mac_id = ? AND ts >= datetime(?, 'unixepoch') AND ts < datetime(?, 'unixepoch') "
+    "ORDER BY ts, id",
+    f"{_RAW_COLUMNS} WHERE mac_id = ? AND ts < datetime(?, 'unixepoch') ORDER BY ts DESC, id DESC LIMIT 1",
+)
+
+# Kompakt şemada aralık samples indeksinde çözülür, metin biçimleri görünümden gelir
+COMPACT_SQL = (
+    f"{_RAW_COLUMNS} WHERE id IN (SELECT id FROM samples WHERE mac_id = ? AND ts >= ? AND ts < ?) ORDER BY id",
+    f"{_RAW_COLUMNS} WHERE id IN (SELECT id FROM samples WHERE mac_id = ? AND ts < ? "
+    "ORDER BY ts DESC, id DESC LIMIT 1)",
+)
+
+# Saklamanın özetlediği geçmiş: skor olayları ve özetlenen son durum (ts metin, UTC). Bu örnekler kaynaktaki
+# satırlardan her zaman eskidir (saklama en eski satırları taşır); score_events (mac_id, ts) indeksiyle okunur
+_ARCHIVE_COLUMNS = (
+    "SELECT CAST(strftime('%s', ts) AS INTEGER) AS t, skor, dakika, NULL AS oran FROM score_events "
+    "WHERE mac_id = ? AND {ts} "
+    "UNION ALL "
+    "SELECT CAST(strftime('%s', last_ts) AS INTEGER), skor, dakika, oran FROM results "
+    "WHERE mac_id = ? AND {last_ts}"
+)
+_RANGE = "{} >= datetime(?, 'unixepoch') AND {} < datetime(?, 'unixepoch')"
+_BEFORE = "{} < datetime(?, 'unixepoch')"
+
+ARCHIVE_SQL = (
+    _ARCHIVE_COLUMNS.format(ts=_RANGE.format("ts", "ts"), last_ts=_RANGE.format("last_ts", "last_ts")) + " ORDER BY t",
+    _ARCHIVE_COLUMNS.format(ts=_BEFORE.format("ts"), last_ts=_BEFORE.format("last_ts")) + " ORDER BY t DESC LIMIT 1",
+)
+
+# until verilmezse üst sınır (datetime() için geçerli en büyük değerin altında)
+FAR_FUTURE = 253402300799
+
+def _int_arg(args, name, default):
+    value = args.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} tam sayı olmalı")
+
+def query_args(args):
+    """?since=TS&until=TS&points=N (unix saniye) -> (since, until, points); hatalıysa ValueError"""
+    since = _int_arg(args, "since", 0)
+    until = _int_arg(args, "until", FAR_FUTURE)
+    points = _int_arg(args, "points", DEFAULT_POINTS)
+    if not 2 <= points <= MAX_POINTS:
+        raise ValueError(f"points 2 ile {MAX_POINTS} arasında olmalı")
+    return since, until, points
+
+def _has_table(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+def source_for(conn, mac_id):
+    """Maçın okunacağı kaynak: değişim kaydı varsa transitions, yoksa raw"""
+    if _has_table(conn, "transitions") and conn.execute(HAS_TRANSITIONS_SQL, (str(mac_id),)).fetchone():
+        return "transitions"
+    return "raw"
+
+def read_archive(conn, mac_id, since=0, until=FAR_FUTURE):
+    """
+    Saklamanın özetlediği örnekler: ([(ts, skor, dakika, oran), ...], since'ten önceki son örnek ya da None).
+    Özet tabloları yoksa (saklama hiç çalışmadı) boş döner.
+    """
+    if not (_has_table(conn, "score_events") and _has_table(conn, "results")):
+        return [], None
+    range_sql, seed_sql = ARCHIVE_SQL
+    rows = conn.execute(range_sql, (mac_id, since, until, mac_id, since, until)).fetchall()
+    seed = conn.execute(seed_sql, (mac_id, since, mac_id, since)).fetchone() if since > 0 else None
+    return rows, seed
+
+def read(conn, mac_id, since=0, until=FAR_FUTURE, source=None):
+    """
+    Maçın [since, until) aralığındaki örnekleri: (kaynak, [(ts, skor, dakika, oran), ...], arşivden gelen sayı).
+    Saklamanın özetlediği eski örnekler (read_archive) kaynaktakilerin önüne eklenir.
+    since'ten önce örnek varsa sonuncusu zamanı since'e çekilerek başa eklenir (aralık başındaki durum).
+    """
+    mac_id = str(mac_id)
+    source = source or source_for(conn, mac_id)
+    archived, archived_seed = read_archive(conn, mac_id, since, until)
+    rows, seed = [], None
+    if source == "transitions" or _has_table(conn, "raw"):
+        if source == "transitions":
+            range_sql, seed_sql = TRANSITIONS_SQL
+        else:
+            range_sql, seed_sql = COMPACT_SQL if compact.is_compact(conn) else RAW_SQL
+        rows = conn.execute(range_sql, (mac_id, since, until)).fetchall()
+        if since > 0:
+            seed = conn.execute(seed_sql, (mac_id, since)).fetchone()
+    rows = archived + rows
+    seed = seed or archived_seed
+    if seed is not None:
+        rows.insert(0, (since,) + tuple(seed[1:]))
+    return source, rows, len(archived)
+
+def collapse(rows):
+    """Bir öncekiyle aynı skor, dakika ve oran durumuna sahip örnekleri atar"""
+    out, last = [], None
+    for row in rows:
+        values = row[1:]
+        if values != last:
+            out.append(row)
+            last = values
+    return out
+
+def _spread(items, k):
+    """items içinden eşit aralıklı k öğe"""
+    step = len(items) / k
+    return [items[int(j * step)] for j in range(k)]
+
+def downsample(rows, points):
+    """
+    Örnek sayısını points'e indirir. Önem sırası: ilk ve son örnek, skor değişimleri,
+    oran durumu değişimleri, sadece dakika değişimleri. Sığmayan grup eşit aralıklı seyreltilir.
+    """
+    n = len(rows)
+    if n <= points:
+        return rows
+    groups = ([], [], [])
+    for i in range(1, n - 1):
+        prev, cur = rows[i - 1], rows[i]
+        groups[0 if cur[1] != prev[1] else 1 if cur[3] != prev[3] else 2].append(i)
+    keep = {0, n - 1}
+    for group in groups:
+        room = points - len(keep)
+        if room <= 0:
+            break
+        keep.update(group if len(group) <= room else _spread(group, room))
+    return [rows[i] for i in sorted(keep)]
+
+def timeline(conn, mac_id, since=0, until=FAR_FUTURE, points=DEFAULT_POINTS, source=None):
+    """
+    JSON'a hazır zaman çizelgesi: timeline öğeleri [ts, skor, dakika, oran].
+    archived: saklamanın özetlediği tablolardan gelen örnek sayısı (oran durumu None)
+    """
+    source, rows, archived = read(conn, mac_id, since, until, source)
+    collapsed = collapse(rows)
+    result = downsample(collapsed, points)
+    return {
+        "mac_id": str(mac_id),
+        "source": source,
+        "samples": len(rows),
+        "archived": archived,
+        "changes": len(collapsed),
+        "count": len(result),
+        "timeline": [list(row) for row in result],
+    }
+
+def main():
+    import sqlite3
+
+    parser = argparse.ArgumentParser(description="Bir maçın skor/dakika/oran durumu geçmişini yazdırır")
+    parser.add_argument("db", help="SQLite veritabanı dosyası")
+    parser.add_argument("mac_id")
+    parser.add_argument("--since", type=int, default=0, help="Başlangıç (unix saniye)")
+    parser.add_argument("--until", type=int, default=FAR_FUTURE, help="Bitiş (unix saniye, hariç)")
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS, help="En fazla örnek sayısı")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    try:
+        print(json.dumps(timeline(conn, args.mac_id, args.since, args.until, args.points), ensure_ascii=False))
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,32 @@
 #!/usr/bin/env python3
-import sqlite3, requests, time, json, logging, os
-from flask import Flask, send_file
+import time, logging, os
+from flask import Flask, request
 import threading
+from ingest import RAW_COLUMNS
+from dbsnapshot import DbDownloads, DbSnapshotter
+from fetch import fetch_all
+import metrics
+import odds
+from odds import OddsStore
+from retention import Retention
+from scheduler import PollScheduler
+from sources import build_all, primary_error, primary_payloads
+from storage import MatchWriter, ReadPool, connect
+from stream import Broadcaster, sse_response
+import timeline
+import writebehind
+from writebehind import WriteBehind
 
 # Kalıcı disk yapılandırması
-DB_FILE = "/data/canli.db"
-os.makedirs("/data", exist_ok=True)
+DB_FILE = os.environ.get("CANLI_DB_FILE", "/data/canli.db")
+os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
 
 # Log yapılandırması
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # SQLite veritabanı yapılandırması
-conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+conn = connect(DB_FILE, check_same_thread=False)
 c = conn.cursor()
 c.execute("""CREATE TABLE IF NOT EXISTS raw(
                id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -29,71 +43,122 @@ c.execute("""CREATE TABLE IF NOT EXISTS raw(
                mbs TEXT)""")
 conn.commit()
 
+# Artımlı yazıcı (mac_id anahtarlı upsert + değişim günlüğü)
+writer = MatchWriter(conn)
+
+# API okumaları için thread başına salt-okunur bağlantılar
+readers = ReadPool(DB_FILE)
+
+# Canlı maç farkları yayıncısı (SSE)
+live = Broadcaster()
+
+# Uyarlanabilir zamanlayıcı (canlı maç sayısı, değişim oranı ve hatalara göre aralık)
+scheduler = PollScheduler(min_interval=1, max_interval=30)
+
+# Saklama: son CANLI_RETENTION_HOURS saat tam çözünürlükte, eskiler özetlenip silinir
+retention = Retention(conn, writer)
+
+# İndirme için tutarlı, sıkıştırılmış veritabanı görüntüleri (/data/snapshots)
+snapshots = DbSnapshotter(DB_FILE)
+downloads = DbDownloads(snapshots.out_dir)
+
+# Oran geçmişi (ayrı veritabanı, CANLI_ODDS=0 ile kapatılır)
+odds_store = OddsStore(odds.default_path(DB_FILE)) if odds.ENABLED else None
+
 def get_data():
     """İki API'den veri çeker ve veritabanına kaydeder"""
     logger.info("Veri çekiliyor...")
     
-    # API istekleri
-    headers = {
-        "If-Modified-Since": "Sat, 1 Jan 2000 00:00:00 GMT",
-        "Content-Type": "application/json",
-        "User-Agent": "Mozilla/5.0"
-    }
     try:
-        j1 = requests.get("https://sportsbookv2.iddaa.com/sportsbook/events?st=1&type=1&version=0", 
-                        headers=headers, timeout=10).json()
-        j2 = requests.get("https://www.bilyoner.com/api/v3/mobile/aggregator/gamelist/all/v1?tabType=9999&bulletinType=1&liveEventsEnabledForPreBulletin=true", 
-                        headers=headers, timeout=10).json()
+        # API istekleri (kayıtlı kaynaklar paralel, kalıcı bağlantılarla)
+        with metrics.stage("fetch"):
+            sources, errors, changed = fetch_all()
+        # Hiçbir ana kaynak (iddaa) gelmediyse döngü hatalıdır; ayrıntı kaynağı (Bilyoner) yoksa ek bilgiler boş kalır
+        error = primary_error(sources, errors)
+        if error:
+            raise error
         
-        # Veri işleme
-        sc_list = j1.get("data", {}).get("sc", [])
-        ev_list = j1.get("data", {}).get("events", [])
-        b_list = j2.get("events", [])
+        # Hiçbir kaynak değişmediyse ayrıştırma ve yazma atlanır
+        if not any(changed.values()):
+            logger.info("Veri değişmedi, döngü atlandı.")
+            scheduler.unchanged()
+            metrics.record_unchanged()
+            return
         
-        processed = 0
-        for sc in sc_list:
-            mac_id = sc["id"]
-            skor = f"{sc['ht']['c']}-{sc['at']['c']}"
-            dakika = sc.get("min", "ST")
-            
-            # Eşleşen event bilgisi
-            ev_obj = next((e for e in ev_list if e["i"] == mac_id), None)
-            if not ev_obj:
-                continue
-                
-            ev = ev_obj["hn"]
-            dep = ev_obj["an"]
-            oran = "AÇIK" if any(m.get("s") == "1" for m in ev_obj.get("m", [])[:3]) else "KAPALI"
-            
-            # Bilyoner'den ek bilgiler
-            b_obj = next((b for b in b_list if b.get("brdId") == ev_obj.get("bri")), None)
-            if not b_obj:
-                tarih, saat, lig, mbs = "", "", "", ""
-            else:
-                tarih = b_obj["esd"].split("T")[0] if "esd" in b_obj else ""
-                saat = b_obj.get("strt", "")
-                lig = b_obj.get("lgn", "")
-                mbs = b_obj.get("mbs", "")
-            
-            # Veritabanına kaydet
-            c.execute("INSERT INTO raw(mac_id,ev,dep,skor,dakika,oran,tarih,saat,lig,mbs) VALUES(?,?,?,?,?,?,?,?,?,?)",
-                    (mac_id, ev, dep, skor, dakika, oran, tarih, saat, lig, mbs))
-            processed += 1
+        # Veri işleme (tek geçişte eşleştirme)
+        with metrics.stage("join"):
+            records, missing = build_all(sources)
         
-        conn.commit()
-        logger.info(f"{processed} adet maç veritabanına kaydedildi.")
+        # Canlı maçların oran değişimleri (bellekte; dolan/yaşlanan batch'ler yazımdan sonra diske iner)
+        if odds_store is not None:
+            with metrics.stage("odds"):
+                live_ids = {rec[0] for rec in records}
+                for payload in primary_payloads(sources):
+                    odds_store.capture(payload, live_ids)
+        
+        # Veritabanına kaydet (sadece değişen maçlar, tek transaction)
+        if write_queue is not None:
+            # Yazıcı thread'i yazar; döngü diski beklemeden biter
+            write_queue.submit(records)
+        else:
+            with metrics.stage("write"):
+                stats = writer.write(records)
+            after_write(records, stats, writer.last_changed)
     except Exception as e:
+        scheduler.failure(e)
+        metrics.record_error()
         logger.exception(f"Veri çekme hatası: {str(e)}")
-        
+
+def after_write(records, stats, changed):
+    """Yazımdan sonraki işler (arka plan yazmada yazıcı thread'inde çağrılır)"""
+    logger.info(f"Yeni: {stats['inserted']}, güncellenen: {stats['updated']}, değişmeyen: {stats['unchanged']}, "
+                f"{stats['rows_per_s']} satır/s, commit {stats['commit_ms']} ms")
+    
+    # Skoru, dakikası veya oran durumu değişen maçları canlı yayına gönder
+    if changed:
+        live.publish({"matches": [dict(zip(RAW_COLUMNS, rec)) for rec in changed]})
+    
+    if odds_store is not None:
+        odds_store.flush()
+    
+    scheduler.success(len(records), len(changed))
+    metrics.record_write(stats, len(records), len(changed))
+    logger.info(f"{len(records)} adet maç veritabanına kaydedildi.")
+
+def write_failed(e):
+    """Arka plan yazma hatası (yazıcı thread'i hatayı loglar)"""
+    scheduler.failure(e)
+    metrics.record_error()
+
+def maintenance():
+    """Saklama ve indirme görüntüsü (arka plan yazmada yazıcı thread'inde, değilse döngü sonunda)"""
+    try:
+        retention.run()
+    except Exception as e:
+        logger.exception(f"Saklama hatası: {str(e)}")
+    try:
+        snapshots.refresh()
+    except Exception as e:
+        logger.exception(f"Görüntü hatası: {str(e)}")
+
+# Arka plan yazma kuyruğu (CANLI_WRITE_BEHIND=0 ile yazım döngü içinde yapılır)
+write_queue = WriteBehind(writer, after_write, write_failed, maintenance) if writebehind.ENABLED else None
+
 def main_loop():
     """Ana döngü fonksiyonu, sürekli çalışır"""
     logger.info("Worker servisi başlatıldı.")
+    if write_queue is not None:
+        write_queue.start()
     while True:
+        scheduler.start_cycle()
         try:
-            get_data()
+            with metrics.CYCLE_SECONDS.time():
+                get_data()
         except Exception as e:
             logger.exception(f"Beklenmeyen hata: {str(e)}")
-        time.sleep(1)  # 1 saniye bekle
+        if write_queue is None:
+            maintenance()
+        time.sleep(scheduler.next_delay())  # Yoğunlukta 1 sn, boşta 30 sn'ye kadar
 
 # Flask web sunucusu
 app = Flask(__name__)
@@ -105,8 +170,38 @@ def home():
 
 @app.route("/canli.db")
 def db():
-    """Veritabanı indirme endpoint'i"""
-    return send_file(DB_FILE, as_attachment=True)
+    """Veritabanı indirme endpoint'i (tutarlı görüntü, gzip, Range; ?since=N ile fark veritabanı)"""
+    return downloads.response()
+
+@app.route("/api/stream")
+def stream_matches():
+    """Değişen maçların canlı akışı (Server-Sent Events, Last-Event-ID ile devam edilebilir)"""
+    return sse_response(live)
+
+@app.route("/api/odds/<int:event_id>")
+def odds_history(event_id):
+    """Maçın oran geçmişi (?market=M&since=TS&until=TS, unix saniye)"""
+    if odds_store is None:
+        return {"status": "error", "error": "Oran geçmişi kapalı (CANLI_ODDS=0)"}, 404
+    try:
+        market, since, until = odds.query_args(request.args)
+    except ValueError as e:
+        return {"status": "error", "error": str(e)}, 400
+    return odds.to_json(event_id, odds_store.read(event_id, market, since, until))
+
+@app.route("/api/timeline/<mac_id>")
+def match_timeline(mac_id):
+    """Maçın skor, dakika ve oran durumu geçmişi (?since=TS&until=TS&points=N, unix saniye)"""
+    try:
+        since, until, points = timeline.query_args(request.args)
+    except ValueError as e:
+        return {"status": "error", "error": str(e)}, 400
+    return timeline.timeline(readers.connection(), mac_id, since, until, points)
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """Prometheus metin biçiminde döngü, aşama ve tazelik metrikleri"""
+    return metrics.metrics_response()
 
 @app.route("/health")
 def health():
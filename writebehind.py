@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Arka Plan Yazma Kuyruğu (Write-Behind)
+- get_data() döngünün kayıtlarını kuyruğa bırakıp döner; SQLite yazımı ayrı bir yazıcı thread'inde yapılır.
+  Yavaş disk, vacuum ya da uzun bir okuma kilidi sorgu temposunu kaydırmaz
+- Yazıcı her uyandığında bekleyen tüm döngüleri alır ve maç bazında birleştirir (her maçın en son kaydı,
+  meta'nın en son değerleri) ve tek transaction'da yazar. Geride kalındığında ara durumlar (ör. iki döngü
+  arasında değişip geri dönen dakika) transitions'a düşmeyebilir, son durum her zaman yazılır
+- Kuyrukta en fazla max_pending döngü bekler. Doluysa (yazıcı o kadar döngüdür takılıysa) politika:
+  - coalesce (varsayılan): yeni döngü en son bekleyen döngüyle birleştirilir, bellek sınırlı kalır
+  - block: yer açılana kadar en fazla block_timeout sn beklenir (sorgu hızı disk hızına iner),
+    süre dolarsa coalesce uygulanır
+  - drop: en eski bekleyen döngü atılır
+- Bakım işleri (saklama, veritabanı görüntüsü) verilirse yazıcı thread'inde her yazımdan sonra ve boşta
+  idle_seconds'ta bir çalıştırılır
+- Kuyruk derinliği, bekleyen kayıt, en eski döngünün bekleme süresi ve dolu kuyruk olayları /metrics'te görülür
+
+Ortam değişkenleri:
+- CANLI_WRITE_BEHIND: 0 ise yazım eskisi gibi döngü içinde yapılır (varsayılan 1)
+- CANLI_WRITE_QUEUE_SIZE: en fazla bekleyen döngü (varsayılan 8)
+- CANLI_WRITE_QUEUE_POLICY: coalesce, block ya da drop
+- CANLI_WRITE_QUEUE_BLOCK_SECONDS: block politikasında en uzun bekleme (varsayılan 30)
+"""
+import collections
+import logging
+import os
+import threading
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("CANLI_WRITE_BEHIND", "1") != "0"
+MAX_PENDING = int(os.environ.get("CANLI_WRITE_QUEUE_SIZE", 8))
+POLICY = os.environ.get("CANLI_WRITE_QUEUE_POLICY", "coalesce")
+BLOCK_TIMEOUT = float(os.environ.get("CANLI_WRITE_QUEUE_BLOCK_SECONDS", 30))
+
+POLICIES = ("coalesce", "block", "drop")
+
+class Batch:
+    """Bekleyen bir (ya da birleştirilmiş birkaç) döngü: mac_id -> kayıt, meta ve ilk kuyruğa giriş zamanı"""
+
+    __slots__ = ("records", "meta", "since", "cycles")
+
+    def __init__(self, records, meta):
+        self.records = {rec[0]: rec for rec in records}
+        self.meta = dict(meta or {})
+        self.since = time.monotonic()
+        self.cycles = 1
+
+    def merge(self, other):
+        """Sonraki döngüyü bu döngünün üzerine yazar (maç bazında son kayıt kazanır)"""
+        self.records.update(other.records)
+        self.meta.update(other.meta)
+        self.cycles += other.cycles
+
+class WriteBehind:
+    """
+    MatchWriter önünde sınırlı kuyruk ve tek yazıcı thread'i.
+    on_write(kayıtlar, istatistikler, değişen kayıtlar) ve on_error(hata) yazıcı thread'inde çağrılır.
+    """
+
+    def __init__(self, writer, on_write=None, on_error=None, maintenance=None,
+                 max_pending=MAX_PENDING, policy=POLICY, block_timeout=BLOCK_TIMEOUT, idle_seconds=1.0):
+        if policy not in POLICIES:
+            logger.warning(f"Bilinmeyen kuyruk politikası {policy}, coalesce kullanılacak")
+            policy = "coalesce"
+        self.writer = writer
+        self.on_write = on_write
+        self.on_error = on_error
+        self.maintenance = maintenance
+        self.max_pending = max(1, max_pending)
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.idle_seconds = idle_seconds
+        self.pending = collections.deque()
+        self.busy = False
+        self.counts = {"submitted": 0, "writes": 0, "coalesced": 0, "dropped": 0, "blocked": 0, "errors": 0}
+        self.blocked_seconds = 0.0
+        self._cond = threading.Condition()
+        self._thread = None
+
+        metrics.WRITE_QUEUE_DEPTH.fn = lambda: len(self.pending)
+        metrics.WRITE_QUEUE_RECORDS.fn = self.pending_records
+        metrics.WRITE_QUEUE_AGE.fn = self.age
+
+    def start(self):
+        """Yazıcı thread'ini başlatır (birden çok çağrı zararsızdır)"""
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="write-behind")
+                self._thread.start()
+
+    def submit(self, records, meta=None):
+        """Döngünün kayıtlarını kuyruğa bırakır; kuyruk doluysa politika uygulanır"""
+        self.start()
+        batch = Batch(records, meta)
+        with self._cond:
+            self.counts["submitted"] += 1
+            if len(self.pending) >= self.max_pending and self.policy == "block":
+                start = time.monotonic()
+                self.counts["blocked"] += 1
+                metrics.WRITE_QUEUE_EVENTS.inc(event="blocked")
+                self._cond.wait_for(lambda: len(self.pending) < self.max_pending, self.block_timeout)
+                self.blocked_seconds += time.monotonic() - start
+            if len(self.pending) >= self.max_pending:
+                if self.policy == "drop":
+                    self.pending.popleft()
+                    self.counts["dropped"] += 1
+                    metrics.WRITE_QUEUE_EVENTS.inc(event="dropped")
+                    logger.warning("Yazma kuyruğu dolu, en eski döngü atıldı")
+                else:
+                    self.pending[-1].merge(batch)
+                    self.counts["coalesced"] += 1
+                    metrics.WRITE_QUEUE_EVENTS.inc(event="coalesced")
+                    return
+            self.pending.append(batch)
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Bekleyen tüm döngüler yazılana kadar bekler; süre dolduysa False"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self.pending and not self.busy, timeout)
+
+    def pending_records(self):
+        with self._cond:
+            return sum(len(batch.records) for batch in self.pending)
+
+    def age(self):
+        """En eski bekleyen döngünün kuyrukta geçirdiği süre (saniye)"""
+        with self._cond:
+            return time.monotonic() - self.pending[0].since if self.pending else 0.0
+
+    def stats(self):
+        with self._cond:
+            return dict(self.counts, policy=self.policy, max_pending=self.max_pending, depth=len(self.pending),
+                        records=sum(len(batch.records) for batch in self.pending),
+                        age_s=round(self.age(), 3), blocked_s=round(self.blocked_seconds, 3))
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self.pending, self.idle_seconds)
+                batches = list(self.pending)
+                self.pending.clear()
+                self.busy = bool(batches)
+                # block politikasında bekleyen döngü varsa yer açıldı
+                self._cond.notify_all()
+            try:
+                if batches:
+                    self._write(batches)
+            except Exception as e:
+                logger.exception(f"Yazıcı thread hatası: {str(e)}")
+            finally:
+                with self._cond:
+                    self.busy = False
+                    self._cond.notify_all()
+            if self.maintenance is not None:
+                try:
+                    self.maintenance()
+                except Exception as e:
+                    logger.exception(f"Bakım hatası: {str(e)}")
+
+    def _write(self, batches):
+        """Bekleyen döngüleri birleştirip tek transaction'da yazar"""
+        merged = batches[0]
+        for batch in batches[1:]:
+            merged.merge(batch)
+        if merged.cycles > 1:
+            logger.info(f"Yazma kuyruğu: {merged.cycles} döngü birleştirildi ({len(merged.records)} maç)")
+        records = list(merged.records.values())
+        try:
+            with metrics.stage("write"):
+                stats = self.writer.write(records, merged.meta or None)
+        except Exception as e:
+            # Döngüler tam maç listesi taşır; kaybolan durum bir sonraki döngüyle yeniden yazılır
+            self.counts["errors"] += 1
+            logger.exception(f"Arka plan yazma hatası: {str(e)}")
+            if self.on_error is not None:
+                self.on_error(e)
+            return
+        self.counts["writes"] += 1
+        if self.on_write is not None:
+            self.on_write(records, stats, list(self.writer.last_changed))